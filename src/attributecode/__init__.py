@@ -14,6 +14,7 @@
 #  limitations under the License.
 # ============================================================================
 
+from collections import Counter
 from collections import namedtuple
 import logging
 import os
@@ -40,10 +41,17 @@ limitations under the License.
 
 class Error(namedtuple('Error', ['severity', 'message'])):
     """
-    An Error data with a severity and message.
+    An Error data with a severity and message and an optional `code`, one of
+    the stable error codes of an error condition.
+
+    Errors are hashable values: two Errors are equal if their severity and
+    message are equal, whatever their code.
     """
 
-    def __new__(self, severity, message):
+    # the code of the errors created without a code
+    code = None
+
+    def __new__(self, severity, message, code=None):
         if message:
             if isinstance(message, str):
                 message = self._clean_string(message)
@@ -51,15 +59,23 @@ class Error(namedtuple('Error', ['severity', 'message'])):
                 message = self._clean_string(repr(message))
                 message = message.strip('"')
 
-        return super(Error, self).__new__(
+        error = super(Error, self).__new__(
             Error, severity, message)
+        if code:
+            error.code = code
+        return error
 
     def __repr__(self, *args, **kwargs):
         sev, msg = self._get_values()
         return 'Error(%(sev)s,  %(msg)s)' % locals()
 
     def __eq__(self, other):
-        return repr(self) == repr(other)
+        return isinstance(other, Error) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = tuple.__hash__
 
     def _get_values(self):
         sev = severities[self.severity]
@@ -98,6 +114,52 @@ class Error(namedtuple('Error', ['severity', 'message'])):
         return s
 
 
+class ErrorCollector(object):
+    """
+    An ordered collection of unique Error objects. Adding an Error already
+    collected is a no-op. The `counts` Counter tracks the count of collected
+    errors by code, with None for the errors without a code.
+    """
+
+    def __init__(self, errors=()):
+        # {Error: None} used as an ordered set
+        self.errors = {}
+        self.counts = Counter()
+        self.extend(errors)
+
+    def append(self, error):
+        """
+        Add an `error` Error if not already collected. Return True if added.
+        """
+        if error in self.errors:
+            return False
+        self.errors[error] = None
+        self.counts[error.code] += 1
+        return True
+
+    def extend(self, errors):
+        for error in errors:
+            self.append(error)
+
+    def has_code(self, code):
+        """
+        Return True if an error with the `code` error code was collected.
+        """
+        return self.counts[code] > 0
+
+    def __contains__(self, error):
+        return error in self.errors
+
+    def __iter__(self):
+        return iter(self.errors)
+
+    def __len__(self):
+        return len(self.errors)
+
+    def to_list(self):
+        return list(self.errors)
+
+
 # modeled after the logging levels
 CRITICAL = 50
 ERROR = 40
@@ -106,6 +168,19 @@ INFO = 20
 DEBUG = 10
 NOTSET = 0
 
+# Stable codes of the error conditions reported by the toolkit
+FIELD_REQUIRED = 'field-required'
+FIELD_EMPTY = 'field-empty'
+FIELD_INVALID = 'field-invalid'
+FIELD_DUPLICATED = 'field-duplicated'
+FIELD_DUPLICATED_VALUE = 'field-duplicated-value'
+FIELD_NAME_INVALID = 'field-name-invalid'
+CUSTOM_FIELD = 'custom-field'
+PATH_NOT_FOUND = 'path-not-found'
+FILE_TEXT_NOT_LOADED = 'file-text-not-loaded'
+ABOUT_FILE_INVALID = 'about-file-invalid'
+API_AUTHORIZATION_DENIED = 'api-authorization-denied'
+
 severities = {
     CRITICAL: 'CRITICAL',
     ERROR: 'ERROR',
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+"""
+A fast line-oriented parser for the subset of YAML used in ABOUT files.
+
+Most ABOUT files only contain comments, flat "key: value" lines possibly
+continued on the next indented lines, "|" literal blocks and lists of plain
+values or of flat mappings such as the "licenses" list. These are parsed
+directly, with the same results as saneyaml.load() of the text normalized
+with util.normalize_about_text(). Anything else, including the duplicated keys
+and the values that YAML would not load as plain strings, is left to saneyaml
+which also reports the errors.
+"""
+
+import re
+
+from attributecode import yaml_backend
+from attributecode.util import boolean_fields
+from attributecode.util import normalize_about_text
+
+# Characters that are not YAML printable characters, or are line breaks for
+# str.splitlines() but not for YAML, or a byte order mark.
+unsupported_chars = re.compile(
+    '[^\\x09\\x0a\\x0d\\x20-\\x7e\\xa0-\\ud7ff\\ue000-\\ufefe\\uff00-\\ufffd'
+    '\\U00010000-\\U0010ffff]')
+
+# A "key: value" line where the key is a plain identifier
+key_value_line = re.compile(r'([A-Za-z_][A-Za-z0-9_.\-]*):(?: (.*))?$')
+
+# The plain values that YAML loads as booleans
+yaml_booleans = frozenset([
+    'yes', 'Yes', 'YES', 'no', 'No', 'NO',
+    'true', 'True', 'TRUE', 'false', 'False', 'FALSE',
+    'on', 'On', 'ON', 'off', 'Off', 'OFF',
+])
+
+# The first characters of a value that is not a YAML plain scalar or that has a
+# special meaning
+indicators = frozenset('-?:,[]{}#&*!|>\'"%@`')
+
+booleans = frozenset(boolean_fields)
+
+
+class Unsupported(Exception):
+    """
+    Raised for a text that is not in the supported subset of YAML.
+    """
+
+
+def load_about_text(text):
+    """
+    Return the data loaded from an ABOUT file `text` as saneyaml.load() would
+    do on the normalized text. Raise an Exception for an invalid text.
+    """
+    try:
+        return parse(text)
+    except Unsupported:
+        return yaml_backend.load(normalize_about_text(text), allow_duplicate_keys=False)
+
+
+def get_plain_value(value):
+    """
+    Return a stripped `value` string loaded as a YAML plain scalar or raise
+    Unsupported.
+    """
+    value = value.strip()
+    if (value and (value[0] in indicators
+                   or value in yaml_booleans
+                   or value == '='
+                   or value.endswith(':')
+                   or ': ' in value
+                   or ' #' in value)):
+        raise Unsupported
+    return value
+
+
+def get_indent(line):
+    return len(line) - len(line.lstrip(' '))
+
+
+def parse(text):
+    """
+    Return the data of an ABOUT file `text` or raise Unsupported if this text
+    is not in the supported subset of YAML.
+    """
+    if unsupported_chars.search(text):
+        raise Unsupported
+    lines = text.replace('\t', '    ').splitlines()
+    count = len(lines)
+    data = {}
+    i = 0
+    while i < count:
+        line = lines[i]
+        i += 1
+        if not line.strip() or line[0] == '#':
+            continue
+        match = key_value_line.match(line)
+        if not match:
+            raise Unsupported
+        key, value = match.groups()
+        if key in data or key in yaml_booleans:
+            # duplicated keys are reported by saneyaml
+            raise Unsupported
+        value = value or ''
+
+        if key in booleans:
+            # the value is wrapped in double quotes in the normalized text
+            value = value.strip()
+            if '"' in value or '\\' in value:
+                raise Unsupported
+            data[key] = value
+        elif value.strip() == '|':
+            data[key], i = parse_literal_block(lines, i)
+        elif not value.strip():
+            data[key], i = parse_sequence(lines, i)
+        else:
+            data[key], i = parse_plain_value(value, lines, i)
+
+        if i < count and lines[i][:1] == ' ' and lines[i].strip():
+            raise Unsupported
+    return data or None
+
+
+def parse_plain_value(value, lines, i):
+    """
+    Return a tuple of (text, index of the next line) for a plain `value`
+    possibly continued on the more indented lines starting at the `i` index of
+    `lines`. The continuation lines are folded: a line break is replaced by a
+    space and each blank line by a line break.
+    """
+    count = len(lines)
+    parts = [get_plain_value(value)]
+    blank_lines = 0
+    while i < count:
+        line = lines[i]
+        if not line.strip():
+            blank_lines += 1
+            i += 1
+            continue
+        if line[0] != ' ':
+            break
+        parts.append('\n' * blank_lines if blank_lines else ' ')
+        parts.append(get_plain_value(line))
+        blank_lines = 0
+        i += 1
+    # the trailing blank lines are not part of the value
+    return ''.join(parts), i - blank_lines
+
+
+def parse_literal_block(lines, i):
+    """
+    Return a tuple of (text, index of the next line) for a "|" literal block
+    starting at the `i` index of `lines`.
+    """
+    count = len(lines)
+    if i < count and not lines[i].strip():
+        # leading blank lines
+        if i + 1 < count and lines[i + 1][:1] == ' ':
+            raise Unsupported
+    if i >= count or not lines[i][:1] == ' ':
+        return '', i
+
+    indent = get_indent(lines[i])
+    content = []
+    while i < count:
+        line = lines[i]
+        if not line.strip():
+            if len(line) > indent:
+                raise Unsupported
+            content.append('')
+        elif get_indent(line) >= indent:
+            content.append(line[indent:])
+        elif line[:1] == ' ':
+            raise Unsupported
+        else:
+            break
+        i += 1
+
+    # clip the trailing blank lines
+    while content and not content[-1]:
+        content.pop()
+    content.append('')
+    return '\n'.join(content), i
+
+
+def parse_sequence(lines, i):
+    """
+    Return a tuple of (list or empty string, index of the next line) for the
+    value of a key without value starting at the `i` index of `lines`: this
+    is either an empty value or a list of plain values or flat mappings.
+    """
+    count = len(lines)
+    start = i
+    while i < count and not lines[i].strip():
+        i += 1
+    if i >= count or not lines[i].lstrip(' ').startswith('- '):
+        if i < count and lines[i][:1] == ' ':
+            raise Unsupported
+        return '', start
+
+    indent = get_indent(lines[i])
+    items = []
+    while i < count:
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+        line_indent = get_indent(line)
+        if line_indent < indent:
+            if line_indent:
+                raise Unsupported
+            break
+        if line_indent > indent or not line[indent:].startswith('- '):
+            if line_indent == 0:
+                break
+            raise Unsupported
+
+        item = line[indent + 2:]
+        if not item.strip():
+            raise Unsupported
+        item_indent = indent + 2 + get_indent(item)
+        match = key_value_line.match(item.lstrip(' '))
+        i += 1
+        if not match:
+            items.append(get_plain_value(item))
+            continue
+
+        mapping = {}
+        while True:
+            key, value = match.groups()
+            if key in mapping or key in yaml_booleans:
+                raise Unsupported
+            mapping[key] = get_plain_value(value or '')
+            if not value or not value.strip():
+                # a nested block or an empty value
+                raise Unsupported
+            # the next key of this mapping
+            while i < count and not lines[i].strip():
+                i += 1
+            if i >= count or get_indent(lines[i]) != item_indent:
+                break
+            match = key_value_line.match(lines[i][item_indent:])
+            if not match:
+                raise Unsupported
+            i += 1
+        if i < count and get_indent(lines[i]) > item_indent and lines[i].strip():
+            raise Unsupported
+        items.append(mapping)
+    return items, i
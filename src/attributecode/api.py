@@ -21,6 +21,7 @@ from urllib.parse import quote
 from urllib.parse import urlencode
 from urllib.error import HTTPError
 
+from attributecode import API_AUTHORIZATION_DENIED
 from attributecode import ERROR
 from attributecode import Error
 
@@ -64,7 +65,7 @@ def request_license_data(api_url, api_key, license_key):
     except HTTPError as http_e:
         msg = (u"Authorization denied. Invalid '--api_key'. "
                u"License generation is skipped.")
-        errors.append(Error(ERROR, msg))
+        errors.append(Error(ERROR, msg, API_AUTHORIZATION_DENIED))
     except Exception as e:
         # Already checked the authorization and accessible of the URL.
         # The only exception left is URL is accessible, but it's not a valid API URL
@@ -0,0 +1,467 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+"""
+Read-only virtual directory trees backed by zip and tar archives.
+
+The members of an archive are seen as the files of a directory tree rooted at
+the archive location such that the member "foo/bar.ABOUT" of "/tmp/input.zip"
+has the "/tmp/input.zip/foo/bar.ABOUT" virtual location. The ABOUT files can
+be read and the paths they reference checked from the archive index without
+extracting the archive. Only the members to copy are extracted on demand.
+
+The tar archives, possibly compressed with gzip or xz, are read sequentially
+as streams: the member index and the ABOUT files are read in a single pass over
+the archive and the files referenced by the ABOUT files are read together in
+one more pass.
+"""
+
+from abc import ABC
+from abc import abstractmethod
+import io
+import os
+import posixpath
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from attributecode import CRITICAL
+from attributecode import Error
+from attributecode.util import UNC_PREFIX
+from attributecode.util import add_unc
+from attributecode.util import is_about_file
+from attributecode.util import to_posix
+
+
+zip_extensions = ('.zip',)
+tar_extensions = ('.tar', '.tar.gz', '.tgz', '.tar.xz', '.txz',)
+
+# Maximum size of a tar member kept in memory when it is read for several links
+# to this member. Larger members are spooled to a temporary file.
+MAX_SPOOL_SIZE = 1024 * 1024
+
+# Maximum number of links followed to resolve a link in a tar archive.
+MAX_LINKS = 32
+
+
+def is_archive(location):
+    """
+    Return True if the file at `location` is a supported archive.
+    """
+    return (location.lower().endswith(zip_extensions + tar_extensions)
+            and os.path.isfile(location))
+
+
+def open_archive(location):
+    """
+    Return an archive object for the archive file at `location` or raise an
+    Exception if this is not a valid archive.
+    """
+    if location.lower().endswith(tar_extensions):
+        return TarArchive(location)
+    return ZipArchive(location)
+
+
+def get_archive_base_name(location):
+    """
+    Return the file name of the archive at `location` without its extension.
+    """
+    name = os.path.basename(location)
+    for ext in tar_extensions + zip_extensions:
+        if name.lower().endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+def get_member_name(name):
+    """
+    Return a normalized relative POSIX path for an archive member `name` or
+    None if this name is empty or points outside of the archive.
+    """
+    name = posixpath.normpath(to_posix(name)).strip(posixpath.sep)
+    if not name or name == '.' or name == '..' or name.startswith('../'):
+        return None
+    return name
+
+
+class Archive(ABC):
+    """
+    A virtual directory tree of the members of the archive at `location`.
+    Subclasses build the index of the archive members and read and extract
+    these members.
+    """
+
+    def __init__(self, location):
+        self.location = location
+        self.root = to_posix(os.path.abspath(location)).rstrip(posixpath.sep)
+        # {member path: member info} of the files and set of directory paths
+        self.files = {}
+        self.dirs = set()
+
+    def add_member(self, name, info, is_dir=False):
+        """
+        Add the member `name` with an `info` object to the index.
+        Return the normalized member path or None if it is ignored.
+        """
+        name = get_member_name(name)
+        if not name:
+            return
+        if is_dir:
+            self.dirs.add(name)
+        else:
+            self.files[name] = info
+        parent = posixpath.dirname(name)
+        while parent and parent not in self.dirs:
+            self.dirs.add(parent)
+            parent = posixpath.dirname(parent)
+        return name
+
+    def close(self):
+        pass
+
+    def get_path(self, location):
+        """
+        Return the member path for a virtual `location` in this archive, an
+        empty string for the archive root or None if `location` is not in this
+        archive.
+        """
+        location = to_posix(location)
+        if location.startswith(to_posix(UNC_PREFIX)):
+            location = location[len(UNC_PREFIX):]
+        location = posixpath.normpath(location)
+        if location == self.root:
+            return ''
+        root = self.root + posixpath.sep
+        if location.startswith(root):
+            return location[len(root):]
+
+    def exists(self, location):
+        """
+        Return True if a file or directory exists at `location`.
+        """
+        path = self.get_path(location)
+        return path == '' or path in self.files or path in self.dirs
+
+    def isdir(self, location):
+        """
+        Return True if a directory exists at `location`.
+        """
+        path = self.get_path(location)
+        return path == '' or path in self.dirs
+
+    def get_about_locations(self):
+        """
+        Return a list of the virtual locations of the ABOUT files using posix
+        path separators.
+        """
+        return [posixpath.join(self.root, name)
+                for name in self.files if is_about_file(name)]
+
+    def get_member(self, location):
+        """
+        Return the member path of the file at the virtual `location` or raise an
+        Exception if there is no such file.
+        """
+        path = self.get_path(location)
+        if not path or path not in self.files:
+            raise IOError('No such file: %(location)r' % locals())
+        return path
+
+    def get_files(self, path):
+        """
+        Return a list of the member paths of the files at `path` or under `path`
+        if this is a directory.
+        """
+        if path in self.files:
+            return [path]
+        if path == '':
+            return list(self.files)
+        prefix = path + posixpath.sep
+        return [name for name in self.files if name.startswith(prefix)]
+
+    @abstractmethod
+    def read_text(self, location):
+        """
+        Return the text of the file at the virtual `location` decoded as UTF-8.
+        Raise an Exception if there is no such file.
+        """
+
+    def preload_texts(self, locations):
+        """
+        Read the texts of the files at the virtual `locations` ahead of their
+        read_text() calls when reading them together is faster than one by
+        one. Missing files are ignored.
+        """
+        pass
+
+    def extract(self, locations):
+        """
+        Extract the files at or under the virtual `locations` in a new temporary
+        directory streaming their content. Return a tuple of (extraction
+        directory, list of extracted locations, list of errors). The extracted
+        locations are the `locations` in the extraction directory.
+        """
+        base_dir = tempfile.mkdtemp(prefix='aboutcode-toolkit-extract-')
+        target_dir = os.path.join(base_dir, get_archive_base_name(self.root))
+        os.makedirs(add_unc(target_dir))
+
+        errors = []
+        extracted = []
+        names = set()
+        for location in locations:
+            path = self.get_path(location)
+            if path is None:
+                msg = 'Path %(location)r is not in the archive.' % locals()
+                errors.append(Error(CRITICAL, msg))
+                continue
+            extracted.append(os.path.join(target_dir, path))
+            if path in self.dirs:
+                os.makedirs(add_unc(os.path.join(target_dir, path)), exist_ok=True)
+            names.update(self.get_files(path))
+
+        created_dirs = set()
+
+        def get_target(name):
+            target = os.path.join(target_dir, name)
+            parent = os.path.dirname(target)
+            if parent not in created_dirs:
+                os.makedirs(add_unc(parent), exist_ok=True)
+                created_dirs.add(parent)
+            return add_unc(target)
+
+        errors.extend(self.extract_files(names, get_target))
+        return target_dir, extracted, errors
+
+    @abstractmethod
+    def extract_files(self, names, get_target):
+        """
+        Extract the files with a member path in the `names` set to the location
+        returned by the `get_target` callable for a member path. Return a list
+        of errors.
+        """
+
+
+class ZipArchive(Archive):
+    """
+    A virtual directory tree of the members of the zip file at `location`.
+    The index is built from the archive central directory and the members are
+    read randomly.
+    """
+
+    def __init__(self, location):
+        if not zipfile.is_zipfile(location):
+            raise Exception('Incorrect zip file %(location)r' % locals())
+        super(ZipArchive, self).__init__(location)
+        self.zipf = zipfile.ZipFile(location)
+        for info in self.zipf.infolist():
+            self.add_member(info.filename, info, info.is_dir())
+
+    def close(self):
+        self.zipf.close()
+
+    def read_text(self, location):
+        """
+        Return the text of the file at the virtual `location` decoded as UTF-8.
+        Raise an Exception if there is no such file.
+        """
+        info = self.files[self.get_member(location)]
+        with self.zipf.open(info) as member:
+            with io.TextIOWrapper(member, encoding='utf-8', errors='replace') as txt:
+                return txt.read()
+
+    def extract_files(self, names, get_target):
+        errors = []
+        for name in sorted(names):
+            try:
+                with self.zipf.open(self.files[name]) as member:
+                    with open(get_target(name), 'wb') as out:
+                        shutil.copyfileobj(member, out, 1024 * 1024)
+            except Exception:
+                msg = 'Cannot extract %(name)r from the archive.' % locals()
+                errors.append(Error(CRITICAL, msg))
+        return errors
+
+
+def decode_text(content):
+    """
+    Return the `content` bytes decoded as UTF-8 with universal newlines as
+    done when reading a text file.
+    """
+    text = content.decode('utf-8', errors='replace')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def get_link_target(name, member):
+    """
+    Return the member path of the target of the link tar `member` with a
+    `name` member path or None if this target is outside of the archive.
+    Symbolic links are relative to their directory and hard links to the
+    archive root.
+    """
+    linkname = to_posix(member.linkname)
+    if member.islnk():
+        return get_member_name(linkname)
+    if linkname.startswith(posixpath.sep):
+        return
+    return get_member_name(posixpath.join(posixpath.dirname(name), linkname))
+
+
+class TarArchive(Archive):
+    """
+    A virtual directory tree of the members of the tar file at `location`,
+    possibly compressed with gzip or xz.
+
+    The archive is read as a stream without random access: the index of the
+    members is built in a single pass that also keeps the texts of the ABOUT
+    files. The texts of the other files are read with an extra pass, shared by
+    all the texts passed to preload_texts().
+
+    The symbolic and hard links are seen as the files or directories they point
+    to, as they are once extracted.
+    """
+
+    def __init__(self, location):
+        if not tarfile.is_tarfile(location):
+            raise Exception('Incorrect tar file %(location)r' % locals())
+        super(TarArchive, self).__init__(location)
+        # {member path: text} of the texts read from the archive
+        self.texts = {}
+        # {link member path: link target member path}
+        self.links = {}
+        # {member path of a link file: member path of the file read for it}
+        self.sources = {}
+        with tarfile.open(location, mode='r|*') as tar:
+            for member in tar:
+                if member.isdir():
+                    self.add_member(member.name, None, is_dir=True)
+                elif member.issym() or member.islnk():
+                    name = get_member_name(member.name)
+                    if name:
+                        self.links[name] = get_link_target(name, member)
+                elif member.isreg():
+                    name = self.add_member(member.name, member.size)
+                    if name and is_about_file(name):
+                        self.texts[name] = decode_text(tar.extractfile(member).read())
+        if self.links:
+            self.add_links()
+            # the ABOUT files that are links are read with an extra pass
+            self.preload_texts(self.get_about_locations())
+
+    def resolve_link(self, name):
+        """
+        Return the member path that the link `name` points to following the
+        links to links or None if this is a dangling or circular link.
+        """
+        target = self.links[name]
+        for _ in range(MAX_LINKS):
+            if target not in self.links:
+                return target
+            target = self.links[target]
+
+    def add_links(self):
+        """
+        Add the links to the index as the files or directories they point to.
+        Dangling links are ignored.
+        """
+        dir_links = []
+        for name in self.links:
+            target = self.resolve_link(name)
+            if target in self.files:
+                self.add_member(name, self.files[target])
+                self.sources[name] = target
+            elif target in self.dirs:
+                dir_links.append((name, target))
+
+        for name, target in dir_links:
+            self.add_member(name, None, is_dir=True)
+            prefix = target + posixpath.sep
+            for path in [p for p in self.files if p.startswith(prefix)]:
+                link_path = name + path[len(target):]
+                self.add_member(link_path, self.files[path])
+                self.sources[link_path] = self.sources.get(path, path)
+
+    def preload_texts(self, locations):
+        """
+        Read the texts of the files at the virtual `locations` that are not read
+        yet in a single pass over the archive. Missing files are ignored.
+        """
+        names = set()
+        for location in locations:
+            path = self.get_path(location)
+            if path in self.files:
+                path = self.sources.get(path, path)
+                if path not in self.texts:
+                    names.add(path)
+        if not names:
+            return
+
+        def read_member(name, member):
+            self.texts[name] = decode_text(member.read())
+
+        self.read_members(names, read_member)
+
+    def read_text(self, location):
+        """
+        Return the text of the file at the virtual `location` decoded as UTF-8.
+        Raise an Exception if there is no such file.
+        """
+        path = self.get_member(location)
+        path = self.sources.get(path, path)
+        if path not in self.texts:
+            self.preload_texts([location])
+        return self.texts[path]
+
+    def read_members(self, names, read_member):
+        """
+        Call `read_member` with the path and a file-like object of each member
+        with a path in the `names` set in a single pass over the archive. The
+        links are read from the members they point to.
+        """
+        # {member path read: [member paths to read from it]}
+        links_by_source = {}
+        for name in names:
+            links_by_source.setdefault(self.sources.get(name, name), []).append(name)
+
+        with tarfile.open(self.location, mode='r|*') as tar:
+            for member in tar:
+                if not member.isreg():
+                    continue
+                paths = links_by_source.get(get_member_name(member.name))
+                if not paths:
+                    continue
+                if len(paths) == 1:
+                    read_member(paths[0], tar.extractfile(member))
+                    continue
+                # the stream is read once for all the links to this member
+                with tempfile.SpooledTemporaryFile(MAX_SPOOL_SIZE) as spool:
+                    shutil.copyfileobj(tar.extractfile(member), spool, 1024 * 1024)
+                    for path in sorted(paths):
+                        spool.seek(0)
+                        read_member(path, spool)
+
+    def extract_files(self, names, get_target):
+        errors = []
+
+        def extract_member(name, member):
+            try:
+                with open(get_target(name), 'wb') as out:
+                    shutil.copyfileobj(member, out, 1024 * 1024)
+            except Exception:
+                msg = 'Cannot extract %(name)r from the archive.' % locals()
+                errors.append(Error(CRITICAL, msg))
+
+        self.read_members(names, extract_member)
+        return errors
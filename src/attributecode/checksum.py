@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+"""
+Compute and verify the checksum_md5, checksum_sha1 and checksum_sha256 of the
+about_resource files and directories of ABOUT files.
+
+The three digests of a file are computed from a single chunked read of this
+file, using a pool of threads: hashlib releases the GIL while hashing.
+
+The checksum of a directory is the checksum of its manifest: the text with one
+"<file checksum>  <relative POSIX path>" line for each file of the directory
+sorted by path, as printed by the sha256sum and similar tools. The ABOUT files
+document the directory and are not part of the manifest, such that:
+
+    find . -type f ! -iname '*.ABOUT' | cut -c3- | LC_ALL=C sort | xargs sha256sum | sha256sum
+
+computes the checksum_sha256 of the current directory.
+
+An optional persistent cache of the file checksums keyed by the device, inode,
+size and modification time of the files avoids hashing unchanged files again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+
+from attributecode import ERROR
+from attributecode import Error
+from attributecode.util import add_unc
+from attributecode.util import is_about_file
+from attributecode.util import to_posix
+from attributecode.util import write_text
+
+# {ABOUT field name: hashlib algorithm name}
+CHECKSUM_FIELDS = {
+    'checksum_md5': 'md5',
+    'checksum_sha1': 'sha1',
+    'checksum_sha256': 'sha256',
+}
+
+ALGORITHMS = ('md5', 'sha1', 'sha256',)
+
+CHUNK_SIZE = 1024 * 1024
+
+CACHE_VERSION = 1
+
+
+def get_file_checksums(location):
+    """
+    Return a {algorithm: hex digest} mapping of the md5, sha1 and sha256 of the
+    file at `location` reading this file once.
+    """
+    digests = [hashlib.new(algorithm) for algorithm in ALGORITHMS]
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(add_unc(location), 'rb') as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            chunk = view[:size]
+            for digest in digests:
+                digest.update(chunk)
+    return dict(zip(ALGORITHMS, (digest.hexdigest() for digest in digests)))
+
+
+def get_manifest_checksums(files, checksums):
+    """
+    Return a {algorithm: hex digest} mapping of the checksums of the manifest of
+    a directory given a `files` list of (relative POSIX path, location) tuples
+    sorted by path and a {location: file checksums} `checksums` mapping.
+    """
+    result = {}
+    for algorithm in ALGORITHMS:
+        digest = hashlib.new(algorithm)
+        for path, location in files:
+            line = '%s  %s\n' % (checksums[location][algorithm], path)
+            digest.update(line.encode('utf-8'))
+        result[algorithm] = digest.hexdigest()
+    return result
+
+
+def get_dir_files(location):
+    """
+    Return a list of (relative POSIX path, location) tuples for the files of the
+    directory at `location` sorted by path. The ABOUT files are ignored.
+    """
+    files = []
+    for top, _dirs, names in os.walk(add_unc(location)):
+        for name in names:
+            if is_about_file(name):
+                continue
+            path = os.path.join(top, name)
+            files.append((to_posix(os.path.relpath(path, location)), path))
+    files.sort(key=lambda f: f[0].encode('utf-8'))
+    return files
+
+
+class ChecksumCache(object):
+    """
+    A persistent cache of the file checksums saved as JSON at `location`. The
+    entries are keyed by the device and inode of the files and are only used if
+    the size and modification time of the files are unchanged.
+    """
+
+    def __init__(self, location):
+        self.location = location
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(location) as cache:
+                data = json.load(cache)
+            if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+                self.entries = data.get('entries') or {}
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def get_key(location):
+        """
+        Return a tuple of (key, [size, mtime in nanoseconds]) for the file at
+        `location`.
+        """
+        st = os.stat(add_unc(location))
+        key = '%d:%d' % (st.st_dev, st.st_ino)
+        return key, [st.st_size, st.st_mtime_ns]
+
+    def get(self, location):
+        """
+        Return the cached checksums of the file at `location` or None.
+        """
+        try:
+            key, stat = self.get_key(location)
+        except OSError:
+            return
+        entry = self.entries.get(key)
+        if entry and entry[:2] == stat:
+            return dict(zip(ALGORITHMS, entry[2:]))
+
+    def set(self, location, checksums):
+        """
+        Cache the `checksums` of the file at `location`.
+        """
+        try:
+            key, stat = self.get_key(location)
+        except OSError:
+            return
+        self.entries[key] = stat + [checksums[a] for a in ALGORITHMS]
+        self.changed = True
+
+    def save(self):
+        if self.changed:
+            data = dict(version=CACHE_VERSION, entries=self.entries)
+            write_text(self.location, json.dumps(data), atomic=True)
+            self.changed = False
+
+
+def compute_checksums(locations, threads=1, cache=None):
+    """
+    Return a tuple of (list of errors, {location: checksums}) for the files and
+    directories at `locations` using a pool of `threads` threads. The checksums
+    are {algorithm: hex digest} mappings. A location that cannot be read has
+    no checksums.
+
+    The file checksums found in the optional `cache` ChecksumCache are reused
+    and the cache is updated with the computed ones.
+    """
+    errors = []
+    # {directory location: sorted list of (path, file location)}
+    dirs = {}
+    files = []
+    for location in locations:
+        if os.path.isdir(add_unc(location)):
+            dirs[location] = get_dir_files(location)
+            files.extend(loc for _path, loc in dirs[location])
+        else:
+            files.append(location)
+    files = list(dict.fromkeys(files))
+
+    checksums = {}
+    to_hash = []
+    for location in files:
+        cached = cache.get(location) if cache else None
+        if cached:
+            checksums[location] = cached
+        else:
+            to_hash.append(location)
+
+    def hash_one(location):
+        try:
+            return get_file_checksums(location)
+        except Exception:
+            return None
+
+    if threads > 1 and len(to_hash) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(hash_one, to_hash))
+    else:
+        results = [hash_one(location) for location in to_hash]
+
+    failed = set()
+    for location, result in zip(to_hash, results):
+        if result is None:
+            failed.add(location)
+            msg = 'Cannot compute the checksums of file at %(location)r.' % locals()
+            errors.append(Error(ERROR, msg))
+            continue
+        checksums[location] = result
+        if cache:
+            cache.set(location, result)
+
+    for location, dir_files in dirs.items():
+        if not any(loc in failed for _path, loc in dir_files):
+            checksums[location] = get_manifest_checksums(dir_files, checksums)
+    return errors, checksums
+
+
+def get_resource_location(about):
+    """
+    Return the location of the single about_resource of an `about` About or
+    None if it does not have a single existing about_resource.
+    """
+    locations = list(about.about_resource.value.values())
+    if len(locations) == 1:
+        location = locations[0]
+        # a missing about_resource is reported when validating the ABOUT file
+        if location and os.path.exists(add_unc(location)):
+            return location
+
+
+def set_checksums(abouts, threads=1, cache_location=None):
+    """
+    Compute the checksums of the about_resource of each About of an `abouts`
+    list using a pool of `threads` threads and set them in their checksum
+    fields. Return a list of errors. Use and update the optional checksum cache
+    file at `cache_location`.
+    """
+    cache = ChecksumCache(cache_location) if cache_location else None
+    locations = [get_resource_location(about) for about in abouts]
+    errors, checksums = compute_checksums(
+        [loc for loc in locations if loc], threads, cache)
+    if cache:
+        cache.save()
+    for about, location in zip(abouts, locations):
+        resource_checksums = checksums.get(location)
+        if not resource_checksums:
+            continue
+        for name, algorithm in CHECKSUM_FIELDS.items():
+            field = about.fields[name]
+            field.value = field.original_value = resource_checksums[algorithm]
+            field.present = True
+    return errors
+
+
+def verify_checksums(abouts, threads=1, cache_location=None):
+    """
+    Verify the checksum fields of each About of an `abouts` list against the
+    checksums of their about_resource computed using a pool of `threads`
+    threads. Return a list of errors for the checksums that do not match or
+    that cannot be verified. Use and update the optional checksum cache file at
+    `cache_location`.
+    """
+    errors = []
+    to_verify = []
+    for about in abouts:
+        names = [name for name in CHECKSUM_FIELDS if about.fields[name].value]
+        if not names:
+            continue
+        afp = about.about_file_path
+        location = get_resource_location(about)
+        if not location:
+            msg = ('%(afp)s: Cannot verify the checksums: the about_resource '
+                   'is not a single existing file or directory.' % locals())
+            errors.append(Error(ERROR, msg))
+            continue
+        to_verify.append((about, names, location))
+
+    cache = ChecksumCache(cache_location) if cache_location else None
+    compute_errors, checksums = compute_checksums(
+        [location for _about, _names, location in to_verify], threads, cache)
+    errors.extend(compute_errors)
+    if cache:
+        cache.save()
+
+    for about, names, location in to_verify:
+        resource_checksums = checksums.get(location)
+        if not resource_checksums:
+            continue
+        afp = about.about_file_path
+        for name in names:
+            expected = about.fields[name].value.strip().lower()
+            actual = resource_checksums[CHECKSUM_FIELDS[name]]
+            if expected != actual:
+                msg = ('%(afp)s: Field %(name)s: Checksum mismatch: '
+                       'expected %(expected)s but the about_resource has %(actual)s'
+                       % locals())
+                errors.append(Error(ERROR, msg))
+    return errors
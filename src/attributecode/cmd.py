@@ -14,23 +14,34 @@
 #  limitations under the License.
 # ============================================================================
 
+from attributecode.util import COPY_STRATEGIES
 from attributecode.util import write_licenses
-from attributecode.util import get_temp_dir
 from attributecode.util import filter_errors
-from attributecode.util import extract_zip
+from attributecode.archive import is_archive
+from attributecode.archive import open_archive
+from attributecode.checksum import verify_checksums as verify_about_checksums
 from attributecode.transform import Transformer
 from attributecode.transform import write_excel
 from attributecode.transform import write_json
+from attributecode.transform import write_jsonl
 from attributecode.transform import write_csv
 from attributecode.transform import transform_excel
 from attributecode.transform import transform_json
+from attributecode.transform import transform_jsonl
 from attributecode.transform import transform_csv
 from attributecode.transform import transform_data
 from attributecode.model import write_output
 from attributecode.model import pre_process_and_fetch_license_dict
+from attributecode.copier import format_copy_stats
+from attributecode.text_store import TextStore
 from attributecode.model import get_copy_list
 from attributecode.model import copy_redist_src
+from attributecode.model import sync_redist_src
+from attributecode.model import zip_redist_src
 from attributecode.model import collect_inventory, collect_abouts_license_expression, collect_inventory_license_expression
+from attributecode.model import LICENSE_REFERENCES
+from attributecode.model import load_snapshot
+from attributecode.model import save_snapshot
 from attributecode.gen import generate as generate_about_files, load_inventory
 from attributecode.attrib import generate_and_save as generate_attribution_doc
 from attributecode.attrib import DEFAULT_LICENSE_SCORE
@@ -143,7 +154,7 @@ def validate_extensions(ctx, param, value, extensions=tuple(('.csv', '.json',)))
 
 
 @about.command(cls=AboutCommand,
-               short_help='Collect the inventory of .ABOUT files to a CSV/JSON/XLSX file.')
+               short_help='Collect the inventory of .ABOUT files to a CSV/JSON/JSONL/XLSX file or a SQLite database.')
 @click.argument('location',
                 required=True,
                 metavar='LOCATION',
@@ -157,8 +168,17 @@ def validate_extensions(ctx, param, value, extensions=tuple(('.csv', '.json',)))
               is_flag=False,
               default='csv',
               show_default=True,
-              type=click.Choice(['json', 'csv', 'excel']),
+              type=click.Choice(['json', 'jsonl', 'csv', 'excel', 'sqlite']),
               help='Set OUTPUT inventory file format.')
+@click.option('--save-snapshot',
+              metavar='FILE',
+              type=click.Path(exists=False, dir_okay=False, writable=True, resolve_path=True),
+              help='Save the validated ABOUT files and errors to a snapshot FILE '
+              'to reuse with --from-snapshot.')
+@click.option('--from-snapshot',
+              is_flag=True,
+              help='Load the validated ABOUT files and errors from a snapshot file '
+              'at LOCATION created with --save-snapshot.')
 @click.option('-q', '--quiet',
               is_flag=True,
               help='Do not print error or warning messages.')
@@ -166,22 +186,21 @@ def validate_extensions(ctx, param, value, extensions=tuple(('.csv', '.json',)))
               is_flag=True,
               help='Show all error and warning messages.')
 @click.help_option('-h', '--help')
-def inventory(location, output, format, quiet, verbose):  # NOQA
+def inventory(location, output, format, save_snapshot, from_snapshot, quiet, verbose):  # NOQA
     """
-Collect the inventory of .ABOUT files to a CSV/JSON/XLSX file.
+Collect the inventory of .ABOUT files to a CSV/JSON/JSONL/XLSX file or a SQLite database.
 
-LOCATION: Path to an ABOUT file or a directory with ABOUT files.
+LOCATION: Path to an ABOUT file, a directory or a .zip/.tar/.tar.gz/.tar.xz
+archive with ABOUT files.
 
-OUTPUT: Path to the CSV/JSON/XLSX inventory file to create.
+OUTPUT: Path to the CSV/JSON/JSONL/XLSX inventory file or SQLite database to create.
     """
     if not quiet:
         print_version()
         click.echo('Collecting inventory from ABOUT files...')
 
-    if location.lower().endswith('.zip'):
-        # accept zipped ABOUT files as input
-        location = extract_zip(location)
-    errors, abouts = collect_inventory(location)
+    _location, errors, abouts = collect_or_load_inventory(
+        location, from_snapshot, save_snapshot, load_profile='paths')
     write_output(abouts=abouts, location=output, format=format)
 
     errors_count = report_errors(
@@ -197,7 +216,7 @@ OUTPUT: Path to the CSV/JSON/XLSX inventory file to create.
 
 
 @about.command(cls=AboutCommand,
-               short_help='Generate .ABOUT files from an inventory as CSV/JSON/XLSX.')
+               short_help='Generate .ABOUT files from an inventory as CSV/JSON/JSONL/XLSX/SQLite.')
 @click.argument('location',
                 required=True,
                 metavar='LOCATION',
@@ -221,6 +240,19 @@ OUTPUT: Path to the CSV/JSON/XLSX inventory file to create.
               metavar='api_url api_key',
               help='Fetch license data and text files from a DejaCode License Library '
               'API URL using the API KEY.')
+@click.option('--license-dir',
+              metavar='DIR',
+              type=click.Path(exists=False, file_okay=False,
+                              writable=True, resolve_path=True),
+              help='Write each fetched license file once in this shared directory '
+              'instead of side-by-side with each ABOUT file.')
+@click.option('--license-reference',
+              type=click.Choice(LICENSE_REFERENCES),
+              default='path',
+              show_default=True,
+              help='How ABOUT files reference the license files of --license-dir: '
+              'with a relative path in license_file, or with a hard or symbolic '
+              'link side-by-side with the ABOUT file.')
 @click.option('--scancode',
               is_flag=True,
               help='Indicate the input JSON file is from scancode_toolkit.')
@@ -229,9 +261,44 @@ OUTPUT: Path to the CSV/JSON/XLSX inventory file to create.
               type=click.Path(exists=True, file_okay=False,
                               readable=True, resolve_path=True),
               help='Path to a directory with reference license data and text files.')
+@click.option('--copy-strategy',
+              type=click.Choice(COPY_STRATEGIES),
+              default='copy',
+              show_default=True,
+              help='How to copy the reference license and notice files of --reference: '
+              'as regular copies, hard links, copy-on-write clones or symbolic links.')
 @click.option('--worksheet',
               metavar='name',
               help='The worksheet name from the INPUT. (Default: the "active" worksheet)')
+@click.option('--query',
+              metavar='SQL',
+              help='A SQL SELECT statement returning the ids of the components to '
+              'load from a .sqlite inventory. (Default: all the components)')
+@click.option('-p', '--processes',
+              type=click.IntRange(min=1),
+              default=1,
+              show_default=True,
+              help='Number of parallel processes used to write the ABOUT files.')
+@click.option('--skip-unchanged',
+              is_flag=True,
+              help='Do not rewrite the existing files that have the same content.')
+@click.option('--atomic',
+              is_flag=True,
+              help='Write each file to a temporary file and rename it when done.')
+@click.option('--compute-checksums',
+              is_flag=True,
+              help='Set the checksum_md5, checksum_sha1 and checksum_sha256 fields to '
+              'the checksums of the about_resource file or directory.')
+@click.option('--threads',
+              type=click.IntRange(min=1),
+              default=1,
+              show_default=True,
+              help='Number of threads used to compute the checksums.')
+@click.option('--checksum-cache',
+              metavar='FILE',
+              type=click.Path(exists=False, dir_okay=False, writable=True, resolve_path=True),
+              help='Path to a cache FILE of the computed checksums reused for the '
+              'unchanged files.')
 @click.option('-q', '--quiet',
               is_flag=True,
               help='Do not print error or warning messages.')
@@ -239,11 +306,12 @@ OUTPUT: Path to the CSV/JSON/XLSX inventory file to create.
               is_flag=True,
               help='Show all error and warning messages.')
 @click.help_option('-h', '--help')
-def gen(location, output, android, fetch_license, fetch_license_djc, scancode, reference, worksheet, quiet, verbose):
+def gen(location, output, android, fetch_license, fetch_license_djc, license_dir, license_reference, scancode, reference, copy_strategy, worksheet, query, processes, skip_unchanged, atomic, compute_checksums, threads, checksum_cache, quiet, verbose):
     """
-Given a CSV/JSON/XLSX inventory, generate ABOUT files in the output location.
+Given a CSV/JSON/JSONL/XLSX inventory or a SQLite inventory database, generate
+ABOUT files in the output location.
 
-LOCATION: Path to a JSON/CSV/XLSX inventory file.
+LOCATION: Path to a JSON/JSONL/CSV/XLSX inventory file or a .sqlite database.
 
 OUTPUT: Path to a directory where ABOUT files are generated.
     """
@@ -252,14 +320,27 @@ OUTPUT: Path to a directory where ABOUT files are generated.
         click.echo('Generating .ABOUT files...')
 
     # FIXME: This should be checked in the `click`
-    if not location.endswith(('.csv', '.json', '.xlsx')):
+    if not location.endswith(('.csv', '.json', '.jsonl', '.xlsx', '.sqlite')):
         raise click.UsageError(
-            'ERROR: Invalid input file extension: must be one .csv or .json or .xlsx.')
+            'ERROR: Invalid input file extension: must be one .csv or .json or .jsonl or .xlsx or .sqlite.')
 
     if worksheet and not location.endswith('.xlsx'):
         raise click.UsageError(
             'ERROR: --worksheet option only works with .xlsx input.')
 
+    if query and not location.endswith('.sqlite'):
+        raise click.UsageError(
+            'ERROR: --query option only works with .sqlite input.')
+
+    if license_dir and not (fetch_license or fetch_license_djc):
+        raise click.UsageError(
+            'ERROR: --license-dir option only works with --fetch-license or --fetch-license-djc.')
+
+    if checksum_cache and not compute_checksums:
+        raise click.UsageError(
+            'ERROR: --checksum-cache option only works with --compute-checksums.')
+
+    stats = {}
     errors, abouts = generate_about_files(
         location=location,
         base_dir=output,
@@ -268,7 +349,18 @@ OUTPUT: Path to a directory where ABOUT files are generated.
         fetch_license=fetch_license,
         fetch_license_djc=fetch_license_djc,
         scancode=scancode,
-        worksheet=worksheet
+        worksheet=worksheet,
+        query=query,
+        processes=processes,
+        skip_unchanged=skip_unchanged,
+        atomic=atomic,
+        stats=stats,
+        license_dir=license_dir,
+        license_reference=license_reference,
+        copy_strategy=copy_strategy,
+        compute_checksums=compute_checksums,
+        threads=threads,
+        checksum_cache=checksum_cache,
     )
 
     errors_count = report_errors(
@@ -278,6 +370,10 @@ OUTPUT: Path to a directory where ABOUT files are generated.
         msg = '{abouts_count} .ABOUT files generated in {output}.'.format(
             **locals())
         click.echo(msg)
+        if skip_unchanged:
+            msg = '{written} .ABOUT files written, {unchanged} unchanged files skipped.'.format(
+                **stats)
+            click.echo(msg)
     sys.exit(errors_count)
 
 
@@ -315,7 +411,7 @@ def gen_license(location, output, djc, scancode, worksheet, verbose):
     """
 Fetch licenses (Default: ScanCode LicenseDB) in the license_expression field and save to the output location.
 
-LOCATION: Path to a JSON/CSV/XLSX/.ABOUT file(s)
+LOCATION: Path to a JSON/JSONL/CSV/XLSX/.ABOUT file(s)
 
 OUTPUT: Path to a directory where license files are saved.
     """
@@ -330,7 +426,7 @@ OUTPUT: Path to a directory where license files are saved.
 
     log_file_loc = os.path.join(output, 'error.log')
 
-    if location.endswith('.csv') or location.endswith('.json') or location.endswith('.xlsx'):
+    if location.endswith(('.csv', '.json', '.jsonl', '.xlsx')):
         errors, abouts = collect_inventory_license_expression(
             location=location, scancode=scancode, worksheet=worksheet)
         if errors:
@@ -392,7 +488,7 @@ def validate_template(ctx, param, value):
 
 
 @about.command(cls=AboutCommand,
-               short_help='Generate an attribution document from JSON/CSV/XLSX/.ABOUT files.')
+               short_help='Generate an attribution document from JSON/JSONL/CSV/XLSX/SQLite/.ABOUT files.')
 @click.argument('input',
                 required=True,
                 metavar='INPUT',
@@ -432,6 +528,15 @@ def validate_template(ctx, param, value):
                               readable=True, resolve_path=True),
               help='Path to an optional custom attribution template to generate the '
               'attribution document. If not provided the default built-in template is used.')
+@click.option('--save-snapshot',
+              metavar='FILE',
+              type=click.Path(exists=False, dir_okay=False, writable=True, resolve_path=True),
+              help='Save the validated ABOUT files and errors to a snapshot FILE '
+              'to reuse with --from-snapshot.')
+@click.option('--from-snapshot',
+              is_flag=True,
+              help='Load the validated ABOUT files and errors from a snapshot file '
+              'at INPUT created with --save-snapshot.')
 @click.option('--vartext',
               multiple=True,
               callback=validate_key_values,
@@ -440,6 +545,10 @@ def validate_template(ctx, param, value):
 @click.option('--worksheet',
               metavar='name',
               help='The worksheet name from the INPUT. (Default: the "active" worksheet)')
+@click.option('--query',
+              metavar='SQL',
+              help='A SQL SELECT statement returning the ids of the components to '
+              'load from a .sqlite inventory. (Default: all the components)')
 @click.option('-q', '--quiet',
               is_flag=True,
               help='Do not print error or warning messages.')
@@ -447,11 +556,13 @@ def validate_template(ctx, param, value):
               is_flag=True,
               help='Show all error and warning messages.')
 @click.help_option('-h', '--help')
-def attrib(input, output, api_url, api_key, scancode, min_license_score, reference, template, vartext, worksheet, quiet, verbose):
+def attrib(input, output, api_url, api_key, scancode, min_license_score, reference, template, save_snapshot, from_snapshot, vartext, worksheet, query, quiet, verbose):
     """
-Generate an attribution document at OUTPUT using JSON, CSV or XLSX or .ABOUT files at INPUT.
+Generate an attribution document at OUTPUT using JSON, JSONL, CSV or XLSX or .ABOUT files
+or a SQLite inventory database at INPUT.
 
-INPUT: Path to a file (.ABOUT/.csv/.json/.xlsx), directory or .zip archive containing .ABOUT files.
+INPUT: Path to a file (.ABOUT/.csv/.json/.jsonl/.xlsx/.sqlite), directory or
+.zip/.tar/.tar.gz/.tar.xz archive containing .ABOUT files.
 
 OUTPUT: Path where to write the attribution document.
     """
@@ -466,14 +577,18 @@ OUTPUT: Path where to write the attribution document.
         raise click.UsageError(
             'ERROR: --worksheet option only works with .xlsx input.')
 
+    if query and not input.endswith('.sqlite'):
+        raise click.UsageError(
+            'ERROR: --query option only works with .sqlite input.')
+
+    if save_snapshot and not from_snapshot and input.endswith(('.json', '.jsonl', '.csv', '.xlsx', '.sqlite')):
+        raise click.UsageError(
+            'ERROR: --save-snapshot option only works with .ABOUT files input.')
+
     if not quiet:
         print_version()
         click.echo('Generating attribution...')
 
-    # accept zipped ABOUT files as input
-    if input.lower().endswith('.zip'):
-        input = extract_zip(input)
-
     if scancode:
         if not input.endswith('.json'):
             msg = 'The input file from scancode toolkit needs to be in JSON format.'
@@ -489,7 +604,10 @@ OUTPUT: Path where to write the attribution document.
             click.echo(msg)
             sys.exit(1)
 
-    if input.endswith('.json') or input.endswith('.csv') or input.endswith('.xlsx'):
+    # the license and notice texts shared by the ABOUT files are read once
+    text_store = TextStore()
+
+    if not from_snapshot and input.endswith(('.json', '.jsonl', '.csv', '.xlsx', '.sqlite')):
         is_about_input = False
         from_attrib = True
         if not reference:
@@ -504,7 +622,9 @@ OUTPUT: Path where to write the attribution document.
             from_attrib=from_attrib,
             scancode=scancode,
             reference_dir=reference,
-            worksheet=worksheet
+            worksheet=worksheet,
+            query=query,
+            text_store=text_store,
         )
 
         # Exit if CRITICAL error
@@ -516,7 +636,8 @@ OUTPUT: Path where to write the attribution document.
 
     else:
         is_about_input = True
-        _errors, abouts = collect_inventory(input)
+        _location, _errors, abouts = collect_or_load_inventory(
+            input, from_snapshot, save_snapshot, text_store=text_store)
 
     if not abouts:
         msg = 'No ABOUT file or reference is found from the input. Attribution generation halted.'
@@ -571,6 +692,9 @@ OUTPUT: Path where to write the attribution document.
     errors_count = report_errors(
         errors, quiet, verbose, log_file_loc=output + '-error.log')
 
+    if verbose and not quiet and text_store.stats['references']:
+        click.echo(text_store.format_stats())
+
     if not quiet:
         if rendered:
             msg = 'Attribution generated in: {output}'.format(**locals())
@@ -607,6 +731,35 @@ OUTPUT: Path where to write the attribution document.
 @click.option('--zip',
               is_flag=True,
               help='Zip the copied sources to the output location.')
+@click.option('--threads',
+              type=click.IntRange(min=1),
+              default=1,
+              show_default=True,
+              help='Number of threads used to copy the files.')
+@click.option('--preserve-metadata/--no-preserve-metadata',
+              default=True,
+              show_default=True,
+              help='Copy the permissions and times of the files.')
+@click.option('--sync',
+              is_flag=True,
+              help='Only copy the files that changed since the last sync to the '
+              'OUTPUT directory comparing their size and modification time.')
+@click.option('--checksum',
+              is_flag=True,
+              help='With --sync, compare the files with their SHA1 checksum.')
+@click.option('--delete',
+              is_flag=True,
+              help='With --sync, delete the files of the last sync that are no '
+              'longer redistributed.')
+@click.option('--save-snapshot',
+              metavar='FILE',
+              type=click.Path(exists=False, dir_okay=False, writable=True, resolve_path=True),
+              help='Save the validated ABOUT files and errors to a snapshot FILE '
+              'to reuse with --from-snapshot.')
+@click.option('--from-snapshot',
+              is_flag=True,
+              help='Load the validated ABOUT files and errors from a snapshot file '
+              'at LOCATION created with --save-snapshot.')
 @click.option('-q', '--quiet',
               is_flag=True,
               help='Do not print error or warning messages.')
@@ -614,7 +767,7 @@ OUTPUT: Path where to write the attribution document.
               is_flag=True,
               help='Show all error and warning messages.')
 @click.help_option('-h', '--help')
-def collect_redist_src(location, output, from_inventory, with_structures, zip, quiet, verbose):
+def collect_redist_src(location, output, from_inventory, with_structures, zip, threads, preserve_metadata, sync, checksum, delete, save_snapshot, from_snapshot, quiet, verbose):
     """
 Collect sources that have 'redistribute' flagged as 'True' in .ABOUT files or inventory
 to the output location.
@@ -628,42 +781,67 @@ OUTPUT: Path to a directory or a zip file where sources will be copied to.
         if not output.endswith('.zip'):
             click.echo('The output needs to be a zip file.')
             sys.exit()
+        if sync:
+            raise click.UsageError(
+                'ERROR: --sync option does not work with --zip.')
+
+    if (checksum or delete) and not sync:
+        raise click.UsageError(
+            'ERROR: --checksum and --delete options only work with --sync.')
+
+    if from_inventory and (save_snapshot or from_snapshot):
+        raise click.UsageError(
+            'ERROR: --save-snapshot and --from-snapshot options do not work '
+            'with --from-inventory.')
 
     if not quiet:
         print_version()
         click.echo('Collecting inventory from ABOUT files...')
 
-    if location.lower().endswith('.zip'):
-        # accept zipped ABOUT files as input
-        location = extract_zip(location)
-
+    archive = None
     if from_inventory:
-        errors, abouts = load_inventory(from_inventory, location)
+        if is_archive(location):
+            # accept archived sources as input
+            archive = open_archive(location)
+            location = archive.root
+        errors, abouts = load_inventory(
+            from_inventory, location, archive=archive, load_profile='paths')
     else:
-        errors, abouts = collect_inventory(location)
-
+        # the sources location of a snapshot is the location where the ABOUT
+        # files were collected
+        location, errors, abouts = collect_or_load_inventory(
+            location, from_snapshot, save_snapshot, load_profile='paths')
+        if is_archive(location):
+            archive = open_archive(location)
+
+    copy_list, copy_list_errors = get_copy_list(abouts, location, archive)
+    if archive:
+        # only extract the redistributed sources from the archive
+        location, copy_list, extract_errors = archive.extract(copy_list)
+        copy_list_errors.extend(extract_errors)
+        archive.close()
+    stats = {}
     if zip:
-        # Copy to a temp location and the zip to the output location
-        output_location = get_temp_dir()
+        # Stream the sources directly in the zip file
+        copy_errors = zip_redist_src(
+            copy_list, location, output, with_structures,
+            threads=threads, stats=stats)
+    elif sync:
+        copy_errors = sync_redist_src(
+            copy_list, location, output, with_structures,
+            threads=threads, preserve_metadata=preserve_metadata,
+            checksum=checksum, delete=delete, stats=stats)
     else:
-        output_location = output
-
-    copy_list, copy_list_errors = get_copy_list(abouts, location)
-    copy_errors = copy_redist_src(
-        copy_list, location, output_location, with_structures)
-
-    if zip:
-        import shutil
-        # Stripped the .zip extension as the `shutil.make_archive` will
-        # append the .zip extension
-        output_no_extension = output.rsplit('.', 1)[0]
-        shutil.make_archive(output_no_extension, 'zip', output_location)
+        copy_errors = copy_redist_src(
+            copy_list, location, output, with_structures,
+            threads=threads, preserve_metadata=preserve_metadata, stats=stats)
 
     errors.extend(copy_list_errors)
     errors.extend(copy_errors)
     errors_count = report_errors(
         errors, quiet, verbose, log_file_loc=output + '-error.log')
     if not quiet:
+        click.echo(format_copy_stats(stats))
         msg = 'Redistributed sources are copied to {output}.'.format(
             **locals())
         click.echo(msg)
@@ -697,16 +875,44 @@ OUTPUT: Path to a directory or a zip file where sources will be copied to.
               nargs=1,
               metavar='FILE',
               help='Path to a file to save the error messages if any.')
+@click.option('--verify-checksums',
+              is_flag=True,
+              help='Verify the checksum_md5, checksum_sha1 and checksum_sha256 fields '
+              'against the checksums of the about_resource file or directory.')
+@click.option('--threads',
+              type=click.IntRange(min=1),
+              default=1,
+              show_default=True,
+              help='Number of threads used to compute the checksums.')
+@click.option('--checksum-cache',
+              metavar='FILE',
+              type=click.Path(exists=False, dir_okay=False, writable=True, resolve_path=True),
+              help='Path to a cache FILE of the computed checksums reused for the '
+              'unchanged files.')
+@click.option('--save-snapshot',
+              metavar='FILE',
+              type=click.Path(exists=False, dir_okay=False, writable=True, resolve_path=True),
+              help='Save the validated ABOUT files and errors to a snapshot FILE '
+              'to reuse with --from-snapshot.')
+@click.option('--from-snapshot',
+              is_flag=True,
+              help='Load the validated ABOUT files and errors from a snapshot file '
+              'at LOCATION created with --save-snapshot.')
 @click.option('--verbose',
               is_flag=True,
               help='Show all error and warning messages.')
 @click.help_option('-h', '--help')
-def check(location, license, djc, log, verbose):
+def check(location, license, djc, log, verify_checksums, threads, checksum_cache, save_snapshot, from_snapshot, verbose):
     """
 Check .ABOUT file(s) at LOCATION for validity and print error messages.
 
-LOCATION: Path to an ABOUT file or a directory with ABOUT files.
+LOCATION: Path to an ABOUT file, a directory or a .zip/.tar/.tar.gz/.tar.xz
+archive with ABOUT files.
     """
+    if checksum_cache and not verify_checksums:
+        raise click.UsageError(
+            'ERROR: --checksum-cache option only works with --verify-checksums.')
+
     print_version()
 
     if log:
@@ -722,7 +928,8 @@ LOCATION: Path to an ABOUT file or a directory with ABOUT files.
         api_url = djc[0].strip("'").strip('"')
         api_key = djc[1].strip("'").strip('"')
     click.echo('Checking ABOUT files...')
-    errors, abouts = collect_inventory(location)
+    input_location, errors, abouts = collect_or_load_inventory(
+        location, from_snapshot, save_snapshot, load_profile='paths')
 
     # Validate license_expression
     if license:
@@ -732,6 +939,12 @@ LOCATION: Path to an ABOUT file or a directory with ABOUT files.
         for e in errs:
             errors.append(e)
 
+    if verify_checksums:
+        if is_archive(input_location):
+            raise click.UsageError(
+                'ERROR: --verify-checksums option does not work with archive input.')
+        errors.extend(verify_about_checksums(abouts, threads, checksum_cache))
+
     severe_errors_count = report_errors(
         errors, quiet=False, verbose=verbose, log_file_loc=log)
     sys.exit(severe_errors_count)
@@ -750,17 +963,17 @@ def print_config_help(ctx, param, value):
 
 
 @about.command(cls=AboutCommand,
-               short_help='Transform a CSV/JSON/XLSX by applying renamings, filters and checks.')
+               short_help='Transform a CSV/JSON/JSONL/XLSX by applying renamings, filters and checks.')
 @click.argument('location',
                 required=True,
                 callback=partial(validate_extensions, extensions=(
-                    '.csv', '.json', '.xlsx',)),
+                    '.csv', '.json', '.jsonl', '.xlsx',)),
                 metavar='LOCATION',
                 type=click.Path(exists=True, dir_okay=False, readable=True, resolve_path=True))
 @click.argument('output',
                 required=True,
                 callback=partial(validate_extensions, extensions=(
-                    '.csv', '.json', '.xlsx',)),
+                    '.csv', '.json', '.jsonl', '.xlsx',)),
                 metavar='OUTPUT',
                 type=click.Path(exists=False, dir_okay=False, writable=True, resolve_path=True))
 @click.option('-c', '--configuration',
@@ -785,12 +998,12 @@ def print_config_help(ctx, param, value):
 @click.help_option('-h', '--help')
 def transform(location, output, configuration, worksheet, quiet, verbose):  # NOQA
     """
-Transform the CSV/JSON/XLSX file at LOCATION by applying renamings, filters and checks
-and then write a new CSV/JSON/XLSX to OUTPUT.
+Transform the CSV/JSON/JSONL/XLSX file at LOCATION by applying renamings, filters and checks
+and then write a new CSV/JSON/JSONL/XLSX to OUTPUT.
 
-LOCATION: Path to a CSV/JSON/XLSX file.
+LOCATION: Path to a CSV/JSON/JSONL/XLSX file.
 
-OUTPUT: Path to CSV/JSON/XLSX inventory file to create.
+OUTPUT: Path to CSV/JSON/JSONL/XLSX inventory file to create.
     """
     if worksheet and not location.endswith('.xlsx'):
         raise click.UsageError(
@@ -814,6 +1027,8 @@ OUTPUT: Path to CSV/JSON/XLSX inventory file to create.
         new_data, errors = transform_csv(location)
     elif location.endswith('.json'):
         new_data, errors = transform_json(location)
+    elif location.endswith('.jsonl'):
+        new_data, errors = transform_jsonl(location)
     elif location.endswith('.xlsx'):
         new_data, errors = transform_excel(location, worksheet)
 
@@ -830,6 +1045,8 @@ OUTPUT: Path to CSV/JSON/XLSX inventory file to create.
             write_csv(output, updated_data)
         elif output.endswith('.json'):
             write_json(output, updated_data)
+        elif output.endswith('.jsonl'):
+            write_jsonl(output, updated_data)
         else:
             write_excel(output, updated_data)
 
@@ -844,6 +1061,49 @@ OUTPUT: Path to CSV/JSON/XLSX inventory file to create.
         click.echo(msg)
     sys.exit(errors_count)
 
+######################################################################
+# Inventory collection
+######################################################################
+
+
+def collect_or_load_inventory(location, from_snapshot=False, snapshot_location=None,
+                              load_profile='texts', text_store=None):
+    """
+    Return a tuple of (location, errors, abouts) for the ABOUT files collected
+    at `location`, reading them from an archive if needed. If
+    `from_snapshot` is True, load these from the snapshot file at `location`
+    instead and return the location where the ABOUT files were collected.
+    Optionally save a snapshot at `snapshot_location`.
+
+    The files referenced by the file fields are loaded according to
+    `load_profile`, one of model.LOAD_PROFILES. The texts are always loaded
+    when saving a snapshot as any command can load this snapshot. The texts
+    are shared through the optional `text_store` TextStore.
+    """
+    if from_snapshot:
+        location, errors, abouts = load_snapshot(location)
+        if location is None:
+            for e in errors:
+                click.echo(e.render())
+            sys.exit(1)
+    else:
+        if snapshot_location:
+            load_profile = 'texts'
+        if is_archive(location):
+            # accept archived ABOUT files as input, read without extraction
+            archive = open_archive(location)
+            location = archive.root
+            errors, abouts = collect_inventory(
+                location, archive, load_profile, text_store)
+            archive.close()
+        else:
+            errors, abouts = collect_inventory(
+                location, load_profile=load_profile, text_store=text_store)
+
+    if snapshot_location:
+        save_snapshot(snapshot_location, location, errors, abouts)
+    return location, errors, abouts
+
 ######################################################################
 # Error management
 ######################################################################
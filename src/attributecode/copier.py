@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+"""
+Copy many files and directories using a pool of threads.
+
+The directories are walked with os.scandir() and the target directories are
+created upfront in the calling thread. The file data are then copied by the
+threads with a kernel-side os.copy_file_range() copy when possible, which is
+also a server-side copy on some network filesystems, or with
+shutil.copyfile().
+
+The files can also be streamed directly in a zip archive, or synced to a
+directory copying only the files that changed since the last sync.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+import json
+import os
+import posixpath
+import shutil
+import time
+import zipfile
+
+from attributecode import CRITICAL
+from attributecode import WARNING
+from attributecode import Error
+from attributecode.util import add_unc
+from attributecode.util import copy_file_range
+from attributecode.util import get_checksum
+from attributecode.util import on_windows
+from attributecode.util import to_posix
+from attributecode.util import write_text
+
+
+def copy_file_data(from_path, to_path, preserve_metadata=True):
+    """
+    Copy the `from_path` file to the `to_path` file and return the number of
+    bytes copied. Also copy the permissions and times if `preserve_metadata`
+    is True.
+    """
+    with open(from_path, 'rb') as source, open(to_path, 'wb') as target:
+        if not copy_file_range(source, target):
+            shutil.copyfileobj(source, target, length=1024 * 1024)
+        size = target.tell()
+    if preserve_metadata:
+        shutil.copystat(from_path, to_path)
+    return size
+
+
+def walk_tree(from_dir, to_dir, make_dirs=True, dirs=None):
+    """
+    Yield (source file path, target file path) tuples for the files of the
+    `from_dir` directory tree copied to the `to_dir` directory. The target
+    directories are created while walking if `make_dirs` is True. If `dirs` is
+    a list, the (source directory path, target directory path) tuples of the
+    directories of the tree, including `from_dir`, are appended to it.
+    """
+    if make_dirs:
+        os.makedirs(to_dir, exist_ok=True)
+    if dirs is not None:
+        dirs.append((from_dir, to_dir))
+    with os.scandir(from_dir) as entries:
+        for entry in entries:
+            target = os.path.join(to_dir, entry.name)
+            if entry.is_dir():
+                yield from walk_tree(entry.path, target, make_dirs, dirs)
+            else:
+                yield entry.path, target
+
+
+def plan_copies(copies, make_dirs=True, warn_replaced=True, dirs=None):
+    """
+    Return a tuple of (list of (source file, target file) tuples, list of
+    errors) given a `copies` list of (source file or directory, target
+    directory) tuples. A directory is copied with its whole tree in the target
+    directory. Missing source paths are skipped.
+
+    If `make_dirs` is False, the targets are only planned: the target
+    directories are neither checked nor created. A warning is reported for
+    the existing targets that are replaced if `warn_replaced` is True. If
+    `dirs` is a list, the (source directory, target directory) tuples of the
+    copied directory trees are appended to it.
+    """
+    errors = []
+    files = []
+    for from_path, to_dir in copies:
+        if on_windows:
+            from_path = add_unc(from_path)
+            to_dir = add_unc(to_dir)
+        from_path = from_path.strip()
+        to_dir = to_dir.strip()
+        # Errors will be captured when doing the validation
+        if not os.path.exists(from_path):
+            continue
+
+        name = os.path.basename(from_path.rstrip('/\\'))
+        to_path = os.path.join(to_dir, name)
+        if make_dirs and warn_replaced and os.path.exists(to_path):
+            msg = to_path + ' is already existed and is replaced by ' + from_path
+            errors.append(Error(WARNING, msg))
+        try:
+            if os.path.isdir(from_path):
+                files.extend(walk_tree(from_path, to_path, make_dirs, dirs))
+            else:
+                if make_dirs:
+                    os.makedirs(to_dir, exist_ok=True)
+                files.append((from_path, to_path))
+        except Exception:
+            msg = 'Cannot copy file at %(from_path)r.' % locals()
+            errors.append(Error(CRITICAL, msg))
+    return files, errors
+
+
+def copy_file_list(files, threads=1, preserve_metadata=True):
+    """
+    Copy a `files` list of (source file, target file) tuples using a pool of
+    `threads` threads. Return a list of (copied bytes count, Error or None)
+    tuples in the order of the `files`.
+    """
+    def copy_one(paths):
+        from_path, to_path = paths
+        try:
+            return copy_file_data(from_path, to_path, preserve_metadata), None
+        except Exception:
+            msg = 'Cannot copy file at %(from_path)r.' % locals()
+            return 0, Error(CRITICAL, msg)
+
+    if threads > 1 and len(files) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(copy_one, files))
+    return [copy_one(paths) for paths in files]
+
+
+def copy_files(copies, threads=1, preserve_metadata=True, stats=None):
+    """
+    Copy a `copies` list of (source file or directory, target directory)
+    tuples using a pool of `threads` threads. Return a list of errors in the
+    order of the `copies`.
+
+    Also copy the permissions and times of the files if `preserve_metadata` is
+    True. If provided, the `stats` dict is updated with the count of copied
+    "files" and "bytes" and the "seconds" spent.
+    """
+    start = time.time()
+    files, errors = plan_copies(copies)
+    results = copy_file_list(files, threads, preserve_metadata)
+
+    files_count = 0
+    bytes_count = 0
+    for size, error in results:
+        if error:
+            errors.append(error)
+        else:
+            files_count += 1
+            bytes_count += size
+
+    if stats is not None:
+        stats['files'] = files_count
+        stats['bytes'] = bytes_count
+        stats['seconds'] = time.time() - start
+    return errors
+
+
+# The name of the manifest file of the synced files saved in a sync output
+# directory.
+SYNC_MANIFEST = '.aboutcode-redist-manifest.json'
+SYNC_MANIFEST_VERSION = 1
+
+
+def load_sync_manifest(output):
+    """
+    Return the {relative target path: entry} mapping of the files synced in the
+    `output` directory at the last sync or an empty mapping. An entry is a
+    mapping of "source" and "target" [size, mtime, ctime in nanoseconds] lists
+    and an optional "sha1" of the content.
+    """
+    try:
+        with open(os.path.join(output, SYNC_MANIFEST)) as manifest:
+            data = json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != SYNC_MANIFEST_VERSION:
+        return {}
+    return data.get('files') or {}
+
+
+def save_sync_manifest(output, files):
+    """
+    Save the `files` {relative target path: entry} mapping of the synced files
+    in the manifest of the `output` directory.
+    """
+    data = dict(version=SYNC_MANIFEST_VERSION, files=files)
+    write_text(os.path.join(output, SYNC_MANIFEST),
+               json.dumps(data, indent=0, sort_keys=True), atomic=True)
+
+
+def get_stat(location):
+    """
+    Return a [size, mtime, ctime in nanoseconds] list for the file at
+    `location` or None if it does not exist. The ctime cannot be set back and
+    tells apart a file rewritten with the same size and mtime.
+    """
+    try:
+        st = os.stat(location)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns, st.st_ctime_ns]
+
+
+def is_unchanged(from_path, to_path, entry, checksum=False):
+    """
+    Return a tuple of (True if the `to_path` target file is the same as the
+    `from_path` source file, sha1 or None) using the `entry` of the last sync of
+    this target if any.
+
+    The files are the same if they have the same size and modification time
+    (in seconds) or if they have not changed since the last sync. If `checksum`
+    is True they are the same if they have the same size and sha1 instead. The
+    sha1 of the last sync is reused if the files have not changed since.
+    """
+    source = get_stat(from_path)
+    target = get_stat(to_path)
+    if not source or not target or source[0] != target[0]:
+        return False, None
+
+    entry = entry or {}
+    source_unchanged = source == entry.get('source')
+    target_unchanged = target == entry.get('target')
+
+    if not checksum:
+        same_mtime = source[1] // 1000000000 == target[1] // 1000000000
+        stats_unchanged = source_unchanged and target_unchanged
+        # the sha1 of the last sync is only valid for the same files
+        sha1 = entry.get('sha1') if stats_unchanged else None
+        return same_mtime or stats_unchanged, sha1
+
+    sha1 = entry.get('sha1')
+    source_sha1 = sha1 if sha1 and source_unchanged else get_checksum(from_path)
+    target_sha1 = sha1 if sha1 and target_unchanged else get_checksum(to_path)
+    return source_sha1 == target_sha1, source_sha1
+
+
+def remove_file(location, root):
+    """
+    Remove the file at `location` and its parent directories up to the `root`
+    directory if they become empty.
+    """
+    if os.path.lexists(location):
+        os.remove(location)
+    parent = os.path.dirname(os.path.abspath(location))
+    root = os.path.join(os.path.abspath(root), '')
+    # only remove the directories strictly under root
+    while parent.startswith(root):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def sync_files(copies, output, threads=1, preserve_metadata=True, checksum=False, delete=False, stats=None):
+    """
+    Sync a `copies` list of (source file or directory, target directory) tuples
+    to the `output` directory copying only the files that are not the same as
+    their target using a pool of `threads` threads. Return a list of errors.
+
+    The files are compared by size and modification time or by sha1 if
+    `checksum` is True. A manifest of the synced files is saved in `output` to
+    make the next sync comparisons cheaper. If `delete` is True, the files of
+    the last sync that are no longer to copy are deleted, but not the files to
+    copy whose copy failed.
+
+    Also copy the permissions and times of the files if `preserve_metadata` is
+    True. If provided, the `stats` dict is updated with the count of copied
+    "files" and "bytes", of "unchanged" and "deleted" files and the "seconds"
+    spent.
+    """
+    start = time.time()
+    files, errors = plan_copies(copies, warn_replaced=False)
+    manifest = load_sync_manifest(output)
+
+    synced = {}
+    # the target paths to copy in this sync, never deleted even if their copy
+    # failed
+    planned = set()
+    to_copy = []
+    unchanged_count = 0
+    for from_path, to_path in files:
+        path = to_posix(os.path.relpath(to_path, output))
+        planned.add(path)
+        entry = manifest.get(path)
+        try:
+            unchanged, sha1 = is_unchanged(from_path, to_path, entry, checksum)
+        except OSError:
+            unchanged, sha1 = False, None
+        if unchanged:
+            unchanged_count += 1
+            synced[path] = dict(source=get_stat(from_path), target=get_stat(to_path))
+            if sha1:
+                synced[path]['sha1'] = sha1
+        else:
+            to_copy.append((from_path, to_path))
+
+    files_count = 0
+    bytes_count = 0
+    for (from_path, to_path), (size, error) in zip(
+            to_copy, copy_file_list(to_copy, threads, preserve_metadata)):
+        if error:
+            errors.append(error)
+            continue
+        files_count += 1
+        bytes_count += size
+        path = to_posix(os.path.relpath(to_path, output))
+        synced[path] = dict(source=get_stat(from_path), target=get_stat(to_path))
+        if checksum:
+            synced[path]['sha1'] = get_checksum(to_path)
+
+    deleted_count = 0
+    if delete:
+        for path in manifest:
+            if path in planned:
+                continue
+            try:
+                remove_file(os.path.join(output, path), output)
+                deleted_count += 1
+            except OSError:
+                msg = 'Cannot delete file at %(path)r.' % locals()
+                errors.append(Error(CRITICAL, msg))
+    else:
+        # keep tracking the files of the previous syncs
+        for path, entry in manifest.items():
+            if path not in synced:
+                synced[path] = entry
+
+    save_sync_manifest(output, synced)
+
+    if stats is not None:
+        stats['files'] = files_count
+        stats['bytes'] = bytes_count
+        stats['unchanged'] = unchanged_count
+        stats['deleted'] = deleted_count
+        stats['seconds'] = time.time() - start
+    return errors
+
+
+# The extensions of already compressed files that are stored in a zip archive
+# without compressing them again.
+compressed_extensions = (
+    '.7z', '.apk', '.bz2', '.egg', '.ear', '.gem', '.gif', '.gz', '.jar',
+    '.jpeg', '.jpg', '.lz', '.lzma', '.nupkg', '.png', '.rar', '.tbz2', '.tgz',
+    '.war', '.whl', '.xz', '.zip', '.zst',
+)
+
+# Files larger than this are streamed from disk by the writer thread rather
+# than read in memory by the worker threads.
+MAX_PREFETCH_SIZE = 8 * 1024 * 1024
+
+
+def get_compress_type(path):
+    """
+    Return the zipfile compression type to use for the file at `path`.
+    """
+    if path.lower().endswith(compressed_extensions):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def plan_zip_entries(copies):
+    """
+    Return a tuple of (list of (source directory or None, archive name)
+    tuples, list of (source file, archive name) tuples, list of errors) given
+    a `copies` list of (source file or directory, relative target directory)
+    tuples. A later entry replaces an earlier entry with the same archive name
+    as if the files were copied.
+
+    The directories are all the parent directories of the files and the
+    directories of the copied trees, including the empty ones. Their archive
+    names end with a "/" and their source is None for the target directories
+    that are not copied from a source directory.
+    """
+    dirs = []
+    files, errors = plan_copies(copies, make_dirs=False, dirs=dirs)
+    entries = {}
+    for from_path, to_path in files:
+        arcname = to_path.replace(os.sep, '/').lstrip('/')
+        if arcname in entries:
+            msg = arcname + ' is already existed and is replaced by ' + from_path
+            errors.append(Error(WARNING, msg))
+        entries[arcname] = from_path
+
+    dir_entries = {}
+    for from_path, to_path in dirs:
+        dir_entries[to_path.replace(os.sep, '/').strip('/')] = from_path
+    for arcname in list(entries) + list(dir_entries):
+        parent = posixpath.dirname(arcname)
+        while parent and parent not in dir_entries:
+            dir_entries[parent] = None
+            parent = posixpath.dirname(parent)
+    # a parent directory sorts before its children
+    dir_entries = [(dir_entries[name], name + '/')
+                   for name in sorted(dir_entries) if name]
+    file_entries = [(from_path, arcname) for arcname, from_path in entries.items()]
+    return dir_entries, file_entries, errors
+
+
+def get_dir_zip_info(from_path, arcname):
+    """
+    Return a ZipInfo for a directory entry with an `arcname` archive name with
+    the permissions and time of the `from_path` source directory or defaults
+    if `from_path` is None.
+    """
+    if from_path is not None:
+        try:
+            return zipfile.ZipInfo.from_file(from_path, arcname)
+        except OSError:
+            pass
+    info = zipfile.ZipInfo(arcname, time.localtime()[:6])
+    # the Unix directory mode and the MS-DOS directory flag
+    info.external_attr = (0o40755 << 16) | 0x10
+    return info
+
+
+def read_small_file(path):
+    """
+    Return the content of the file at `path` or None if it is too large to be
+    read in memory or cannot be read.
+    """
+    try:
+        if os.path.getsize(path) > MAX_PREFETCH_SIZE:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def prefetch_small_files(paths, threads):
+    """
+    Yield the content of each file of the `paths` list, or None for large files,
+    read by a pool of `threads` threads reading ahead a bounded number of files.
+    """
+    window = threads * 4
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(read_small_file, path))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def zip_files(copies, zip_location, threads=1, stats=None):
+    """
+    Write the files of a `copies` list of (source file or directory, relative
+    target directory) tuples directly in a new zip archive at `zip_location`,
+    with an entry for each directory. Already compressed files are stored and
+    the other files are deflated.
+    Return a list of errors.
+
+    With more than one `threads`, the small files are read ahead in parallel by
+    a pool of threads. If provided, the `stats` dict is updated with the count
+    of archived "files" and "bytes" and the "seconds" spent.
+    """
+    start = time.time()
+    dir_entries, entries, errors = plan_zip_entries(copies)
+    if threads > 1:
+        contents = prefetch_small_files([path for path, _ in entries], threads)
+    else:
+        contents = repeat(None)
+
+    files_count = 0
+    bytes_count = 0
+    with zipfile.ZipFile(zip_location, 'w', allowZip64=True) as archive:
+        for from_path, arcname in dir_entries:
+            archive.writestr(get_dir_zip_info(from_path, arcname), b'')
+        for (from_path, arcname), content in zip(entries, contents):
+            compress_type = get_compress_type(from_path)
+            try:
+                if content is None:
+                    # stream from disk
+                    archive.write(from_path, arcname, compress_type)
+                    size = os.path.getsize(from_path)
+                else:
+                    info = zipfile.ZipInfo.from_file(from_path, arcname)
+                    archive.writestr(info, content, compress_type)
+                    size = len(content)
+            except Exception:
+                msg = 'Cannot copy file at %(from_path)r.' % locals()
+                errors.append(Error(CRITICAL, msg))
+                continue
+            files_count += 1
+            bytes_count += size
+
+    if stats is not None:
+        stats['files'] = files_count
+        stats['bytes'] = bytes_count
+        stats['seconds'] = time.time() - start
+    return errors
+
+
+def format_copy_stats(stats):
+    """
+    Return a text reporting the copy `stats` with the files and bytes copied
+    per second and the unchanged and deleted files of a sync.
+    """
+    seconds = stats['seconds'] or 0.000001
+    files = stats['files']
+    megabytes = stats['bytes'] / (1024 * 1024)
+    files_per_second = files / seconds
+    megabytes_per_second = megabytes / seconds
+    text = ('Copied {files} files ({megabytes:.1f} MB) in {seconds:.2f}s: '
+            '{files_per_second:.1f} files/s, {megabytes_per_second:.1f} MB/s.'
+            .format(**locals()))
+    if 'unchanged' in stats:
+        text += (' {unchanged} unchanged files skipped, {deleted} files deleted.'
+                 .format(**stats))
+    return text
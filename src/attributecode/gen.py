@@ -14,6 +14,8 @@
 #  limitations under the License.
 # ============================================================================
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from posixpath import basename
 from posixpath import dirname
 from posixpath import exists
@@ -22,17 +24,22 @@ from posixpath import normpath
 
 from attributecode import ERROR
 from attributecode import CRITICAL
-from attributecode import INFO
 from attributecode import Error
+from attributecode import ErrorCollector
+from attributecode import checksum
+from attributecode import inventory_db
 from attributecode import model
 from attributecode import util
+from attributecode.text_store import TextStore
 from attributecode.util import add_unc
 from attributecode.util import csv
 from attributecode.util import file_fields
 from attributecode.util import invalid_chars
 from attributecode.util import to_posix
 from attributecode.util import UNC_PREFIX_POSIX
-from attributecode.util import load_scancode_json, load_csv, load_json, load_excel
+from attributecode.util import check_duplicated_column_names
+from attributecode.util import load_scancode_json, load_csv, load_csv_inventory, load_json, load_jsonl, load_excel
+from attributecode.util import JsonLines
 from attributecode.util import strip_inventory_value
 
 
@@ -45,33 +52,7 @@ def check_duplicated_columns(location):
     with open(location, mode='r', encoding='utf-8-sig', errors='replace') as csvfile:
         reader = csv.reader(csvfile)
         columns = next(reader)
-        columns = [col for col in columns]
-
-    seen = set()
-    dupes = dict()
-    for col in columns:
-        c = col.lower()
-        if c in seen:
-            if c in dupes:
-                dupes[c].append(col)
-            else:
-                dupes[c] = [col]
-        seen.add(c.lower())
-
-    errors = []
-    if dupes:
-        dup_msg = []
-        for name, names in dupes.items():
-            names = u', '.join(names)
-            msg = '%(name)s with %(names)s' % locals()
-            dup_msg.append(msg)
-        dup_msg = u', '.join(dup_msg)
-        msg = ('Duplicated column name(s): %(dup_msg)s\n' % locals() +
-               'Please correct the input and re-run.')
-        err = Error(ERROR, msg)
-        if not err in errors:
-            errors.append(err)
-    return errors
+    return check_duplicated_column_names(columns)
 
 
 def check_duplicated_about_resource(arp, arp_list):
@@ -118,14 +99,25 @@ def check_about_resource_filename(arp):
     return ''
 
 
-def load_inventory(location, from_attrib=False, base_dir=None, scancode=False, reference_dir=None, worksheet=None):
+def load_inventory(location, from_attrib=False, base_dir=None, scancode=False, reference_dir=None, worksheet=None, query=None, copy_strategy='copy', archive=None, load_profile='texts', text_store=None):
     """
     Load the inventory file at `location` for ABOUT and LICENSE files stored in
     the `base_dir`. Return a list of errors and a list of About objects
     validated against the `base_dir`.
 
     Optionally use `reference_dir` as the directory location of extra reference
-    license and notice files to reuse.
+    license and notice files to reuse. These are copied in the `base_dir` using
+    `copy_strategy`, one of util.COPY_STRATEGIES.
+
+    Optionally use a SQL `query` to select the components to load from a
+    SQLite inventory.
+
+    If an `archive` is provided, the `base_dir` is the location of this archive
+    and the paths are checked in the archive without extracting it.
+
+    The files referenced by the file fields are loaded according to
+    `load_profile`, one of model.LOAD_PROFILES. Their texts are read once and
+    shared through the `text_store` TextStore, a new one if not provided.
     """
     errors = []
     abouts = []
@@ -137,26 +129,36 @@ def load_inventory(location, from_attrib=False, base_dir=None, scancode=False, r
         inventory = load_scancode_json(location)
     else:
         if location.endswith('.csv'):
-            dup_cols_err = check_duplicated_columns(location)
+            # the CSV rows are read once and come already stripped
+            dup_cols_err, inventory = load_csv_inventory(add_unc(location))
             if dup_cols_err:
                 errors.extend(dup_cols_err)
                 return errors, abouts
-            inventory = load_csv(location)
-            is_spreadsheet = True
         elif location.endswith('.xlsx'):
             dup_cols_err, inventory = load_excel(location, worksheet)
             is_spreadsheet = True
             if dup_cols_err:
                 errors.extend(dup_cols_err)
                 return errors, abouts
+        elif location.endswith('.jsonl'):
+            # all the rows are checked before any About is loaded: the file is
+            # read again for each of these two passes instead of being kept
+            inventory = JsonLines(location)
+        elif location.endswith('.sqlite'):
+            try:
+                inventory = inventory_db.load_sqlite(location, query)
+            except inventory_db.InvalidQueryError as e:
+                errors.append(Error(CRITICAL, str(e)))
+                return errors, abouts
         else:
             inventory = load_json(location)
 
-    arp_list = []
-    errors = []
+    # the about_resource values seen so far
+    arp_list = set()
+    errors = ErrorCollector()
 
     if is_spreadsheet:
-        # Only the .csv and .xlsx may have newline issue
+        # Only the .xlsx may have newline issue
         stripped_inv = strip_inventory_value(inventory)
     else:
         stripped_inv = inventory
@@ -167,13 +169,12 @@ def load_inventory(location, from_attrib=False, base_dir=None, scancode=False, r
                 arp = component['about_resource']
                 dup_err = check_duplicated_about_resource(arp, arp_list)
                 if dup_err:
-                    if not dup_err in errors:
-                        errors.append(dup_err)
+                    errors.append(dup_err)
                 else:
-                    arp_list.append(arp)
+                    arp_list.add(arp)
 
                 invalid_about_filename = check_about_resource_filename(arp)
-                if invalid_about_filename and not invalid_about_filename in errors:
+                if invalid_about_filename:
                     errors.append(invalid_about_filename)
 
         newline_in_file_err = check_newline_in_file_field(component)
@@ -181,9 +182,15 @@ def load_inventory(location, from_attrib=False, base_dir=None, scancode=False, r
             errors.extend(newline_in_file_err)
 
     if errors:
-        return errors, abouts
+        return errors.to_list(), abouts
 
-    custom_fields_list = []
+    errors = []
+    # The (reference file, target directory) pairs copied in this run
+    copied_references = set()
+    # The custom field names and the texts seen in this run
+    custom_field_registry = model.CustomFieldRegistry()
+    if text_store is None:
+        text_store = TextStore()
     for fields in stripped_inv:
         # check does the input contains the required fields
         required_fields = model.About.required_fields
@@ -209,7 +216,8 @@ def load_inventory(location, from_attrib=False, base_dir=None, scancode=False, r
             loc = join(base_dir, afp)
         else:
             loc = afp
-        about = model.About(about_file_path=afp)
+        about = model.About(
+            about_file_path=afp, archive=archive, load_profile=load_profile)
         about.location = loc
 
         # Update value for 'about_resource'
@@ -230,21 +238,18 @@ def load_inventory(location, from_attrib=False, base_dir=None, scancode=False, r
             from_attrib=from_attrib,
             running_inventory=False,
             reference_dir=reference_dir,
+            copy_strategy=copy_strategy,
+            copied_references=copied_references,
+            custom_field_registry=custom_field_registry,
+            text_store=text_store,
         )
 
-        for severity, message in ld_errors:
-            if 'Custom Field' in message:
-                field_name = message.replace('Custom Field: ', '').strip()
-                if not field_name in custom_fields_list:
-                    custom_fields_list.append(field_name)
-            else:
-                errors.append(Error(severity, message))
-
+        errors.extend(ld_errors)
         abouts.append(about)
-    if custom_fields_list:
-        custom_fields_err_msg = 'Field ' + \
-            str(custom_fields_list) + ' is a custom field.'
-        errors.append(Error(INFO, custom_fields_err_msg))
+
+    custom_fields_error = custom_field_registry.get_found_error()
+    if custom_fields_error:
+        errors.append(custom_fields_error)
 
     return errors, abouts
 
@@ -253,10 +258,101 @@ def update_about_resource(self):
     pass
 
 
-def generate(location, base_dir, android=None, reference_dir=None, fetch_license=False, fetch_license_djc=False, scancode=False, worksheet=None):
+def get_write_error(dump_loc, exception):
+    """
+    Return an Error for an `exception` raised when writing the ABOUT file at
+    `dump_loc`.
+    """
+    # only keep the first 100 char of the exception
+    # TODO: truncated errors are likely making diagnotics harder
+    emsg = repr(exception)[:100]
+    msg = (u'Failed to write .ABOUT file at : '
+           u'%(dump_loc)s '
+           u'with error: %(emsg)s' % locals())
+    return Error(ERROR, msg)
+
+
+def write_about_file(about, dump_loc, licenses_dict, created_dirs=None, skip_unchanged=False, atomic=False):
+    """
+    Write the `about` About object as an ABOUT file at `dump_loc`. Return a
+    tuple of (Error or None, True if the file was written).
+    `created_dirs` is an optional set of the directories already created. Skip
+    writing an unchanged file if `skip_unchanged` is True and write the file
+    atomically if `atomic` is True.
+    """
+    try:
+        written = about.dump(
+            dump_loc,
+            licenses_dict,
+            created_dirs=created_dirs,
+            skip_unchanged=skip_unchanged,
+            atomic=atomic,
+        )
+        return None, written
+    except Exception as e:
+        return get_write_error(dump_loc, e), False
+
+
+# The directories created by the current worker process.
+worker_created_dirs = set()
+
+
+def write_about_file_in_worker(job, skip_unchanged=False, atomic=False):
+    """
+    Write an ABOUT file for a `job` tuple of (about, dump_loc, licenses_dict) in
+    a worker process. Return a tuple of (Error or None, written flag).
+    """
+    about, dump_loc, licenses_dict = job
+    return write_about_file(
+        about, dump_loc, licenses_dict, worker_created_dirs, skip_unchanged, atomic)
+
+
+def write_about_files(jobs, processes=1, skip_unchanged=False, atomic=False):
+    """
+    Write the ABOUT files for a `jobs` list of (about, dump_loc, licenses_dict)
+    tuples using up to `processes` parallel processes. Return a list of
+    (Error or None, written flag) tuples for each job, in the order of the
+    `jobs` whatever the number of processes.
+    Skip unchanged files if `skip_unchanged` is True and write the files
+    atomically if `atomic` is True.
+    """
+    if processes > 1 and len(jobs) > 1:
+        writer = partial(
+            write_about_file_in_worker, skip_unchanged=skip_unchanged, atomic=atomic)
+        # Send the jobs in a few chunks per process to limit the IPC overhead
+        chunksize = max(1, len(jobs) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(executor.map(writer, jobs, chunksize=chunksize))
+    else:
+        created_dirs = set()
+        results = [
+            write_about_file(about, dump_loc, licenses_dict,
+                             created_dirs, skip_unchanged, atomic)
+            for about, dump_loc, licenses_dict in jobs]
+    return results
+
+
+def generate(location, base_dir, android=None, reference_dir=None, fetch_license=False, fetch_license_djc=False, scancode=False, worksheet=None, query=None, processes=1, skip_unchanged=False, atomic=False, stats=None, license_dir=None, license_reference='path', copy_strategy='copy', compute_checksums=False, threads=1, checksum_cache=None):
     """
     Load ABOUT data from a CSV inventory at `location`. Write ABOUT files to
-    base_dir. Return errors and about objects.
+    base_dir using up to `processes` parallel processes. Return errors and
+    about objects.
+
+    If `skip_unchanged` is True, existing files with the same content are not
+    rewritten. If `atomic` is True, files are written to a temporary file then
+    renamed. If provided, the `stats` dict is updated with the count of
+    "written" and "unchanged" ABOUT files.
+
+    If `license_dir` is provided, the fetched license files are written once in
+    this shared directory and referenced from the ABOUT files using the
+    `license_reference` mode, one of model.LICENSE_REFERENCES.
+
+    The reference files from `reference_dir` are copied using `copy_strategy`,
+    one of util.COPY_STRATEGIES.
+
+    If `compute_checksums` is True, the checksum fields are set to the
+    checksums of the about_resource computed using `threads` threads and the
+    optional checksum cache file at `checksum_cache`.
     """
     notice_dict = {}
     api_url = ''
@@ -281,17 +377,41 @@ def generate(location, base_dir, android=None, reference_dir=None, fetch_license
         base_dir=bdir,
         reference_dir=reference_dir,
         scancode=scancode,
-        worksheet=worksheet
+        worksheet=worksheet,
+        query=query,
+        copy_strategy=copy_strategy,
+        # the texts of the license and notice files are only used in the
+        # Android NOTICE files
+        load_profile='texts' if android else 'paths',
     )
     if gen_license:
         license_dict, err = model.pre_process_and_fetch_license_dict(
             abouts, api_url=api_url, api_key=api_key)
         if err:
+            # Avoid having same error multiple times
+            seen = set(errors)
             for e in err:
-                # Avoid having same error multiple times
-                if not e in errors:
+                if e not in seen:
+                    seen.add(e)
                     errors.append(e)
 
+        if license_dir:
+            # Write each license file once in the shared license directory
+            shared_licenses = {}
+            for _name, lic_filename, lic_context, _url, _spdx in license_dict.values():
+                if lic_filename:
+                    shared_licenses[lic_filename] = lic_context
+            errors.extend(util.write_licenses(
+                shared_licenses, license_dir, skip_unchanged, atomic))
+
+    if compute_checksums:
+        errors.extend(checksum.set_checksums(abouts, threads, checksum_cache))
+
+    # The license files are written and the about objects are updated first in
+    # this process. The ABOUT files are then serialized and written, possibly
+    # in parallel, from this list of (about, dump_loc, licenses_dict) jobs.
+    jobs = []
+    created_dirs = set()
     for about in abouts:
         # Strip trailing spaces
         about.about_file_path = about.about_file_path.strip()
@@ -324,7 +444,8 @@ def generate(location, base_dir, android=None, reference_dir=None, fetch_license
             if gen_license:
                 # Write generated LICENSE file
                 license_key_name_context_url_list = about.dump_lic(
-                    dump_loc, license_dict)
+                    dump_loc, license_dict, created_dirs, skip_unchanged, atomic,
+                    license_dir, license_reference)
                 if license_key_name_context_url_list:
                     for lic_key, lic_name, lic_filename, lic_context, lic_url, spdx_lic_key in license_key_name_context_url_list:
                         licenses_dict[lic_key] = [
@@ -345,14 +466,36 @@ def generate(location, base_dir, android=None, reference_dir=None, fetch_license
                         if about.spdx_license_key.value:
                             about.spdx_license_key.present = True
 
-            about.dump(dump_loc, licenses_dict)
+            jobs.append((about, dump_loc, licenses_dict))
+
+        except Exception as e:
+            errors.append(get_write_error(dump_loc, e))
+
+    results = write_about_files(
+        jobs, processes, skip_unchanged=skip_unchanged, atomic=atomic)
+    # the jobs of the ABOUT files that were written or are unchanged
+    dumped = []
+    unchanged_count = 0
+    for job, (error, is_written) in zip(jobs, results):
+        if error:
+            errors.append(error)
+            continue
+        dumped.append(job)
+        if not is_written:
+            unchanged_count += 1
+
+    if stats is not None:
+        stats['written'] = len(dumped) - unchanged_count
+        stats['unchanged'] = unchanged_count
 
-            if android:
+    if android:
+        import os
+        for about, dump_loc, _licenses_dict in dumped:
+            try:
                 """
                 Create MODULE_LICENSE_XXX and get context to create NOTICE file
                 follow the standard from Android Open Source Project
                 """
-                import os
                 parent_path = os.path.dirname(util.to_posix(dump_loc))
 
                 about.android_module_license(parent_path)
@@ -361,17 +504,9 @@ def generate(location, base_dir, android=None, reference_dir=None, fetch_license
                     notice_dict[notice_path] += '\n\n' + notice_context
                 else:
                     notice_dict[notice_path] = notice_context
+            except Exception as e:
+                errors.append(get_write_error(dump_loc, e))
 
-        except Exception as e:
-            # only keep the first 100 char of the exception
-            # TODO: truncated errors are likely making diagnotics harder
-            emsg = repr(e)[:100]
-            msg = (u'Failed to write .ABOUT file at : '
-                   u'%(dump_loc)s '
-                   u'with error: %(emsg)s' % locals())
-            errors.append(Error(ERROR, msg))
-
-    if android:
         # Check if there is already a NOTICE file present
         for path in notice_dict.keys():
             if os.path.exists(path):
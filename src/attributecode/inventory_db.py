@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+"""
+Store and query an inventory of ABOUT records in a SQLite database.
+
+The database uses a normalized schema:
+ - components: one row per ABOUT record with a column for each standard field
+ - licenses: one row per distinct license (key, name, file, url, spdx key)
+ - component_licenses: links components to their licenses, in order
+ - custom_fields: one row per custom field name and value of a component
+
+For instance, all the components under any GPL license can be selected with:
+    SELECT component_id FROM component_licenses
+    JOIN licenses ON licenses.id = component_licenses.license_id
+    WHERE licenses.key GLOB 'gpl-*'
+"""
+
+import os
+import sqlite3
+
+# These fields are grouped in the "licenses" of a record and stored in the
+# licenses table rather than as columns of the components table.
+license_group_fields = ('license_key', 'license_name',
+                        'license_file', 'license_url',)
+
+license_columns = ('key', 'name', 'file', 'url', 'spdx_license_key',)
+
+
+class InvalidQueryError(Exception):
+    """
+    Raised for an invalid SQL query used to select the components to load.
+    """
+
+SCHEMA = '''
+CREATE TABLE components (
+    id INTEGER PRIMARY KEY,
+    %(component_columns)s
+);
+CREATE TABLE licenses (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL DEFAULT '',
+    file TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    spdx_license_key TEXT NOT NULL DEFAULT '',
+    UNIQUE (key, name, file, url, spdx_license_key)
+);
+CREATE TABLE component_licenses (
+    component_id INTEGER NOT NULL REFERENCES components (id),
+    license_id INTEGER NOT NULL REFERENCES licenses (id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (component_id, position)
+);
+CREATE TABLE custom_fields (
+    component_id INTEGER NOT NULL REFERENCES components (id),
+    name TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (component_id, name)
+);
+CREATE INDEX components_name ON components (name);
+CREATE INDEX components_package_url ON components (package_url);
+CREATE INDEX components_about_resource ON components (about_resource);
+CREATE INDEX licenses_key ON licenses (key);
+CREATE INDEX component_licenses_license_id ON component_licenses (license_id);
+CREATE INDEX custom_fields_name ON custom_fields (name);
+'''
+
+
+def get_component_columns(standard_fields):
+    """
+    Return a list of component table column names given a `standard_fields`
+    list of standard field names.
+    """
+    return [name for name in standard_fields
+            if name not in license_group_fields]
+
+
+def to_text(value):
+    """
+    Return a text for a record `value`, joining lists with new lines the same
+    way as in a CSV inventory.
+    """
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return '\n'.join(str(v) for v in value)
+    return str(value)
+
+
+def save_as_sqlite(location, records, standard_fields):
+    """
+    Write the `records` iterable of JSON-formatted ABOUT records (as created by
+    util.format_about_dict_for_json_output) in a new SQLite database at
+    `location`, replacing any existing file. `standard_fields` is the list of
+    standard field names used as components columns.
+    """
+    if os.path.exists(location):
+        os.remove(location)
+
+    columns = get_component_columns(standard_fields)
+    component_columns = ',\n    '.join('%s TEXT' % c for c in columns)
+    insert_component = 'INSERT INTO components (%s) VALUES (%s)' % (
+        ', '.join(columns), ', '.join('?' * len(columns)))
+    standard = set(columns)
+    # {license values tuple: license id}
+    license_ids = {}
+
+    conn = sqlite3.connect(location)
+    try:
+        conn.executescript(SCHEMA % locals())
+        for record in records:
+            values = [to_text(record.get(c)) for c in columns]
+            component_id = conn.execute(insert_component, values).lastrowid
+
+            for position, lic in enumerate(record.get('licenses') or []):
+                lic_values = tuple(to_text(lic.get(c)) or ''
+                                   for c in license_columns)
+                license_id = license_ids.get(lic_values)
+                if not license_id:
+                    license_id = conn.execute(
+                        'INSERT INTO licenses (key, name, file, url, spdx_license_key) '
+                        'VALUES (?, ?, ?, ?, ?)', lic_values).lastrowid
+                    license_ids[lic_values] = license_id
+                conn.execute(
+                    'INSERT INTO component_licenses (component_id, license_id, position) '
+                    'VALUES (?, ?, ?)', (component_id, license_id, position))
+
+            customs = [(component_id, name, to_text(value))
+                       for name, value in record.items()
+                       if name not in standard and name != 'licenses']
+            if customs:
+                conn.executemany(
+                    'INSERT INTO custom_fields (component_id, name, value) '
+                    'VALUES (?, ?, ?)', customs)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def check_select_query(query):
+    """
+    Return the SQL `query` without its trailing semicolons if this is a single
+    SELECT statement. Raise an InvalidQueryError otherwise.
+    """
+    statement = query.strip().rstrip(';').strip()
+    first_word = statement.split(None, 1)[0].upper() if statement else ''
+    if first_word not in ('SELECT', 'WITH'):
+        raise InvalidQueryError(
+            'Invalid SQL query: %(query)r: not a SELECT statement' % locals())
+    # a semicolon ends a statement unless it is in a string or a comment
+    for i, char in enumerate(statement):
+        if char == ';' and sqlite3.complete_statement(statement[:i + 1]):
+            raise InvalidQueryError(
+                'Invalid SQL query: %(query)r: only a single SELECT statement '
+                'is supported' % locals())
+    return statement
+
+
+def load_sqlite(location, query=None):
+    """
+    Read the SQLite inventory database at `location` and return a list of
+    dicts, one for each component, using the same layout as a JSON inventory.
+
+    If `query` is provided, it is a single SQL SELECT statement whose first
+    column is the id of the components to load; only these components are
+    loaded. Raise an InvalidQueryError if this query is not a single SELECT
+    statement or cannot be run.
+    """
+    if query:
+        statement = check_select_query(query)
+    results = []
+    conn = sqlite3.connect(location)
+    try:
+        if query:
+            conn.execute(
+                'CREATE TEMP TABLE selected (id INTEGER PRIMARY KEY)')
+            try:
+                # the query may return more columns: only keep the first one
+                rows = conn.execute(statement).fetchall()
+            except sqlite3.Error as e:
+                raise InvalidQueryError(
+                    'Invalid SQL query: %(query)r: %(e)s' % locals())
+            conn.executemany(
+                'INSERT OR IGNORE INTO selected VALUES (?)',
+                ((row[0],) for row in rows))
+            selection = ' WHERE {table}.{column} IN (SELECT id FROM temp.selected)'
+        else:
+            selection = ''
+
+        licenses_by_component = {}
+        cursor = conn.execute(
+            'SELECT component_licenses.component_id, licenses.key, licenses.name, '
+            'licenses.file, licenses.url, licenses.spdx_license_key '
+            'FROM component_licenses JOIN licenses '
+            'ON licenses.id = component_licenses.license_id'
+            + selection.format(table='component_licenses', column='component_id')
+            + ' ORDER BY component_licenses.component_id, component_licenses.position')
+        for component_id, *lic_values in cursor:
+            lic = {c: v for c, v in zip(license_columns, lic_values) if v}
+            licenses_by_component.setdefault(component_id, []).append(lic)
+
+        customs_by_component = {}
+        cursor = conn.execute(
+            'SELECT component_id, name, value FROM custom_fields'
+            + selection.format(table='custom_fields', column='component_id')
+            + ' ORDER BY component_id, name')
+        for component_id, name, value in cursor:
+            customs_by_component.setdefault(component_id, []).append((name, value))
+
+        cursor = conn.execute(
+            'SELECT * FROM components'
+            + selection.format(table='components', column='id')
+            + ' ORDER BY id')
+        columns = [d[0] for d in cursor.description]
+        for row in cursor:
+            component_id = row[0]
+            record = {c: v for c, v in zip(columns[1:], row[1:]) if v}
+            licenses = licenses_by_component.get(component_id)
+            if licenses:
+                record['licenses'] = licenses
+            record.update(customs_by_component.get(component_id, []))
+            results.append(record)
+    finally:
+        conn.close()
+    return results
@@ -25,8 +25,10 @@ components inventories.
 """
 
 import json
+import marshal
 import os
 import posixpath
+import sys
 from requests import get, head, exceptions
 import traceback
 from itertools import zip_longest
@@ -42,16 +44,31 @@ from attributecode import CRITICAL
 from attributecode import ERROR
 from attributecode import INFO
 from attributecode import WARNING
+from attributecode import ABOUT_FILE_INVALID
+from attributecode import API_AUTHORIZATION_DENIED
+from attributecode import CUSTOM_FIELD
+from attributecode import FIELD_DUPLICATED
+from attributecode import FIELD_DUPLICATED_VALUE
+from attributecode import FIELD_EMPTY
+from attributecode import FIELD_INVALID
+from attributecode import FIELD_NAME_INVALID
+from attributecode import FIELD_REQUIRED
+from attributecode import FILE_TEXT_NOT_LOADED
+from attributecode import PATH_NOT_FOUND
 from attributecode import api
 from attributecode import Error
-from attributecode import saneyaml
+from attributecode import ErrorCollector
 from attributecode import gen
+from attributecode import copier
+from attributecode import inventory_db
 from attributecode import util
+from attributecode import yaml_backend
+from attributecode.about_parser import load_about_text
+from attributecode.text_store import TextStore
 from attributecode.transform import write_excel
 from attributecode.util import add_unc
 from attributecode.util import boolean_fields
 from attributecode.util import copy_license_notice_files
-from attributecode.util import copy_file
 from attributecode.util import csv
 from attributecode.util import file_fields
 from attributecode.util import filter_errors
@@ -60,21 +77,48 @@ from attributecode.util import is_valid_name
 from attributecode.util import on_windows
 from attributecode.util import norm
 from attributecode.util import replace_tab_with_spaces
-from attributecode.util import wrap_boolean_value
 from attributecode.util import UNC_PREFIX
 from attributecode.util import ungroup_licenses
 from attributecode.util import ungroup_licenses_from_sctk
 
 genereated_tk_version = "# Generated with AboutCode Toolkit Version %s \n\n" % __version__
 
+# How the generated ABOUT files reference the license files of a shared license
+# directory: with a relative "path" in their license_file, or with a "hardlink"
+# or a "symlink" to the shared license file side-by-side with the ABOUT file.
+LICENSE_REFERENCES = ('path', 'hardlink', 'symlink',)
+
+# How the files referenced by the license_file, notice_file, changelog_file and
+# author_file fields are loaded: with "texts" their texts are read, with
+# "paths" these files are only checked to exist and be readable, for the
+# commands that do not use these texts.
+LOAD_PROFILES = ('texts', 'paths',)
+
 
 class Field(object):
     """
     An ABOUT file field. The initial value is a string. Subclasses can and
     will alter the value type as needed.
+
+    The validation of a field can be deferred until its value is first
+    accessed: see defer_validation().
+
+    Fields use __slots__ as there are dozens of them for each About.
     """
 
+    __slots__ = (
+        'pending_validation',
+        'name',
+        'original_value',
+        '_value',
+        'required',
+        'present',
+        'errors',
+    )
+
     def __init__(self, name=None, value=None, required=False, present=False):
+        # the keyword arguments of a deferred validation or None
+        self.pending_validation = None
         # normalized names are lowercased per specification
         self.name = name
         # save this and do not mutate it afterwards
@@ -98,6 +142,25 @@ class Field(object):
     def default_value(self):
         return ''
 
+    @property
+    def value(self):
+        if self.pending_validation is not None:
+            self.validate(**self.pending_validation)
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        # an explicit value replaces any deferred validation
+        self.pending_validation = None
+        self._value = value
+
+    def defer_validation(self, **kwargs):
+        """
+        Defer the validation of this field with the `kwargs` keyword arguments
+        of validate() until its value is first accessed.
+        """
+        self.pending_validation = kwargs
+
     def validate(self, *args, **kwargs):
         """
         Validate and normalize thyself. Return a list of errors.
@@ -110,7 +173,8 @@ class Field(object):
             # required fields must be present
             if self.required:
                 msg = u'Field %(name)s is required'
-                errors.append(Error(CRITICAL, msg % locals()))
+                errors.append(Error(CRITICAL, msg % locals(), FIELD_REQUIRED))
+                self.errors = errors
                 return errors
         else:
             # present fields should have content ...
@@ -121,10 +185,12 @@ class Field(object):
                 if self.required:
                     msg = u'Field %(name)s is required and empty'
                     severity = CRITICAL
+                    code = FIELD_REQUIRED
                 else:
                     severity = INFO
                     msg = u'Field %(name)s is present but empty.'
-                errors.append(Error(severity, msg % locals()))
+                    code = FIELD_EMPTY
+                errors.append(Error(severity, msg % locals(), code))
             else:
                 # present fields with content go through validation...
                 # first trim any trailing spaces on each line
@@ -142,7 +208,7 @@ class Field(object):
                 except Exception as e:
                     emsg = repr(e)
                     msg = u'Error validating field %(name)s: %(value)r: %(emsg)r'
-                    errors.append(Error(CRITICAL, msg % locals()))
+                    errors.append(Error(CRITICAL, msg % locals(), FIELD_INVALID))
                     raise
 
         # set or reset self
@@ -232,6 +298,8 @@ class StringField(Field):
     The validated value is a string.
     """
 
+    __slots__ = ()
+
     def _validate(self, *args, **kwargs):
         errors = super(StringField, self)._validate(*args, ** kwargs)
         no_special_char_field = [
@@ -243,7 +311,7 @@ class StringField(Field):
             if special_char:
                 msg = (u'The following character(s) cannot be in the %(name)s: '
                        '%(special_char)r' % locals())
-                errors.append(Error(ERROR, msg))
+                errors.append(Error(ERROR, msg, FIELD_INVALID))
         return errors
 
     def _serialized_value(self):
@@ -281,6 +349,8 @@ class SingleLineField(StringField):
     a string.
     """
 
+    __slots__ = ()
+
     def _validate(self, *args, **kwargs):
         errors = super(SingleLineField, self)._validate(*args, ** kwargs)
         if self.value and isinstance(self.value, str) and '\n' in self.value:
@@ -288,7 +358,7 @@ class SingleLineField(StringField):
             value = self.original_value
             msg = (u'Field %(name)s: Cannot span multiple lines: %(value)s'
                    % locals())
-            errors.append(Error(ERROR, msg))
+            errors.append(Error(ERROR, msg, FIELD_INVALID))
         return errors
 
 
@@ -298,6 +368,8 @@ class ListField(StringField):
     value is a list.
     """
 
+    __slots__ = ()
+
     def default_value(self):
         return []
 
@@ -321,7 +393,7 @@ class ListField(StringField):
                 name = self.name
                 msg = (u'Field %(name)s: ignored empty list value'
                        % locals())
-                errors.append(Error(INFO, msg))
+                errors.append(Error(INFO, msg, FIELD_EMPTY))
                 continue
             # keep only unique and report error for duplicates
             if val not in self.value:
@@ -330,7 +402,7 @@ class ListField(StringField):
                 name = self.name
                 msg = (u'Field %(name)s: ignored duplicated list value: '
                        '%(val)r' % locals())
-                errors.append(Error(WARNING, msg))
+                errors.append(Error(WARNING, msg, FIELD_DUPLICATED_VALUE))
         return errors
 
     def _serialized_value(self):
@@ -366,6 +438,8 @@ class PackageUrlField(StringField):
     A Package URL field. The validated value is a purl.
     """
 
+    __slots__ = ()
+
     def _validate(self, *args, **kwargs):
         """
         Check that Package URL is valid. Return a list of errors.
@@ -375,7 +449,7 @@ class PackageUrlField(StringField):
         val = self.value
         if not self.is_valid_purl(val):
             msg = (u'Field %(name)s: Invalid Package URL: %(val)s' % locals())
-            errors.append(Error(WARNING, msg))
+            errors.append(Error(WARNING, msg, FIELD_INVALID))
         return errors
 
     @staticmethod
@@ -394,6 +468,8 @@ class UrlListField(ListField):
     A URL field. The validated value is a list of URLs.
     """
 
+    __slots__ = ()
+
     def _validate(self, *args, **kwargs):
         """
         Check that URLs are valid. Return a list of errors.
@@ -404,7 +480,7 @@ class UrlListField(ListField):
         for url in val:
             if not self.is_valid_url(url):
                 msg = (u'Field %(name)s: Invalid URL: %(val)s' % locals())
-                errors.append(Error(WARNING, msg))
+                errors.append(Error(WARNING, msg, FIELD_INVALID))
         return errors
 
     @staticmethod
@@ -422,6 +498,8 @@ class UrlField(StringField):
     A URL field. The validated value is a URL.
     """
 
+    __slots__ = ()
+
     def _validate(self, *args, **kwargs):
         """
         Check that URL is valid. Return a list of errors.
@@ -431,7 +509,7 @@ class UrlField(StringField):
         val = self.value
         if not self.is_valid_url(val):
             msg = (u'Field %(name)s: Invalid URL: %(val)s' % locals())
-            errors.append(Error(WARNING, msg))
+            errors.append(Error(WARNING, msg, FIELD_INVALID))
         return errors
 
     @staticmethod
@@ -451,6 +529,8 @@ class PathField(ListField):
     The paths can also be resolved
     """
 
+    __slots__ = ('about_file_path', 'running_inventory', 'base_dir', 'reference_dir',)
+
     def default_value(self):
         return {}
 
@@ -460,9 +540,11 @@ class PathField(ListField):
         paths. Return a list of errors.
 
         base_dir is the directory location of the ABOUT file used to resolve
-        relative paths to actual file locations.
+        relative paths to actual file locations. The paths are checked in the
+        optional `archive` when they are in this archive.
         """
         errors = super(PathField, self)._validate(*args, ** kwargs)
+        archive = kwargs.get('archive')
         self.about_file_path = kwargs.get('about_file_path')
         self.running_inventory = kwargs.get('running_inventory')
         self.base_dir = kwargs.get('base_dir')
@@ -501,7 +583,7 @@ class PathField(ListField):
                 if not (self.base_dir or self.reference_dir):
                     msg = (u'Field %(name)s: Unable to verify path: %(path)s:'
                            u' No base directory provided' % locals())
-                    errors.append(Error(ERROR, msg))
+                    errors.append(Error(ERROR, msg, PATH_NOT_FOUND))
                     location = None
                     paths[path] = location
                     continue
@@ -531,16 +613,20 @@ class PathField(ListField):
                 location = util.to_posix(location)
                 location = add_unc(location)
 
-                if not os.path.exists(location):
+                if archive and archive.get_path(location) is not None:
+                    exists = archive.exists(location)
+                else:
+                    exists = os.path.exists(location)
+                if not exists:
                     # We don't want to show the UNC_PREFIX in the error message
                     location = util.to_posix(location.strip(UNC_PREFIX))
                     msg = (u'Field %(name)s: Path %(location)s not found'
                            % locals())
                     # We want to show INFO error for 'about_resource'
                     if name == u'about_resource':
-                        errors.append(Error(INFO, msg))
+                        errors.append(Error(INFO, msg, PATH_NOT_FOUND))
                     else:
-                        errors.append(Error(CRITICAL, msg))
+                        errors.append(Error(CRITICAL, msg, PATH_NOT_FOUND))
                     location = None
 
                 paths[path] = location
@@ -555,6 +641,8 @@ class AboutResourceField(PathField):
     the paths resolved relative to the about file path.
     """
 
+    __slots__ = ('resolved_paths',)
+
     def __init__(self, *args, ** kwargs):
         super(AboutResourceField, self).__init__(*args, ** kwargs)
         self.resolved_paths = []
@@ -571,6 +659,8 @@ class IgnoredResourcesField(PathField):
     by the ABOUT file.
     """
 
+    __slots__ = ('resolved_paths',)
+
     def __init__(self, *args, ** kwargs):
         super(AboutResourceField, self).__init__(*args, ** kwargs)
         self.resolved_paths = []
@@ -587,13 +677,21 @@ class FileTextField(PathField):
     location or text could not be loaded.
     """
 
+    __slots__ = ()
+
     def _validate(self, *args, **kwargs):
         """
         Load and validate the texts referenced by paths fields. Return a list
         of errors. base_dir is the directory used to resolve a file location
-        from a path.
+        from a path. With the "paths" load_profile, the files are opened but
+        not read and the value keeps their locations, or None for the files
+        that cannot be opened. The texts are shared
+        through the optional `text_store` TextStore of the run.
         """
         errors = super(FileTextField, self)._validate(*args, ** kwargs)
+        archive = kwargs.get('archive')
+        text_store = kwargs.get('text_store')
+        load_texts = kwargs.get('load_profile', 'texts') == 'texts'
         # a FileTextField is a PathField
         # self.value is a paths to location ordered dict
         # we will replace the location with the text content
@@ -607,8 +705,21 @@ class FileTextField(PathField):
             try:
                 # TODO: we have lots the location by replacing it with a text
                 location = add_unc(location)
-                with open(location, encoding='utf-8', errors='replace') as txt:
-                    text = txt.read()
+                in_archive = archive and archive.get_path(location) is not None
+                if not load_texts:
+                    # fail as reading the text would, without reading it
+                    if in_archive:
+                        archive.get_member(location)
+                    else:
+                        open(location, 'rb').close()
+                    continue
+                if text_store is not None:
+                    text = text_store.get_text(location, archive)
+                elif in_archive:
+                    text = archive.read_text(location)
+                else:
+                    with open(location, encoding='utf-8', errors='replace') as txt:
+                        text = txt.read()
                 self.value[path] = text
             except Exception as e:
                 # only keep the first 100 char of the exception
@@ -616,7 +727,9 @@ class FileTextField(PathField):
                 msg = (u'Field %(name)s: Failed to load text at path: '
                        u'%(path)s '
                        u'with error: %(emsg)s' % locals())
-                errors.append(Error(ERROR, msg))
+                errors.append(Error(ERROR, msg, FILE_TEXT_NOT_LOADED))
+                if not load_texts:
+                    self.value[path] = None
         # set or reset self
         self.errors = errors
         return errors
@@ -627,6 +740,8 @@ class BooleanField(SingleLineField):
     An flag field with a boolean value. Validated value is False, True or None.
     """
 
+    __slots__ = ('about_file_path',)
+
     def default_value(self):
         return None
 
@@ -649,12 +764,12 @@ class BooleanField(SingleLineField):
             flag_values = self.flag_values
             msg = (u'Path: %(about_file_path)s - Field %(name)s: Invalid flag value: %(val)r is not '
                    u'one of: %(flag_values)s' % locals())
-            errors.append(Error(ERROR, msg))
+            errors.append(Error(ERROR, msg, FIELD_INVALID))
             self.value = None
         elif flag is None:
             name = self.name
             msg = (u'Field %(name)s: field is present but empty. ' % locals())
-            errors.append(Error(INFO, msg))
+            errors.append(Error(INFO, msg, FIELD_EMPTY))
             self.value = None
         else:
             if flag == u'yes' or flag is True:
@@ -726,6 +841,8 @@ class BooleanAndTwoCharactersField(SingleLineField):
     characters). Validated value is False, True, None or character value.
     """
 
+    __slots__ = ('about_file_path',)
+
     def default_value(self):
         return None
 
@@ -749,12 +866,12 @@ class BooleanAndTwoCharactersField(SingleLineField):
             flag_values = self.flag_values
             msg = (u'Path: %(about_file_path)s - Field %(name)s: Invalid value: %(val)r is not '
                    u'one of: %(flag_values)s and it is not a 1 or 2 character value.' % locals())
-            errors.append(Error(ERROR, msg))
+            errors.append(Error(ERROR, msg, FIELD_INVALID))
             self.value = None
         elif flag is None:
             name = self.name
             msg = (u'Field %(name)s: field is present but empty. ' % locals())
-            errors.append(Error(INFO, msg))
+            errors.append(Error(INFO, msg, FIELD_EMPTY))
             self.value = None
         else:
             if flag == u'yes' or flag is True:
@@ -820,19 +937,34 @@ class BooleanAndTwoCharactersField(SingleLineField):
 
 
 def validate_fields(fields, about_file_path, running_inventory, base_dir,
-                    reference_dir=None):
+                    reference_dir=None, archive=None, load_profile='texts', lazy=False,
+                    text_store=None):
     """
     Validate a sequence of Field objects. Return a list of errors.
     Validation may update the Field objects as needed as a side effect.
+    The paths are checked in the optional `archive` if they are in it.
+    The referenced files are loaded according to `load_profile`, one of
+    LOAD_PROFILES, and their texts are shared through the optional
+    `text_store` TextStore.
+
+    If `lazy` is True, the validation of each field is deferred until its
+    value is first accessed and no error is returned.
     """
     errors = []
+    kwargs = dict(
+        base_dir=base_dir,
+        about_file_path=about_file_path,
+        running_inventory=running_inventory,
+        reference_dir=reference_dir,
+        archive=archive,
+        load_profile=load_profile,
+        text_store=text_store,
+    )
     for f in fields:
-        val_err = f.validate(
-            base_dir=base_dir,
-            about_file_path=about_file_path,
-            running_inventory=running_inventory,
-            reference_dir=reference_dir,
-        )
+        if lazy:
+            f.defer_validation(**kwargs)
+            continue
+        val_err = f.validate(**kwargs)
         errors.extend(val_err)
     return errors
 
@@ -841,7 +973,7 @@ def validate_field_name(name):
     if not is_valid_name(name):
         msg = ('Field name: %(name)r contains illegal name characters '
                '(or empty spaces) and is ignored.')
-        return Error(WARNING, msg % locals())
+        return Error(WARNING, msg % locals(), FIELD_NAME_INVALID)
 
 
 class License:
@@ -857,6 +989,72 @@ class License:
         self.text = text
 
 
+class CustomFieldRegistry(object):
+    """
+    A registry of the custom field names shared by the About objects of an
+    inventory run. For each field name, the checks of a custom field are
+    computed once per run instead of once per About. The valid custom fields
+    found in the run are reported once for the whole run.
+    """
+
+    def __init__(self):
+        # {original name: (interned lowercased name, is valid, is reserved)}
+        self.names = {}
+        # {original name of a custom field found in this run: None} used as an
+        # ordered set
+        self.found_names = {}
+
+    def get(self, orig_name):
+        """
+        Return a tuple of (interned lowercased name, is valid, is reserved) for
+        the custom field `orig_name`. A reserved name is the name of an About
+        class attribute that cannot be used for a field.
+        """
+        entry = self.names.get(orig_name)
+        if entry is None:
+            name = sys.intern(orig_name.lower())
+            entry = (
+                name,
+                bool(is_valid_name(name)),
+                name in About.reserved_names,
+            )
+            self.names[orig_name] = entry
+        return entry
+
+    def add_found(self, orig_name):
+        """
+        Record that the custom field `orig_name` was found in this run.
+        """
+        self.found_names[orig_name] = None
+
+    def get_found_error(self):
+        """
+        Return an INFO Error listing the custom fields found in this run or
+        None if no custom field was found.
+        """
+        if self.found_names:
+            custom_fields_list = list(self.found_names)
+            msg = 'Field ' + str(custom_fields_list) + ' is a custom field.'
+            return Error(INFO, msg, CUSTOM_FIELD)
+
+
+class StandardField(object):
+    """
+    A descriptor for the attribute access to the standard field `name` of an
+    About object. The fields are only stored in the About fields dict.
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, about, owner=None):
+        if about is None:
+            return self
+        return about.fields[self.name]
+
+
 class About(object):
     """
     Represent an ABOUT file and functions to parse and validate a file.
@@ -876,78 +1074,97 @@ class About(object):
     # Required fields
     required_fields = ['name']
 
+    # The names of the class attributes that cannot be used as custom field
+    # names, set once the class is created. The instance attributes are
+    # checked on each About.
+    reserved_names = frozenset()
+
     def get_required_fields(self):
         return [f for f in self.fields if f.required]
 
+    # The schema of the standard fields shared by all the About objects: a
+    # sequence of (name, Field class) tuples in the standard order.
+    standard_fields = (
+        ('about_resource', AboutResourceField),
+        ('ignored_resources', AboutResourceField),
+        ('name', SingleLineField),
+        ('version', SingleLineField),
+
+        ('download_url', UrlField),
+        ('description', StringField),
+        ('homepage_url', UrlField),
+        ('package_url', PackageUrlField),
+        ('notes', StringField),
+
+        ('license_expression', SingleLineField),
+        ('license_key', ListField),
+        ('license_name', ListField),
+        ('license_file', FileTextField),
+        ('license_url', UrlListField),
+        ('spdx_license_expression', SingleLineField),
+        ('spdx_license_key', ListField),
+        ('declared_license_expression', SingleLineField),
+        ('other_license_expression', SingleLineField),
+        ('copyright', StringField),
+        ('notice_file', FileTextField),
+        ('notice_url', UrlField),
+
+        ('redistribute', BooleanField),
+        ('attribute', BooleanAndTwoCharactersField),
+        ('track_changes', BooleanField),
+        ('modified', BooleanField),
+        ('internal_use_only', BooleanField),
+
+        ('changelog_file', FileTextField),
+
+        ('owner', StringField),
+        ('owner_url', UrlField),
+        ('contact', StringField),
+        ('author', StringField),
+        ('author_file', FileTextField),
+
+        ('vcs_tool', SingleLineField),
+        ('vcs_repository', SingleLineField),
+        ('vcs_path', SingleLineField),
+        ('vcs_tag', SingleLineField),
+        ('vcs_branch', SingleLineField),
+        ('vcs_revision', SingleLineField),
+
+        ('checksum_md5', SingleLineField),
+        ('checksum_sha1', SingleLineField),
+        ('checksum_sha256', SingleLineField),
+        ('spec_version', SingleLineField),
+    )
+
     def set_standard_fields(self):
         """
-        Create fields in an ordered dict to keep a standard ordering. We
-        could use a metaclass to track ordering django-like but this approach
-        is simpler.
-        """
-        self.fields = dict([
-            ('about_resource', AboutResourceField()),
-            ('ignored_resources', AboutResourceField()),
-            ('name', SingleLineField(required=True)),
-            ('version', SingleLineField()),
-
-            ('download_url', UrlField()),
-            ('description', StringField()),
-            ('homepage_url', UrlField()),
-            ('package_url', PackageUrlField()),
-            ('notes', StringField()),
-
-            ('license_expression', SingleLineField()),
-            ('license_key', ListField()),
-            ('license_name', ListField()),
-            ('license_file', FileTextField()),
-            ('license_url', UrlListField()),
-            ('spdx_license_expression', SingleLineField()),
-            ('spdx_license_key', ListField()),
-            ('declared_license_expression', SingleLineField()),
-            ('other_license_expression', SingleLineField()),
-            ('copyright', StringField()),
-            ('notice_file', FileTextField()),
-            ('notice_url', UrlField()),
-
-            ('redistribute', BooleanField()),
-            ('attribute', BooleanAndTwoCharactersField()),
-            ('track_changes', BooleanField()),
-            ('modified', BooleanField()),
-            ('internal_use_only', BooleanField()),
-
-            ('changelog_file', FileTextField()),
-
-            ('owner', StringField()),
-            ('owner_url', UrlField()),
-            ('contact', StringField()),
-            ('author', StringField()),
-            ('author_file', FileTextField()),
-
-            ('vcs_tool', SingleLineField()),
-            ('vcs_repository', SingleLineField()),
-            ('vcs_path', SingleLineField()),
-            ('vcs_tag', SingleLineField()),
-            ('vcs_branch', SingleLineField()),
-            ('vcs_revision', SingleLineField()),
-
-            ('checksum_md5', SingleLineField()),
-            ('checksum_sha1', SingleLineField()),
-            ('checksum_sha256', SingleLineField()),
-            ('spec_version', SingleLineField()),
-        ])
-
-        for name, field in self.fields.items():
-            # we could have a hack to get the actual field name
-            # but setting an attribute is explicit and cleaner
-            field.name = name
-            setattr(self, name, field)
-
-    def __init__(self, location=None, about_file_path=None, strict=False):
+        Create the standard fields in a dict keyed by name that keeps the
+        standard ordering of the schema. These fields are also accessed as
+        attributes through the StandardField descriptors of the About class.
+        """
+        required_fields = self.required_fields
+        self.fields = {
+            name: field_class(name=name, required=name in required_fields)
+            for name, field_class in self.standard_fields
+        }
+
+    def __init__(self, location=None, about_file_path=None, strict=False, archive=None,
+                 load_profile='texts', lazy=False, custom_field_registry=None,
+                 text_store=None):
         """
         Create an instance.
         If strict is True, raise an Exception on errors. Otherwise the errors
         attribute contains the errors.
+        The ABOUT file and the files it references are read from the optional
+        `archive` when their location is in this archive. The files referenced
+        by the file fields are loaded according to `load_profile`, one of
+        LOAD_PROFILES.
+        If `lazy` is True, each field is validated when its value is first
+        accessed and the errors attribute does not contain the validation
+        errors until validate_all() is called.
+        The optional `custom_field_registry` CustomFieldRegistry and
+        `text_store` TextStore are shared by the About objects of an inventory
+        run.
         """
         self.set_standard_fields()
         self.custom_fields = {}
@@ -960,10 +1177,13 @@ class About(object):
 
         # os native absolute location, using posix path separators
         self.location = location
+        self.archive = archive
+        self.load_profile = load_profile
+        self.lazy = lazy
         self.base_dir = None
         if self.location:
             self.base_dir = os.path.dirname(location)
-            self.errors.extend(self.load(location))
+            self.errors.extend(self.load(location, custom_field_registry, text_store))
             if strict and self.errors and filter_errors(self.errors):
                 msg = '\n'.join(map(str, self.errors))
                 raise Exception(msg)
@@ -998,12 +1218,16 @@ class About(object):
         data.update(non_empty)
         return data
 
-    def hydrate(self, fields):
+    def hydrate(self, fields, custom_field_registry=None):
         """
         Process an iterable of field (name, value) tuples. Update or create
         Fields attributes and the fields and custom fields dictionaries.
-        Return a list of errors.
+        Return a list of errors. The custom fields names are checked using the
+        optional `custom_field_registry` CustomFieldRegistry where the valid
+        custom fields are recorded as found.
         """
+        if custom_field_registry is None:
+            custom_field_registry = CustomFieldRegistry()
         errors = []
         seen_fields = {}
         illegal_name_list = []
@@ -1029,7 +1253,7 @@ class About(object):
                     msg = (u'Field %(orig_name)s is a duplicate. '
                            u'Original value: "%(previous_value)s" '
                            u'replaced with: "%(value)s"')
-                    errors.append(Error(WARNING, msg % locals()))
+                    errors.append(Error(WARNING, msg % locals(), FIELD_DUPLICATED))
                     continue
 
             seen_fields[name] = value
@@ -1044,13 +1268,13 @@ class About(object):
 
             # A custom field
             # is the name valid?
-            if not is_valid_name(name):
+            name, is_valid, is_reserved = custom_field_registry.get(orig_name)
+            if not is_valid:
                 if not name in illegal_name_list:
                     illegal_name_list.append(name)
                 continue
 
-            msg = 'Custom Field: %(orig_name)s'
-            errors.append(Error(INFO, msg % locals()))
+            custom_field_registry.add_found(orig_name)
             # is this a known one?
             custom_field = self.custom_fields.get(name)
             if custom_field:
@@ -1064,7 +1288,7 @@ class About(object):
                 self.custom_fields[name] = custom_field
                 # FIXME: why would this ever fail???
                 try:
-                    if name in dir(self):
+                    if is_reserved or name in self.__dict__:
                         raise Exception(
                             'Illegal field: %(name)r: %(value)r.' % locals())
                     setattr(self, name, custom_field)
@@ -1075,25 +1299,34 @@ class About(object):
         if illegal_name_list:
             msg = ('Field name: %(illegal_name_list)r contains illegal name characters '
                    '(or empty spaces) and is ignored.')
-            errors.append(Error(WARNING, msg % locals()))
+            errors.append(Error(WARNING, msg % locals(), FIELD_NAME_INVALID))
         return errors
 
     def process(self, fields, about_file_path, running_inventory=False,
-                base_dir=None, scancode=False, from_attrib=False, reference_dir=None):
+                base_dir=None, scancode=False, from_attrib=False, reference_dir=None,
+                copy_strategy='copy', copied_references=None, custom_field_registry=None,
+                text_store=None):
         """
         Validate and set as attributes on this About object a sequence of
         `fields` name/value tuples. Return a list of errors.
+
+        The reference files from `reference_dir` are copied using
+        `copy_strategy` and the optional `copied_references` set of the
+        reference files already copied in this run. The custom fields are
+        checked with the optional `custom_field_registry` of this run and the
+        texts are shared through its optional `text_store`.
         """
         self.base_dir = base_dir
         self.reference_dir = reference_dir
         afp = self.about_file_path
 
-        errors = self.hydrate(fields)
+        errors = self.hydrate(fields, custom_field_registry)
 
         # We want to copy the license_files before the validation
         if reference_dir and not from_attrib:
             copy_err = copy_license_notice_files(
-                fields, base_dir, reference_dir, afp)
+                fields, base_dir, reference_dir, afp,
+                copy_strategy, copied_references)
             errors.extend(copy_err)
 
         # TODO: why? we validate all fields, not only these hydrated
@@ -1107,14 +1340,38 @@ class About(object):
                 about_file_path,
                 running_inventory,
                 self.base_dir,
-                self.reference_dir)
+                self.reference_dir,
+                self.archive,
+                self.load_profile,
+                self.lazy,
+                text_store)
             errors.extend(validation_errors)
         return errors
 
-    def load(self, location):
+    def validate_all(self):
+        """
+        Validate the fields whose validation is deferred. Return a list of the
+        validation errors of all the fields, as a non-lazy About would have
+        collected them. The errors of a lazy About are added to its errors
+        attribute once and this About is then no longer lazy.
+        """
+        errors = []
+        for field in self.all_fields():
+            if field.pending_validation is not None:
+                field.validate(**field.pending_validation)
+            errors.extend(field.errors)
+        if self.lazy:
+            self.errors.extend(errors)
+            self.lazy = False
+        return errors
+
+    def load(self, location, custom_field_registry=None, text_store=None):
         """
         Read, parse and process the ABOUT file at `location`.
         Return a list of errors and update self with errors.
+        The custom fields are checked with the optional
+        `custom_field_registry` CustomFieldRegistry and the texts are shared
+        through the optional `text_store` TextStore.
         """
         self.location = location
         loc = util.to_posix(location)
@@ -1122,21 +1379,16 @@ class About(object):
         errors = []
         try:
             loc = add_unc(loc)
-            with open(loc, encoding='utf-8', errors='replace') as txt:
-                input_text = txt.read()
+            if self.archive and self.archive.get_path(loc) is not None:
+                input_text = self.archive.read_text(loc)
+            else:
+                with open(loc, encoding='utf-8', errors='replace') as txt:
+                    input_text = txt.read()
             if not input_text:
                 msg = 'ABOUT file is empty: %(location)r'
-                errors.append(Error(CRITICAL, msg % locals()))
+                errors.append(Error(CRITICAL, msg % locals(), ABOUT_FILE_INVALID))
                 self.errors = errors
                 return errors
-            # The 'Yes' and 'No' will be converted to 'True' and 'False' in the yaml.load()
-            # Therefore, we need to wrap the original value in quote to prevent
-            # the conversion
-            pre_input = wrap_boolean_value(input_text)
-            # saneyaml.load() will have parsing error if the input has
-            # tab value. Therefore, we should check if the input contains
-            # any tab and then convert it to spaces.
-            input = replace_tab_with_spaces(pre_input)
             # FIXME: this should be done in the commands, not here
             """
             The running_inventory defines if the current process is 'inventory' or not.
@@ -1148,9 +1400,13 @@ class About(object):
             and then join with the 'about_resource'
             """
             running_inventory = True
-            data = saneyaml.load(input, allow_duplicate_keys=False)
+            # The common ABOUT files are parsed with a fast parser and the
+            # others with saneyaml. The 'Yes' and 'No' values of the boolean
+            # fields are kept as strings and the tabs are converted to spaces.
+            data = load_about_text(input_text)
             errs = self.load_dict(
-                data, base_dir, running_inventory=running_inventory)
+                data, base_dir, running_inventory=running_inventory,
+                custom_field_registry=custom_field_registry, text_store=text_store)
             errors.extend(errs)
         except Exception as e:
             # The trace is good for debugging, but probably not good for user to
@@ -1158,7 +1414,7 @@ class About(object):
             # trace = traceback.format_exc()
             # msg = 'Cannot load invalid ABOUT file: %(location)r: %(e)r\n%(trace)s'
             msg = 'Cannot load invalid ABOUT file: %(location)r: %(e)r'
-            errors.append(Error(CRITICAL, msg % locals()))
+            errors.append(Error(CRITICAL, msg % locals(), ABOUT_FILE_INVALID))
 
         self.errors = errors
         return errors
@@ -1166,7 +1422,9 @@ class About(object):
     # FIXME: should be a from_dict class factory instead
     # FIXME: running_inventory: remove this : this should be done in the commands, not here
 
-    def load_dict(self, fields_dict, base_dir, scancode=False, from_attrib=False, running_inventory=False, reference_dir=None,):
+    def load_dict(self, fields_dict, base_dir, scancode=False, from_attrib=False, running_inventory=False, reference_dir=None,
+                  copy_strategy='copy', copied_references=None, custom_field_registry=None,
+                  text_store=None):
         """
         Load this About object file from a `fields_dict` name/value dict.
         Return a list of errors.
@@ -1257,6 +1515,10 @@ class About(object):
             scancode=scancode,
             from_attrib=from_attrib,
             reference_dir=reference_dir,
+            copy_strategy=copy_strategy,
+            copied_references=copied_references,
+            custom_field_registry=custom_field_registry,
+            text_store=text_store,
         )
         self.errors = errors
         return errors
@@ -1413,17 +1675,18 @@ class About(object):
         for lic_dict in lic_dict_list:
             data.setdefault('licenses', []).append(lic_dict)
 
-        return saneyaml.dump(data)
+        return yaml_backend.dump(data)
 
-    def dump(self, location, lic_dict=None):
+    def dump(self, location, lic_dict=None, created_dirs=None, skip_unchanged=False, atomic=False):
         """
         Write formatted ABOUT representation of self to location.
+        `created_dirs` is an optional set of the directories already created in
+        this run. Return True if the file was written or False if it was
+        skipped because `skip_unchanged` is True and its content is unchanged.
+        Write to a temporary file then rename it if `atomic` is True.
         """
         loc = util.to_posix(location)
-        parent = posixpath.dirname(loc)
-
-        if not posixpath.exists(parent):
-            os.makedirs(add_unc(parent))
+        parent = util.create_parent_dir(loc, created_dirs)
 
         about_file_path = loc
         if not about_file_path.endswith('.ABOUT'):
@@ -1436,9 +1699,12 @@ class About(object):
         if on_windows:
             about_file_path = add_unc(about_file_path)
 
-        with open(about_file_path, mode='w', encoding='utf-8', errors='replace') as dumped:
-            dumped.write(genereated_tk_version)
-            dumped.write(self.dumps(lic_dict))
+        return util.write_text(
+            about_file_path,
+            genereated_tk_version + self.dumps(lic_dict),
+            skip_unchanged=skip_unchanged,
+            atomic=atomic,
+        )
 
     def dump_android_notice(self, path, context):
         """
@@ -1489,19 +1755,25 @@ class About(object):
                     notice_context += '\n\n' + lic_file_dict[key] + '\n\n'
         return notice_path, notice_context
 
-    def dump_lic(self, location, license_dict):
+    def dump_lic(self, location, license_dict, created_dirs=None, skip_unchanged=False, atomic=False,
+                 license_dir=None, license_reference='path'):
         """
         Write LICENSE files and return the a list of key, name, context and the url
-        as these information are needed for the ABOUT file
+        as these information are needed for the ABOUT file.
+        `created_dirs` is an optional set of the directories already created in
+        this run. Do not rewrite unchanged LICENSE files if `skip_unchanged` is
+        True and write them atomically if `atomic` is True.
+
+        If `license_dir` is provided, it is a directory where the license files
+        were already written once for all and that are referenced according to
+        `license_reference` (one of LICENSE_REFERENCES) instead of writing a
+        copy of the license files.
         """
         license_name = license_context = license_url = ''
         loc = util.to_posix(location)
-        parent = posixpath.dirname(loc)
+        parent = util.create_parent_dir(loc, created_dirs)
         license_key_name_context_url = []
 
-        if not posixpath.exists(parent):
-            os.makedirs(add_unc(parent))
-
         licenses_list = []
         if self.license_expression.present:
             special_char_in_expression, lic_list, invalid_lic_exp = parse_license_expression(
@@ -1539,11 +1811,31 @@ class About(object):
                     license_path = add_unc(license_path)
                     license_name, license_filename, license_context, license_url, spdx_license_key = license_dict[
                         lic_key]
+                    if not license_dir:
+                        util.write_text(
+                            license_path,
+                            license_context,
+                            newline='\n',
+                            skip_unchanged=skip_unchanged,
+                            atomic=atomic,
+                        )
+                    else:
+                        shared_path = posixpath.join(
+                            util.to_posix(license_dir), license_filename)
+                        if license_reference == 'path':
+                            # Reference the shared license file directly
+                            license_filename = posixpath.relpath(
+                                shared_path, parent)
+                        else:
+                            util.link_file(
+                                add_unc(shared_path),
+                                license_path,
+                                symbolic=license_reference == 'symlink',
+                                skip_unchanged=skip_unchanged,
+                            )
                     license_info = (lic_key, license_name, license_filename,
                                     license_context, license_url, spdx_license_key)
                     license_key_name_context_url.append(license_info)
-                    with open(license_path, mode='w', encoding='utf-8', newline='\n', errors='replace') as lic:
-                        lic.write(license_context)
                 else:
                     # Invalid license issue is already handled
                     license_info = (lic_key, license_name, license_filename,
@@ -1553,38 +1845,223 @@ class About(object):
         return license_key_name_context_url
 
 
-def collect_inventory(location):
+for _name, _field_class in About.standard_fields:
+    setattr(About, _name, StandardField(_name))
+del _name, _field_class
+About.reserved_names = frozenset(dir(About))
+
+
+def load_archive_texts(abouts, archive, text_store):
+    """
+    Load the texts of the file fields of the `abouts` About objects loaded
+    with the "paths" load_profile from the files of `archive`, reading all
+    these files together. The texts are shared through the `text_store`
+    TextStore and the errors are added to the About errors.
+    """
+    fields_by_about = [
+        (about, [field for field in about.all_fields()
+                 if isinstance(field, FileTextField) and field.value])
+        for about in abouts]
+    archive.preload_texts(
+        location
+        for _about, fields in fields_by_about
+        for field in fields
+        for location in field.value.values() if location)
+
+    for about, fields in fields_by_about:
+        for field in fields:
+            name = field.name
+            for path, location in field.value.items():
+                if not location:
+                    continue
+                try:
+                    field.value[path] = text_store.get_text(add_unc(location), archive)
+                except Exception as e:
+                    # only keep the first 100 char of the exception
+                    emsg = repr(e)[:100]
+                    msg = (u'Field %(name)s: Failed to load text at path: '
+                           u'%(path)s '
+                           u'with error: %(emsg)s' % locals())
+                    error = Error(ERROR, msg, FILE_TEXT_NOT_LOADED)
+                    field.errors.append(error)
+                    about.errors.append(error)
+        about.load_profile = 'texts'
+
+
+def collect_inventory(location, archive=None, load_profile='texts', text_store=None):
     """
     Collect ABOUT files at location and return a list of errors and a list of
     About objects.
+
+    If an `archive` is provided, collect the ABOUT files of this archive
+    without extracting it instead: `location` is the archive location.
+
+    The files referenced by the file fields are loaded according to
+    `load_profile`, one of LOAD_PROFILES. Their texts are read once and shared
+    through the `text_store` TextStore, a new one if not provided.
     """
     errors = []
-    input_location = util.get_absolute(location)
-    about_locations = list(util.get_about_locations(input_location))
+    if text_store is None:
+        text_store = TextStore()
+    if archive:
+        input_location = archive.root
+        about_locations = archive.get_about_locations()
+    else:
+        input_location = util.get_absolute(location)
+        about_locations = list(util.get_about_locations(input_location))
 
     name_errors = util.check_file_names(about_locations)
     errors.extend(name_errors)
     abouts = []
-    custom_fields_list = []
+    custom_field_registry = CustomFieldRegistry()
+    # the texts of an archive are loaded together once its ABOUT files are read
+    defer_texts = archive is not None and load_profile == 'texts'
     for about_loc in about_locations:
         about_file_path = util.get_relative_path(input_location, about_loc)
-        about = About(about_loc, about_file_path)
-        for severity, message in about.errors:
-            if 'Custom Field' in message:
-                field_name = message.replace('Custom Field: ', '').strip()
-                if not field_name in custom_fields_list:
-                    custom_fields_list.append(field_name)
-            else:
-                msg = (about_file_path + ": " + message)
-                errors.append(Error(severity, msg))
+        about = About(about_loc, about_file_path, archive=archive,
+                      load_profile='paths' if defer_texts else load_profile,
+                      custom_field_registry=custom_field_registry,
+                      text_store=text_store)
         abouts.append(about)
-    if custom_fields_list:
-        custom_fields_err_msg = 'Field ' + \
-            str(custom_fields_list) + ' is a custom field.'
-        errors.append(Error(INFO, custom_fields_err_msg))
+
+    if defer_texts:
+        load_archive_texts(abouts, archive, text_store)
+
+    for about in abouts:
+        for error in about.errors:
+            msg = (about.about_file_path + ": " + error.message)
+            errors.append(Error(error.severity, msg, error.code))
+    custom_fields_error = custom_field_registry.get_found_error()
+    if custom_fields_error:
+        errors.append(custom_fields_error)
     return errors, abouts
 
 
+# Magic and version of the binary snapshot format. Bump SNAPSHOT_VERSION on any
+# change of the snapshot layout.
+SNAPSHOT_MAGIC = b'ABOUTCODE-SNAPSHOT'
+SNAPSHOT_VERSION = 2
+
+
+def errors_to_snapshot_state(errors):
+    """
+    Return a marshal-able tuple of (severity, message, code) tuples for
+    `errors`.
+    """
+    return tuple((e.severity, e.message, e.code) for e in errors)
+
+
+def errors_from_snapshot_state(state):
+    """
+    Return a list of Error objects rebuilt from a snapshot `state` tuple.
+    """
+    errors = []
+    for severity, message, code in state:
+        error = Error._make((severity, message))
+        if code:
+            error.code = code
+        errors.append(error)
+    return errors
+
+
+def about_to_snapshot_state(about):
+    """
+    Return a marshal-able tuple of the state of a validated `about` About.
+    Only the standard fields that are present or have errors are kept: the
+    others have the default state of a new About.
+    """
+    intern = sys.intern
+    standard_fields = tuple(
+        (intern(f.name), f.original_value, f.value, f.present,
+         errors_to_snapshot_state(f.errors))
+        for f in about.fields.values() if f.present or f.errors)
+    custom_fields = tuple(
+        (intern(f.name), f.original_value, f.value, f.present,
+         errors_to_snapshot_state(f.errors))
+        for f in about.custom_fields.values())
+    return (
+        about.about_file_path,
+        about.location,
+        about.base_dir,
+        getattr(about, 'reference_dir', None),
+        errors_to_snapshot_state(about.errors),
+        standard_fields,
+        custom_fields,
+    )
+
+
+def about_from_snapshot_state(state):
+    """
+    Return a new About object rebuilt from a snapshot `state` tuple.
+    """
+    (about_file_path, location, base_dir, reference_dir, errors,
+     standard_fields, custom_fields) = state
+    about = About(about_file_path=about_file_path)
+    about.location = location
+    about.base_dir = base_dir
+    about.reference_dir = reference_dir
+    about.errors = errors_from_snapshot_state(errors)
+
+    for name, original_value, value, present, field_errors in standard_fields:
+        field = about.fields[name]
+        field.original_value = original_value
+        field.value = value
+        field.present = present
+        field.errors = errors_from_snapshot_state(field_errors)
+
+    for name, original_value, value, present, field_errors in custom_fields:
+        field = Field(name=name, value=original_value, present=present)
+        field.value = value
+        field.errors = errors_from_snapshot_state(field_errors)
+        about.custom_fields[name] = field
+        setattr(about, name, field)
+    return about
+
+
+def save_snapshot(location, input_location, errors, abouts):
+    """
+    Save a binary snapshot at `location` of the `errors` list and `abouts` list
+    of validated About objects collected from `input_location`.
+    """
+    data = (
+        __version__,
+        input_location,
+        errors_to_snapshot_state(errors),
+        tuple(about_to_snapshot_state(a) for a in abouts),
+    )
+    with open(add_unc(location), 'wb') as snapshot:
+        snapshot.write(SNAPSHOT_MAGIC)
+        snapshot.write(SNAPSHOT_VERSION.to_bytes(2, 'big'))
+        marshal.dump(data, snapshot)
+
+
+def load_snapshot(location):
+    """
+    Load the binary snapshot at `location` created with save_snapshot().
+    Return a tuple of (input location, list of errors, list of About objects).
+    """
+    with open(add_unc(location), 'rb') as snapshot:
+        magic = snapshot.read(len(SNAPSHOT_MAGIC))
+        version = int.from_bytes(snapshot.read(2), 'big')
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            msg = 'Invalid or unsupported snapshot file: %(location)r' % locals()
+            return None, [Error(CRITICAL, msg)], []
+        try:
+            tk_version, input_location, errors, states = marshal.load(snapshot)
+        except (EOFError, ValueError, TypeError) as e:
+            msg = 'Cannot load invalid snapshot file: %(location)r: %(e)r' % locals()
+            return None, [Error(CRITICAL, msg)], []
+
+    if tk_version != __version__:
+        msg = ('Snapshot file: %(location)r was created with another '
+               'AboutCode Toolkit version: %(tk_version)s' % locals())
+        return None, [Error(CRITICAL, msg)], []
+
+    errors = errors_from_snapshot_state(errors)
+    abouts = [about_from_snapshot_state(s) for s in states]
+    return input_location, errors, abouts
+
+
 def collect_abouts_license_expression(location):
     """
     Read the ABOUT files at location and return a list of ABOUT objects without
@@ -1595,6 +2072,7 @@ def collect_abouts_license_expression(location):
     input_location = util.get_absolute(location)
     about_locations = list(util.get_about_locations(input_location))
     abouts = []
+    custom_field_registry = CustomFieldRegistry()
 
     for loc in about_locations:
         try:
@@ -1605,9 +2083,11 @@ def collect_abouts_license_expression(location):
             # tab value. Therefore, we should check if the input contains
             # any tab and then convert it to spaces.
             input = replace_tab_with_spaces(input_text)
-            data = saneyaml.load(input, allow_duplicate_keys=False)
-            about = About()
-            about.load_dict(data, base_dir='')
+            data = yaml_backend.load(input, allow_duplicate_keys=False)
+            # only the fields used to fetch the licenses are validated
+            about = About(lazy=True)
+            about.load_dict(
+                data, base_dir='', custom_field_registry=custom_field_registry)
             abouts.append(about)
         except Exception as e:
             trace = traceback.format_exc()
@@ -1637,17 +2117,24 @@ def collect_inventory_license_expression(location, scancode=False, worksheet=Non
             inventory = gen.load_csv(location)
         elif location.endswith('.xlsx'):
             _dup_cols_err, inventory = gen.load_excel(location, worksheet)
+        elif location.endswith('.jsonl'):
+            inventory = gen.load_jsonl(location)
         else:
             inventory = gen.load_json(location)
-        # Check if 'license_expression' field is in the input
-        if not inventory or not 'license_expression' in inventory[0]:
+        # Check if 'license_expression' field is in the input, reading ahead
+        # only the first row of the streamed JSON Lines rows
+        first_row, inventory = util.peek(inventory)
+        if not first_row or not 'license_expression' in first_row:
             errors.append(
                 Error(CRITICAL, "No 'license_expression' field in the input."))
             return errors, abouts
 
+    custom_field_registry = CustomFieldRegistry()
     for data in inventory:
-        about = About()
-        about.load_dict(data, base_dir='', scancode=scancode)
+        # only the fields used to fetch the licenses are validated
+        about = About(lazy=True)
+        about.load_dict(data, base_dir='', scancode=scancode,
+                        custom_field_registry=custom_field_registry)
         abouts.append(about)
     return errors, abouts
 
@@ -1692,11 +2179,13 @@ def get_field_names(abouts):
     return fields
 
 
-def copy_redist_src(copy_list, location, output, with_structure):
+def get_redist_copies(copy_list, location, output, with_structure):
     """
-    Given a list of files/directories and copy to the destination
+    Return a list of (source path, target directory) tuples for a `copy_list`
+    of files/directories from `location` copied to `output`, keeping their
+    directory structure if `with_structure` is True.
     """
-    errors = []
+    copies = []
     for from_path in copy_list:
         norm_from_path = norm(from_path)
         relative_from_path = norm_from_path.partition(util.norm(location))[2]
@@ -1709,13 +2198,97 @@ def copy_redist_src(copy_list, location, output, with_structure):
                 output, util.norm(relative_from_path)))
         else:
             output_dir = output
-        err = copy_file(from_path, output_dir)
-        if err:
-            errors.extend(err)
-    return errors
+        copies.append((from_path, output_dir))
+    return copies
+
+
+def copy_redist_src(copy_list, location, output, with_structure, threads=1, preserve_metadata=True, stats=None):
+    """
+    Given a list of files/directories and copy to the destination
+    using a pool of `threads` threads. Copy the files permissions and times if
+    `preserve_metadata` is True. If provided, the `stats` dict is updated with
+    the count of copied "files" and "bytes" and the "seconds" spent.
+    """
+    copies = get_redist_copies(copy_list, location, output, with_structure)
+    return copier.copy_files(copies, threads, preserve_metadata, stats)
 
 
-def get_copy_list(abouts, location):
+def sync_redist_src(copy_list, location, output, with_structure, threads=1, preserve_metadata=True, checksum=False, delete=False, stats=None):
+    """
+    Given a list of files/directories, sync them to the destination copying
+    only the files that changed since the last sync using a pool of `threads`
+    threads. Compare the files with their sha1 if `checksum` is True. Delete the
+    files of the last sync that are no longer listed if `delete` is True. If
+    provided, the `stats` dict is updated with the count of copied "files" and
+    "bytes", of "unchanged" and "deleted" files and the "seconds" spent.
+    """
+    copies = get_redist_copies(copy_list, location, output, with_structure)
+    return copier.sync_files(
+        copies, output, threads, preserve_metadata, checksum, delete, stats)
+
+
+def zip_redist_src(copy_list, location, output, with_structure, threads=1, stats=None):
+    """
+    Given a list of files/directories, write them directly in a new zip file at
+    `output` reading the files with a pool of `threads` threads. If provided,
+    the `stats` dict is updated with the count of archived "files" and "bytes"
+    and the "seconds" spent.
+    """
+    copies = get_redist_copies(copy_list, location, '', with_structure)
+    return copier.zip_files(copies, output, threads, stats)
+
+
+def get_copy_plan(resources):
+    """
+    Return a list of the relative POSIX paths to copy given a `resources`
+    iterable of (relative POSIX path, is directory) tuples. This is the minimal
+    list of paths such that no path is inside a directory of the list: the
+    descendants of a directory to copy are not included as they are copied with
+    this directory. Duplicated paths are removed and the order is kept.
+
+    All the directories are first inserted in a trie of path segments where the
+    selected directories are marked. The paths are then kept only if none of
+    their ancestor directories is marked. This is linear with the total number
+    of path segments.
+    """
+    resources = [([seg for seg in path.split('/') if seg], path, is_dir)
+                 for path, is_dir in resources]
+
+    # A trie node is a {segment: child node} dict, and the `selected` key is
+    # set for a directory to copy
+    selected = None
+    trie = {}
+    for segments, _path, is_dir in resources:
+        if is_dir:
+            node = trie
+            for segment in segments:
+                node = node.setdefault(segment, {})
+            node[selected] = True
+
+    plan = []
+    planned = set()
+    for segments, path, is_dir in resources:
+        # check the ancestors from the root, but not the path itself
+        node = trie
+        covered = False
+        for segment in segments:
+            if selected in node:
+                covered = True
+                break
+            node = node.get(segment)
+            if node is None:
+                break
+        if covered:
+            continue
+        key = '/'.join(segments)
+        if key in planned:
+            continue
+        planned.add(key)
+        plan.append(path)
+    return plan
+
+
+def get_copy_list(abouts, location, archive=None):
     """
     Return a list of files/directories that need to be copied (and error if any)
     This is a summary list in a sense that if a directory is already in the list,
@@ -1727,11 +2300,13 @@ def get_copy_list(abouts, location):
     it will prompt warning as the directory that need to be copied is already exist.
     Technically, this is correct, but it leads to confusion. Therefore, we want to
     create a summarized list to avoid this kind of confusion.
+
+    The paths are checked in the optional `archive` if they are in it.
     """
     errors = []
-    copy_list = []
-    dir_list = []
-    file_list = []
+    resources = []
+    isdir = archive.isdir if archive else os.path.isdir
+    norm_location = util.norm(location)
     for about in abouts:
         if about.redistribute.value:
             file_exist = True
@@ -1750,51 +2325,13 @@ def get_copy_list(abouts, location):
                         norm_from_path = os.path.normpath(from_path)
                     # Get the relative path
                     relative_from_path = norm_from_path.partition(
-                        util.norm(location))[2]
-                    if os.path.isdir(from_path):
-                        if not dir_list:
-                            dir_list.append(relative_from_path)
-                        else:
-                            handled = False
-                            for dir in dir_list:
-                                # The dir is a parent of the relative_from_path
-                                if dir in relative_from_path:
-                                    handled = True
-                                    continue
-                                # The relative_from_path is the parent of the dir
-                                # We need to update the dir_list
-                                if relative_from_path in dir:
-                                    dir_list.remove(dir)
-                                    dir_list.append(relative_from_path)
-                                    handled = True
-                                    continue
-                            if not handled:
-                                dir_list.append(relative_from_path)
-                    else:
-                        # Check if the file is from "root"
-                        # If the file is at root level, it'll add to the copy_list
-                        if not os.path.dirname(relative_from_path) == '/':
-                            file_list.append(relative_from_path)
-                        else:
-                            copy_list.append(from_path)
+                        norm_location)[2]
+                    resources.append(
+                        (util.to_posix(relative_from_path), isdir(from_path)))
 
-    for dir in dir_list:
-        for f in file_list:
-            # The file is already in one of copied directories
-            if dir in f:
-                file_list.remove(f)
-                continue
-        if dir.startswith('/'):
-            dir = dir.partition('/')[2]
-        absolute_path = os.path.join(location, dir)
-        if on_windows:
-            absolute_path = add_unc(absolute_path)
-        copy_list.append(absolute_path)
-
-    for f in file_list:
-        if f.startswith('/'):
-            f = f.partition('/')[2]
-        absolute_path = os.path.join(location, f)
+    copy_list = []
+    for path in get_copy_plan(resources):
+        absolute_path = os.path.join(location, path.lstrip('/'))
         if on_windows:
             absolute_path = add_unc(absolute_path)
         copy_list.append(absolute_path)
@@ -1845,11 +2382,22 @@ def about_object_to_list_of_dictionary(abouts):
 
 def write_output(abouts, location, format):  # NOQA
     """
-    Write a CSV/JSON file at location given a list of About objects.
+    Write a CSV/JSON/JSONL/XLSX file or a SQLite database at location given a
+    list of About objects.
     Return a list of Error objects.
     """
-    about_dicts = about_object_to_list_of_dictionary(abouts)
     location = add_unc(location)
+    if format in ('jsonl', 'sqlite'):
+        # serialize and write one About at a time
+        about_dicts = (about_object_to_list_of_dictionary([about])[0]
+                       for about in abouts)
+        if format == 'jsonl':
+            save_as_jsonl(location, about_dicts)
+        else:
+            save_as_sqlite(location, about_dicts)
+        return
+
+    about_dicts = about_object_to_list_of_dictionary(abouts)
     if format == 'csv':
         save_as_csv(location, about_dicts, get_field_names(abouts))
     elif format == 'json':
@@ -1864,6 +2412,29 @@ def save_as_json(location, about_dicts):
         output_file.write(json.dumps(data, indent=2))
 
 
+def save_as_jsonl(location, about_dicts):
+    """
+    Write the `about_dicts` iterable as JSON Lines at `location`, one ABOUT
+    record per line.
+    """
+    with open(location, mode='w', encoding='utf-8') as output_file:
+        for about_dict in about_dicts:
+            data = util.format_about_dict_for_json_output([about_dict])[0]
+            output_file.write(json.dumps(data))
+            output_file.write('\n')
+
+
+def save_as_sqlite(location, about_dicts):
+    """
+    Write the `about_dicts` iterable as a new SQLite inventory database at
+    `location` using the inventory_db schema, one component per ABOUT record.
+    """
+    records = (util.format_about_dict_for_json_output([about_dict])[0]
+               for about_dict in about_dicts)
+    standard_fields = list(About().fields.keys())
+    inventory_db.save_as_sqlite(location, records, standard_fields)
+
+
 def save_as_csv(location, about_dicts, field_names):
     with open(location, mode='w', encoding='utf-8', newline='', errors='replace') as output_file:
         writer = csv.DictWriter(output_file, field_names)
@@ -1885,7 +2456,7 @@ def pre_process_and_fetch_license_dict(abouts, from_check=False, api_url=None, a
     """
     key_text_dict = {}
     captured_license = []
-    errors = []
+    errors = ErrorCollector()
     if api_url:
         dje_uri = urlparse(api_url)
         domain = '{uri.scheme}://{uri.netloc}/'.format(uri=dje_uri)
@@ -1902,14 +2473,12 @@ def pre_process_and_fetch_license_dict(abouts, from_check=False, api_url=None, a
         errors.append(Error(ERROR, msg))
 
     if errors:
-        return key_text_dict, errors
+        return key_text_dict, errors.to_list()
 
     spdx_sclickey_dict = get_spdx_key_and_lic_key_from_licdb()
     for about in abouts:
         # No need to go through all the about objects if '--api_key' is invalid
-        auth_error = Error(
-            ERROR, u"Authorization denied. Invalid '--api_key'. License generation is skipped.")
-        if auth_error in errors:
+        if errors.has_code(API_AUTHORIZATION_DENIED):
             break
 
         if scancode:
@@ -2045,10 +2614,10 @@ def pre_process_and_fetch_license_dict(abouts, from_check=False, api_url=None, a
                             _, msg = errs[0]
                             if msg == "Invalid '--api_url'. License generation is skipped.":
                                 errors.extend(errs)
-                                return key_text_dict, errors
-                        for severity, message in errs:
-                            msg = (afp + ": " + message)
-                            errors.append(Error(severity, msg))
+                                return key_text_dict, errors.to_list()
+                        for err in errs:
+                            msg = (afp + ": " + err.message)
+                            errors.append(Error(err.severity, msg, err.code))
                         # We don't want to actually get the license information from the
                         # check utility
                         if from_check:
@@ -2097,7 +2666,7 @@ def pre_process_and_fetch_license_dict(abouts, from_check=False, api_url=None, a
                         detail_list.append(lic_url)
                         detail_list.append(spdx_license_key)
                         key_text_dict[lic_key] = detail_list
-    return key_text_dict, errors
+    return key_text_dict, errors.to_list()
 
 
 def convert_spdx_expression_to_lic_expression(spdx_key, spdx_lic_dict):
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+"""
+A store of the license, notice and other texts referenced by the ABOUT files
+of an inventory run.
+
+The same few license and notice files are typically referenced by many ABOUT
+files. The store reads each distinct file location once and keeps a single
+copy of each distinct text, keyed by the SHA1 of its content, such that all
+the About objects referencing the same text share the same immutable string.
+"""
+
+import hashlib
+
+from attributecode.util import add_unc
+
+
+class TextStore(object):
+    """
+    A per-run store of the texts of files. The `stats` dict tracks:
+     - "files": the count of distinct file locations read,
+     - "texts": the count of distinct texts kept,
+     - "references": the count of texts handed out,
+     - "bytes_saved": the size of the texts shared instead of being copied.
+    """
+
+    def __init__(self):
+        # {location: (text, size in bytes)}
+        self.locations = {}
+        # {SHA1 of a text: text}
+        self.texts = {}
+        self.stats = dict(files=0, texts=0, references=0, bytes_saved=0)
+
+    def get_text(self, location, archive=None):
+        """
+        Return the text of the file at `location` decoded as UTF-8, reading it
+        from the optional `archive` when its location is in this archive. Read
+        each location once and return the same string for the same content.
+        Raise an Exception if the file cannot be read.
+        """
+        stats = self.stats
+        entry = self.locations.get(location)
+        if entry is None:
+            if archive and archive.get_path(location) is not None:
+                text = archive.read_text(location)
+            else:
+                with open(add_unc(location), encoding='utf-8', errors='replace') as txt:
+                    text = txt.read()
+            stats['files'] += 1
+            content = text.encode('utf-8')
+            digest = hashlib.sha1(content).digest()
+            shared = self.texts.setdefault(digest, text)
+            if shared is text:
+                stats['texts'] += 1
+            else:
+                stats['bytes_saved'] += len(content)
+            entry = self.locations[location] = (shared, len(content))
+        else:
+            stats['bytes_saved'] += entry[1]
+        stats['references'] += 1
+        return entry[0]
+
+    def format_stats(self):
+        """
+        Return a message reporting the store stats.
+        """
+        return ('{references} license and notice texts loaded from {files} files '
+                'as {texts} distinct texts, {bytes_saved} bytes shared.'
+                .format(**self.stats))
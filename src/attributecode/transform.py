@@ -24,6 +24,7 @@ from attributecode import CRITICAL
 from attributecode import Error
 from attributecode import saneyaml
 from attributecode.util import csv
+from attributecode.util import load_jsonl
 from attributecode.util import replace_tab_with_spaces
 
 
@@ -64,6 +65,18 @@ def transform_json(location):
     return new_data, errors
 
 
+def transform_jsonl(location):
+    """
+    Read a JSON Lines file at `location` and convert data into list of
+    dictionaries.
+    """
+    errors = []
+    # the rows are streamed from the file but kept as a list: the transformed
+    # rows are all checked before any of them is written
+    new_data = strip_trailing_fields_json(load_jsonl(location))
+    return new_data, errors
+
+
 def transform_excel(location, worksheet=None):
     """
     Read a XLSX file at `location` and convert data into list of dictionaries.
@@ -390,6 +403,17 @@ def write_json(location, data):
         json.dump(data, jsonfile, indent=3)
 
 
+def write_jsonl(location, data):
+    """
+    Write a JSON Lines file at `location` the `data` list of ordered dicts, one
+    per line.
+    """
+    with open(location, 'w', encoding='utf-8') as jsonlfile:
+        for item in data:
+            jsonlfile.write(json.dumps(item))
+            jsonlfile.write('\n')
+
+
 def read_excel(location, worksheet=None):
     """
     Read XLSX at `location`, return a list of ordered dictionaries, one
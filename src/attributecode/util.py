@@ -14,9 +14,12 @@
 # ============================================================================
 
 from collections import OrderedDict
+from collections.abc import Mapping
 
 import codecs
 import csv
+import errno
+import hashlib
 import json
 import ntpath
 import openpyxl
@@ -24,12 +27,15 @@ import os
 import posixpath
 import re
 import shutil
+import stat
 import string
 import sys
-from distutils.dir_util import copy_tree
+import tempfile
+from itertools import chain
 from itertools import zip_longest
 
 from attributecode import CRITICAL
+from attributecode import ERROR
 from attributecode import WARNING
 from attributecode import Error
 
@@ -112,30 +118,55 @@ def check_file_names(paths):
     return errors
 
 
+def wrap_boolean_line(line):
+    """
+    Return a `line` with its value wrapped in quotes if this is the line of a
+    boolean field such that YAML does not convert a "yes" or "no" value.
+    """
+    key, _, value = line.partition(':')
+    if key in boolean_fields:
+        return key + ': "' + value.strip() + '"'
+    return line
+
+
+def join_lines(lines):
+    """
+    Return a text from a list of `lines` each terminated by a new line.
+    """
+    if not lines:
+        return ''
+    lines.append('')
+    return '\n'.join(lines)
+
+
 def wrap_boolean_value(context):
-    updated_context = ''
-    for line in context.splitlines():
-        """
-        wrap the boolean value in quote
-        """
-        key = line.partition(':')[0]
-        value = line.partition(':')[2].strip()
-        value = '"' + value + '"'
-        if key in boolean_fields and not value == "":
-            updated_context += key + ': ' + value + '\n'
-        else:
-            updated_context += line + '\n'
-    return updated_context
+    """
+    Return the `context` text with the values of boolean fields wrapped in
+    quotes.
+    """
+    return join_lines([wrap_boolean_line(line) for line in context.splitlines()])
 
 
 def replace_tab_with_spaces(context):
-    updated_context = ''
-    for line in context.splitlines():
-        """
-        Replace tab with 4 spaces
-        """
-        updated_context += line.replace('\t', '    ') + '\n'
-    return updated_context
+    """
+    Return the `context` text with tabs replaced by 4 spaces.
+    """
+    return join_lines(context.splitlines()).replace('\t', '    ')
+
+
+def normalize_about_text(context):
+    """
+    Return the text of an ABOUT file ready to be parsed as YAML, the same as
+    replace_tab_with_spaces(wrap_boolean_value(context)) in a single pass over
+    the lines of the text.
+
+    The values of the boolean fields are wrapped in quotes as YAML would
+    convert "yes" or "no" to True or False, and tabs are replaced by 4 spaces
+    as YAML does not accept tabs.
+    """
+    return join_lines(
+        [wrap_boolean_line(line) for line in context.splitlines()]
+    ).replace('\t', '    ')
 
 
 # TODO: rename to normalize_path
@@ -308,14 +339,117 @@ def load_csv(location):
     results = []
     with open(location, mode='r', encoding='utf-8-sig',
               errors='replace') as csvfile:
-        for row in csv.DictReader(csvfile):
-            # convert all the column keys to lower case
-            updated_row = {key.lower().strip(): value for key,
-                           value in row.items()}
-            results.append(updated_row)
+        reader = csv.DictReader(csvfile)
+        # convert all the column keys to lower case once
+        reader.fieldnames = [normalize_column_name(key)
+                             for key in reader.fieldnames or []]
+        results.extend(reader)
     return results
 
 
+def normalize_column_name(name):
+    """
+    Return a normalized CSV column `name`: lowercased and stripped.
+    """
+    return name.lower().strip()
+
+
+def check_duplicated_column_names(columns):
+    """
+    Return a list of errors for duplicated names in a `columns` list of
+    original (not normalized) CSV column names.
+    """
+    seen = set()
+    dupes = dict()
+    for col in columns:
+        c = normalize_column_name(col)
+        if c in seen:
+            if c in dupes:
+                dupes[c].append(col)
+            else:
+                dupes[c] = [col]
+        seen.add(c)
+
+    errors = []
+    if dupes:
+        dup_msg = []
+        for name, names in dupes.items():
+            names = u', '.join(names)
+            msg = '%(name)s with %(names)s' % locals()
+            dup_msg.append(msg)
+        dup_msg = u', '.join(dup_msg)
+        msg = ('Duplicated column name(s): %(dup_msg)s\n' % locals() +
+               'Please correct the input and re-run.')
+        errors.append(Error(ERROR, msg))
+    return errors
+
+
+class InventoryRow(Mapping):
+    """
+    A row of an inventory as a mapping of column name to value. The values are
+    stored in a tuple and the mapping of {column name: index} is shared by all
+    the rows of the same inventory.
+    """
+    __slots__ = ('columns', 'values',)
+
+    def __init__(self, columns, values):
+        self.columns = columns
+        self.values = values
+
+    def __getitem__(self, key):
+        return self.values[self.columns[key]]
+
+    def __setitem__(self, key, value):
+        # only existing columns can be updated
+        index = self.columns[key]
+        values = list(self.values)
+        values[index] = value
+        self.values = tuple(values)
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __repr__(self):
+        return 'InventoryRow(%r)' % dict(self.items())
+
+
+def load_csv_inventory(location):
+    """
+    Read the CSV inventory at `location` in a single pass. Return a tuple of
+    (errors, rows) where rows is a list of InventoryRow with stripped values
+    and errors is a list of errors for duplicated column names, in which case
+    no row is returned.
+    """
+    rows = []
+    with open(location, mode='r', encoding='utf-8-sig',
+              errors='replace') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, [])
+        errors = check_duplicated_column_names(header)
+        if errors:
+            return errors, rows
+
+        columns = {normalize_column_name(col): index
+                   for index, col in enumerate(header)}
+        width = len(columns)
+        padding = ('',) * width
+        for row in reader:
+            if not row:
+                # skip blank lines like the csv.DictReader does
+                continue
+            values = tuple(value.strip() for value in row[:width])
+            if len(values) < width:
+                values += padding[len(values):]
+            rows.append(InventoryRow(columns, values))
+    return errors, rows
+
+
 def load_json(location):
     """
     Read JSON file at `location` and return a list of ordered dicts, one for
@@ -330,6 +464,44 @@ def load_json(location):
     return results
 
 
+def load_jsonl(location):
+    """
+    Read the JSON Lines file at `location` and yield a dict for each entry, one
+    entry per line. Empty lines are ignored.
+    """
+    with open(location, encoding='utf-8', errors='replace') as jsonl_file:
+        for line in jsonl_file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def peek(iterable):
+    """
+    Return a tuple of (first item or None if empty, iterator of all the items)
+    for an `iterable`, reading only its first item ahead.
+    """
+    items = iter(iterable)
+    first = next(items, None)
+    if first is None:
+        return None, iter(())
+    return first, chain([first], items)
+
+
+class JsonLines(object):
+    """
+    An iterable of the dicts of the JSON Lines file at `location` that reads
+    this file again on each iteration instead of keeping its entries in
+    memory.
+    """
+
+    def __init__(self, location):
+        self.location = location
+
+    def __iter__(self):
+        return load_jsonl(self.location)
+
+
 # FIXME: rename to is_online: BUT do we really need this at all????
 # This is needed to check for the network connection when user wants to fetch
 # the licenses from DJE/LicenseDB
@@ -405,13 +577,19 @@ def add_unc(location):
 
 
 # FIXME: add docstring
-def copy_license_notice_files(fields, base_dir, reference_dir, afp):
+def copy_license_notice_files(fields, base_dir, reference_dir, afp, copy_strategy='copy', copied=None):
     """
     Given a list of (key, value) `fields` tuples and a `base_dir` where ABOUT
     files and their companion LICENSe are store, and an extra `reference_dir`
     where reference license an notice files are stored and the `afp`
     about_file_path value, this function will copy to the base_dir the
     license_file or notice_file if found in the reference_dir
+
+    The files are copied using `copy_strategy`, one of COPY_STRATEGIES.
+    `copied` is an optional set of the (reference file, target directory) pairs
+    already copied in this run that is used and updated to skip copying the
+    same reference file again in the same directory. The failed copies are not
+    added to this set.
     """
     errors = []
     copy_file_name = ''
@@ -449,14 +627,174 @@ def copy_license_notice_files(fields, base_dir, reference_dir, afp):
                 about_file_dir = os.path.dirname(to_posix(afp)).lstrip('/')
                 to_lic_path = posixpath.join(
                     to_posix(base_dir), about_file_dir)
+                if copied is not None and (from_lic_path, to_lic_path) in copied:
+                    continue
                 if not os.path.exists(posixpath.join(to_lic_path, copy_file_name)):
-                    err = copy_file(from_lic_path, to_lic_path)
+                    err = copy_file(from_lic_path, to_lic_path, copy_strategy)
                     if err:
                         errors.append(err)
+                        continue
+                if copied is not None:
+                    copied.add((from_lic_path, to_lic_path))
     return errors
 
 
-def copy_file(from_path, to_path):
+# The strategies to copy a file:
+# - copy: a regular copy of the file content and metadata
+# - hardlink: a hard link to the file, or a copy if this is not possible
+# - reflink: a copy-on-write clone of the file on filesystems that support
+#   this such as Btrfs or XFS, or a kernel-side copy, or a regular copy
+# - symlink: a relative symbolic link to the file
+COPY_STRATEGIES = ('copy', 'hardlink', 'reflink', 'symlink',)
+
+# The Linux ioctl request to clone a file, from <linux/fs.h>
+FICLONE = 0x40049409
+
+
+def get_checksum(location, algorithm='sha1'):
+    """
+    Return the hex digest of the file at `location` using the hashlib
+    `algorithm` name.
+    """
+    digest = hashlib.new(algorithm)
+    with open(location, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def copy_file_range(source, target):
+    """
+    Copy the content of the `source` file object to the `target` file object
+    with a kernel-side copy using os.copy_file_range(). Return True if the
+    whole content was copied or False if this is not supported, for instance
+    across filesystems, in which case nothing was copied or written.
+    """
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    try:
+        size = os.fstat(source.fileno()).st_size
+        copied = 0
+        while copied < size:
+            count = os.copy_file_range(
+                source.fileno(), target.fileno(), size - copied)
+            if not count:
+                break
+            copied += count
+        if copied == size:
+            return True
+    except OSError:
+        pass
+    source.seek(0)
+    target.seek(0)
+    target.truncate()
+    return False
+
+
+def reflink_file(from_path, to_path):
+    """
+    Copy the `from_path` file to the `to_path` file as a copy-on-write clone
+    if supported by the filesystem. Otherwise use a kernel-side copy with
+    os.copy_file_range() if available, or a regular copy. Replace any existing
+    `to_path` file.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None
+
+    # an existing to_path may be a link to from_path: remove it rather than
+    # truncating the from_path content
+    if os.path.lexists(to_path):
+        os.remove(to_path)
+
+    with open(from_path, 'rb') as source, open(to_path, 'wb') as target:
+        cloned = False
+        if fcntl and sys.platform.startswith('linux'):
+            try:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+                cloned = True
+            except OSError:
+                pass
+
+        if not cloned and not copy_file_range(source, target):
+            shutil.copyfileobj(source, target)
+    shutil.copystat(from_path, to_path)
+
+
+# The errors of os.link() for which a hard link is replaced by a copy: the
+# files are on different filesystems or the filesystem has no hard links.
+HARDLINK_FALLBACK_ERRNOS = (errno.EXDEV, errno.EPERM, errno.ENOTSUP,)
+
+
+def hardlink_file(from_path, to_path):
+    """
+    Create a hard link at `to_path` to the `from_path` file or copy this file
+    if a hard link is not possible there. Raise an OSError on other errors.
+    """
+    try:
+        os.link(from_path, to_path)
+    except OSError as e:
+        if e.errno not in HARDLINK_FALLBACK_ERRNOS:
+            raise
+        shutil.copy2(from_path, to_path)
+
+
+def copy_single_file(from_path, to_path, copy_strategy='copy'):
+    """
+    Copy the `from_path` file to the `to_path` file path using `copy_strategy`,
+    one of COPY_STRATEGIES, replacing any existing `to_path` file.
+    """
+    if copy_strategy == 'copy':
+        shutil.copy2(from_path, to_path)
+        return
+
+    if copy_strategy == 'reflink':
+        reflink_file(from_path, to_path)
+        return
+
+    if os.path.lexists(to_path):
+        os.remove(to_path)
+
+    if copy_strategy == 'hardlink':
+        hardlink_file(from_path, to_path)
+
+    elif copy_strategy == 'symlink':
+        try:
+            link = os.path.relpath(from_path, os.path.dirname(to_path))
+        except ValueError:
+            # such as on different drives on Windows
+            link = os.path.abspath(from_path)
+        os.symlink(link, to_path)
+
+    else:
+        raise ValueError('Unknown copy strategy: %(copy_strategy)r' % locals())
+
+
+def copy_tree(from_dir, to_dir, copy_strategy='copy'):
+    """
+    Copy the files of the `from_dir` directory tree to the `to_dir` directory
+    using `copy_strategy`, one of COPY_STRATEGIES, merging them with the
+    existing `to_dir` tree and replacing its existing files.
+    """
+    for top, _dirs, names in os.walk(from_dir, followlinks=True):
+        rel_dir = os.path.relpath(top, from_dir)
+        target_dir = os.path.normpath(os.path.join(to_dir, rel_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for name in names:
+            copy_single_file(
+                os.path.join(top, name),
+                os.path.join(target_dir, name),
+                copy_strategy,
+            )
+
+
+def copy_file(from_path, to_path, copy_strategy='copy'):
+    """
+    Copy the `from_path` file or directory to the `to_path` directory. Files,
+    including the files of a directory, are copied using `copy_strategy`, one
+    of COPY_STRATEGIES. Return an Error or an empty string.
+    """
     error = ''
     # Return if the from_path is empty or None.
     if not from_path:
@@ -487,14 +825,14 @@ def copy_file(from_path, to_path):
             if os.path.exists(to_path):
                 msg = to_path + ' is already existed and is replaced by ' + from_path
                 error = Error(WARNING, msg)
-            copy_tree(from_path, to_path)
+            copy_tree(from_path, to_path, copy_strategy)
         else:
             file_name = os.path.basename(from_path)
             to_file_path = os.path.join(to_path, file_name)
             if os.path.exists(to_file_path):
                 msg = to_file_path + ' is already existed and is replaced by ' + from_path
                 error = Error(WARNING, msg)
-            shutil.copy2(from_path, to_path)
+            copy_single_file(from_path, to_file_path, copy_strategy)
         return error
     except Exception as e:
         msg = 'Cannot copy file at %(from_path)r.' % locals()
@@ -580,14 +918,19 @@ def format_about_dict_for_json_output(about_dictionary_list):
                 if key == 'about_resource':
                     row_list[key] = list(element[key].keys())[0]
                 elif key in licenses:
+                    values = element[key]
+                    if isinstance(values, str):
+                        # a single value such as a license_file of an ABOUT
+                        # file that does not use the "licenses" list
+                        values = values.splitlines()
                     if key == 'license_key':
-                        license_key = element[key]
+                        license_key = values
                     elif key == 'license_name':
-                        license_name = element[key]
+                        license_name = values
                     elif key == 'license_file':
-                        license_file = element[key]
+                        license_file = values
                     elif key == 'license_url':
-                        license_url = element[key]
+                        license_url = values
                 else:
                     row_list[key] = element[key]
 
@@ -620,6 +963,12 @@ def unique(sequence):
     >>> unique([1, 5, 3, 5])
     [1, 5, 3]
     """
+    sequence = list(sequence)
+    try:
+        return list(dict.fromkeys(sequence))
+    except TypeError:
+        # some items are not hashable
+        pass
     deduped = []
     for item in sequence:
         if item not in deduped:
@@ -647,6 +996,130 @@ def create_dir(location):
                  | stat.S_IROTH | stat.S_IXOTH)
 
 
+def create_parent_dir(location, created_dirs=None):
+    """
+    Create the parent directory of the file at `location` if it does not exist
+    and return its POSIX path. `created_dirs` is an optional set of the
+    directories already created or found in this run: it is updated and used to
+    avoid checking again and again for the same directories when writing many
+    files.
+    """
+    parent = posixpath.dirname(to_posix(location))
+    if created_dirs is not None and parent in created_dirs:
+        return parent
+    if not posixpath.exists(parent):
+        os.makedirs(add_unc(parent), exist_ok=True)
+    if created_dirs is not None:
+        created_dirs.add(parent)
+    return parent
+
+
+def has_same_content(location, content):
+    """
+    Return True if the file at `location` exists and contains exactly the
+    `content` bytes. The file size is checked first to avoid reading files that
+    cannot be the same.
+    """
+    try:
+        if os.path.getsize(location) != len(content):
+            return False
+        with open(location, 'rb') as existing:
+            return existing.read() == content
+    except OSError:
+        return False
+
+
+def get_umask():
+    """
+    Return the umask of the process. This briefly changes the process umask:
+    only call this when no other thread creates files.
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# The umask is read once at import time: changing it to read it later would
+# race with the threads creating files.
+UMASK = get_umask()
+
+
+def get_file_mode(location):
+    """
+    Return the permission bits of the existing file at `location` or the
+    permission bits of a new file created with the process umask.
+    """
+    try:
+        return stat.S_IMODE(os.stat(location).st_mode)
+    except OSError:
+        return 0o666 & ~UMASK
+
+
+def write_text(location, text, newline=None, skip_unchanged=False, atomic=False):
+    """
+    Write the `text` string encoded as UTF-8 to the file at `location`. Line
+    endings are translated to `newline` or to the platform line endings if
+    `newline` is None. Return True if the file was written.
+
+    If `skip_unchanged` is True, do not write and return False if the file
+    already has this content, keeping its modification time unchanged.
+    If `atomic` is True, write to a temporary file in the same directory then
+    rename it to `location` such that the file is never partially written.
+    """
+    if newline is None:
+        newline = os.linesep
+    if newline != '\n':
+        text = text.replace('\n', newline)
+    content = text.encode('utf-8', errors='replace')
+
+    if skip_unchanged and has_same_content(location, content):
+        return False
+
+    if not atomic:
+        with open(location, 'wb') as out:
+            out.write(content)
+        return True
+
+    parent, name = os.path.split(location)
+    mode = get_file_mode(location)
+    fd, temp_location = tempfile.mkstemp(
+        prefix='.' + name + '-', suffix='.tmp', dir=parent)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            out.write(content)
+        # mkstemp creates a private file: use the mode of a regular write
+        os.chmod(temp_location, mode)
+        os.replace(temp_location, location)
+    except BaseException:
+        if os.path.exists(temp_location):
+            os.remove(temp_location)
+        raise
+    return True
+
+
+def link_file(source, target, symbolic=False, skip_unchanged=False):
+    """
+    Create a hard link or a relative symbolic link if `symbolic` is True at
+    `target` to the `source` file, replacing any existing `target` file. The
+    hard link is a copy if it is not possible, such as across filesystems.
+    Keep an existing `target` that is already linked to `source` if
+    `skip_unchanged` is True.
+    """
+    if symbolic:
+        link = os.path.relpath(source, os.path.dirname(target))
+        if skip_unchanged and os.path.islink(target) and os.readlink(target) == link:
+            return
+    elif skip_unchanged and os.path.exists(target) and os.path.samefile(source, target):
+        return
+
+    if os.path.lexists(target):
+        os.remove(target)
+    if symbolic:
+        os.symlink(link, target)
+    else:
+        hardlink_file(source, target)
+
+
 def get_temp_dir(sub_dir_path=None):
     """
     Create a unique new temporary directory location. Create directories
@@ -784,9 +1257,13 @@ def load_excel(location, worksheet=None):
     return errors, results
 
 
-def write_licenses(lic_dict, location):
-    import io
-
+def write_licenses(lic_dict, location, skip_unchanged=False, atomic=False):
+    """
+    Write the license texts of a `lic_dict` mapping of {license file name: text}
+    in the directory at `location`. Return a list of errors.
+    Skip writing unchanged files if `skip_unchanged` is True and write the
+    files atomically if `atomic` is True.
+    """
     loc = to_posix(location)
     errors = []
 
@@ -795,8 +1272,8 @@ def write_licenses(lic_dict, location):
     try:
         for lic in lic_dict:
             output_location = posixpath.join(loc, lic)
-            with open(output_location, 'w', encoding='utf-8', errors='replace') as out:
-                out.write(lic_dict[lic])
+            write_text(add_unc(output_location), lic_dict[lic],
+                       skip_unchanged=skip_unchanged, atomic=atomic)
     except Exception as e:
         msg = str(e)
         errors.append(Error(CRITICAL, msg))
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+"""
+Load and dump YAML with the saneyaml semantics using the libyaml C loader and
+emitter when PyYAML is built with libyaml, and the pure Python ones otherwise.
+
+The loaders use the saneyaml constructors: all the scalars are loaded as
+strings, the mappings are loaded as ordered dicts and the duplicated keys are
+optionally reported with the same errors.
+
+The libyaml emitter cannot be configured as the saneyaml Python emitter: it
+does not indent the sequences nested in a mapping and its block scalars,
+folding and double-quoted scalars differ. The C emitter is therefore only used
+for the data where both emitters are known to produce the same text: mappings
+of short single-line printable strings or booleans and of lists of such
+strings or of flat mappings of such strings, as in most ABOUT files. The
+nested sequences are then indented as saneyaml does. Any other data is dumped
+with saneyaml.
+"""
+
+import re
+
+import yaml
+
+from attributecode import saneyaml
+
+try:
+    from yaml import CSafeLoader
+    from yaml._yaml import CEmitter
+    has_libyaml = True
+except ImportError:
+    has_libyaml = False
+
+from yaml import SafeLoader
+from yaml.representer import SafeRepresenter
+from yaml.resolver import Resolver
+
+# Use the libyaml backend when available. Set to False to always use the pure
+# Python loaders and emitter.
+use_libyaml = has_libyaml
+
+
+def copy_sane_constructors(loader, sane_loader):
+    """
+    Set the YAML constructors of a `sane_loader` saneyaml loader class on a
+    `loader` class.
+    """
+    loader.yaml_constructors = dict(sane_loader.yaml_constructors)
+    loader.yaml_multi_constructors = dict(sane_loader.yaml_multi_constructors)
+
+
+class PySaneLoader(SafeLoader):
+    pass
+
+
+class PyDupeKeySaneLoader(SafeLoader):
+    pass
+
+
+copy_sane_constructors(PySaneLoader, saneyaml.SaneLoader)
+copy_sane_constructors(PyDupeKeySaneLoader, saneyaml.DupeKeySaneLoader)
+
+if has_libyaml:
+
+    class CSaneLoader(CSafeLoader):
+        pass
+
+    class CDupeKeySaneLoader(CSafeLoader):
+        pass
+
+    copy_sane_constructors(CSaneLoader, saneyaml.SaneLoader)
+    copy_sane_constructors(CDupeKeySaneLoader, saneyaml.DupeKeySaneLoader)
+
+
+def load(s, allow_duplicate_keys=True, libyaml=None):
+    """
+    Return an object loaded from a YAML string `s` as saneyaml.load() does.
+    If `allow_duplicate_keys` is False, raise an Exception if a mapping
+    contains duplicated keys. Use the libyaml loader if `libyaml` is True and
+    libyaml is available or by default if `use_libyaml` is True.
+    """
+    if libyaml is None:
+        libyaml = use_libyaml
+    if libyaml and has_libyaml:
+        loader = CSaneLoader if allow_duplicate_keys else CDupeKeySaneLoader
+    else:
+        loader = PySaneLoader if allow_duplicate_keys else PyDupeKeySaneLoader
+    return yaml.load(s, Loader=loader)
+
+
+if has_libyaml:
+
+    class CSaneDumper(CEmitter, SafeRepresenter, Resolver):
+        """
+        A dumper with the saneyaml representers and the libyaml emitter.
+        """
+
+        def __init__(self, stream, default_style=None, default_flow_style=False,
+                     canonical=None, indent=None, width=None, allow_unicode=None,
+                     line_break=None, encoding=None, explicit_start=None,
+                     explicit_end=None, version=None, tags=None, sort_keys=False):
+            CEmitter.__init__(
+                self,
+                stream,
+                canonical=canonical,
+                indent=indent,
+                width=width,
+                encoding=encoding,
+                allow_unicode=allow_unicode,
+                line_break=line_break,
+                explicit_start=explicit_start,
+                explicit_end=explicit_end,
+                version=version,
+                tags=tags,
+            )
+            SafeRepresenter.__init__(
+                self,
+                default_style=default_style,
+                default_flow_style=default_flow_style,
+                sort_keys=sort_keys,
+            )
+            Resolver.__init__(self)
+
+        def ignore_aliases(self, data):
+            return True
+
+    CSaneDumper.yaml_representers = dict(saneyaml.SaneDumper.yaml_representers)
+    CSaneDumper.yaml_multi_representers = dict(saneyaml.SaneDumper.yaml_multi_representers)
+    CSaneDumper.yaml_implicit_resolvers = {}
+    CSaneDumper.yaml_path_resolvers = {}
+
+
+# The characters of the strings that both emitters write the same way: these
+# are printable and not line breaks.
+simple_string_chars = re.compile(
+    '[\\x20-\\x7e\\xa0-\\u2027\\u202a-\\ud7ff\\ue000-\\ufefe\\uff00-\\ufffd]*').fullmatch
+
+# The column of the list items of a mapping and of the keys of these items.
+ITEM_COLUMN = 4
+
+
+def is_simple_string(value, column):
+    """
+    Return True if a `value` string starting at `column` is dumped with the
+    same style and on a single line by both emitters.
+    """
+    if isinstance(value, bool):
+        return True
+    if not isinstance(value, str) or not simple_string_chars(value):
+        return False
+    # the emitters fold differently at spaces the lines longer than the width:
+    # a value with spaces in single quotes must fit in the width
+    if ' ' not in value:
+        return True
+    return column + len(value) + value.count("'") + 2 <= saneyaml.WIDTH
+
+
+def is_simple_key(key):
+    return isinstance(key, str) and ' ' not in key and is_simple_string(key, 0)
+
+
+def is_simple(data):
+    """
+    Return True if the `data` object is a mapping that the libyaml emitter
+    dumps as saneyaml does once the sequences are indented.
+    """
+    if not isinstance(data, dict):
+        return False
+    for key, value in data.items():
+        if not is_simple_key(key):
+            return False
+        if not isinstance(value, list):
+            if not is_simple_string(value, len(key) + 2):
+                return False
+            continue
+        if not value:
+            return False
+        for item in value:
+            if not isinstance(item, dict):
+                if not is_simple_string(item, ITEM_COLUMN):
+                    return False
+                continue
+            if not item:
+                return False
+            for item_key, item_value in item.items():
+                if not is_simple_key(item_key):
+                    return False
+                if not is_simple_string(item_value, ITEM_COLUMN + len(item_key) + 2):
+                    return False
+    return True
+
+
+def indent_sequences(text):
+    """
+    Return a YAML `text` of a mapping dumped by the libyaml emitter with the
+    lines of the sequences of this mapping indented as saneyaml does.
+    """
+    lines = text.splitlines(True)
+    for i, line in enumerate(lines):
+        if line[:1] in ('-', ' '):
+            lines[i] = '  ' + line
+    return ''.join(lines)
+
+
+def dump(obj, libyaml=None):
+    """
+    Return a YAML string from `obj` identical to saneyaml.dump(). Use the
+    libyaml emitter if `libyaml` is True and libyaml is available or by default
+    if `use_libyaml` is True, for the data that it dumps as saneyaml does.
+    """
+    if libyaml is None:
+        libyaml = use_libyaml
+    if not (libyaml and has_libyaml and is_simple(obj)):
+        return saneyaml.dump(obj)
+    text = yaml.dump(
+        data=obj,
+        Dumper=CSaneDumper,
+        default_flow_style=False,
+        default_style=None,
+        canonical=False,
+        allow_unicode=True,
+        encoding=None,
+        indent=2,
+        width=saneyaml.WIDTH,
+        line_break='\n',
+        explicit_start=False,
+        explicit_end=False,
+    )
+    return indent_sequences(text)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+import os
+import timeit
+import unittest
+
+from testing_utils import TESTDATA_DIR
+from testing_utils import run_benchmarks
+
+from attributecode import about_parser
+from attributecode import saneyaml
+from attributecode.util import normalize_about_text
+
+
+def load_with_saneyaml(text):
+    """
+    Return the data loaded from an ABOUT `text` with saneyaml or an Exception.
+    """
+    try:
+        return saneyaml.load(normalize_about_text(text), allow_duplicate_keys=False)
+    except Exception as e:
+        return e
+
+
+def get_about_texts():
+    """
+    Return a list of (location, text) for all the ABOUT files of the test data.
+    """
+    texts = []
+    for top, _dirs, files in os.walk(TESTDATA_DIR):
+        for name in files:
+            if name.lower().endswith('.about'):
+                location = os.path.join(top, name)
+                with open(location, encoding='utf-8', errors='replace') as txt:
+                    texts.append((location, txt.read()))
+    return sorted(texts)
+
+
+class AboutParserTest(unittest.TestCase):
+
+    def check_same_as_saneyaml(self, text):
+        expected = load_with_saneyaml(text)
+        try:
+            result = about_parser.parse(text)
+        except about_parser.Unsupported:
+            return False
+        assert not isinstance(expected, Exception), repr(text)
+        assert expected == result, repr(text)
+        assert list(expected or []) == list(result or []), repr(text)
+        return True
+
+    def test_parse_is_the_same_as_saneyaml_for_all_test_about_files(self):
+        texts = get_about_texts()
+        parsed = [self.check_same_as_saneyaml(text) for _location, text in texts]
+        # most of the ABOUT files use the fast parser
+        assert sum(parsed) > len(texts) * 0.8
+
+    def test_parse_is_the_same_as_saneyaml_for_supported_texts(self):
+        tests = [
+            '',
+            '\n\n',
+            'a: b\nc:\nd: 1.0\ne: 012\nf: null\ng: ~\n',
+            'about_resource: .\nredistribute: yes\nattribute:\ttrack_change:\n',
+            'a: b\r\nc: d\r\n',
+            'a:    spaced value   \nb: http://foo.com/x#y\nc: b:c\n',
+            '# Generated\n\na: b\n# comment\nc: d\n',
+            'a: x\n  continued\n\n  after a blank line\n\nb: c\n',
+            'a: |\n    line1\n\n    line2\n      indented\n\n\nb: x\n',
+            'a: |\n  x\n  \ty\n',
+            'a: |\n',
+            'a: |\nb: c\n',
+            'a: |\n    x\n# c\nb: d\n',
+            'licenses:\n    - key: mit\n      name: MIT License\n\n    - key: gpl\nb: c\n',
+            'l:\n  - a\n  - b\nm:\n- c\n- d\n',
+        ]
+        for text in tests:
+            assert self.check_same_as_saneyaml(text), repr(text)
+
+    def test_parse_does_not_support_other_texts(self):
+        tests = [
+            'a: b\na: c\n',
+            'yes: b\n',
+            'a: yes\n',
+            'a: "x"\n',
+            'a: b #c\n',
+            'a: {}\n',
+            'a: - x\n',
+            'a: x\n  y: z\n',
+            'a: |-\n  x\n',
+            'a: |\n\n  x\n',
+            'redistribute: "yes"\n',
+            'l:\n  - key: a\n    b: yes\n',
+            'l:\n  - a\n    b\n',
+            'l:\n  - \n',
+            '---\na: b\n',
+            'a: \ufeffb\n',
+            'a: b\x85c\n',
+        ]
+        for text in tests:
+            self.assertRaises(about_parser.Unsupported, about_parser.parse, text)
+            # these are loaded or rejected by saneyaml the same way
+            expected = load_with_saneyaml(text)
+            try:
+                result = about_parser.load_about_text(text)
+            except Exception as e:
+                assert type(expected) == type(e)
+                assert str(expected) == str(e)
+            else:
+                assert expected == result
+
+    @unittest.skipUnless(run_benchmarks, 'Set ABOUTCODE_RUN_BENCHMARKS to run the benchmarks')
+    def test_parse_is_faster_than_saneyaml(self):
+        # A benchmark of the fast parser against the saneyaml loader on the
+        # ABOUT files of the test data
+        texts = [text for _location, text in get_about_texts()]
+
+        def load_fast():
+            for text in texts:
+                try:
+                    about_parser.load_about_text(text)
+                except Exception:
+                    # some test ABOUT files are invalid
+                    pass
+
+        def load_saneyaml():
+            for text in texts:
+                load_with_saneyaml(text)
+
+        fast_time = min(timeit.repeat(load_fast, number=1, repeat=3))
+        saneyaml_time = min(timeit.repeat(load_saneyaml, number=1, repeat=3))
+        assert fast_time < saneyaml_time
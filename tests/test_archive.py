@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+import os
+import tarfile
+import unittest
+import zipfile
+
+from testing_utils import get_temp_dir
+from testing_utils import get_test_loc
+
+from attributecode import archive
+from attributecode import model
+
+
+def make_zip(test_dir, location):
+    """
+    Create a zip file at `location` with the files of `test_dir` stored under
+    the `project` directory.
+    """
+    with zipfile.ZipFile(location, 'w') as zipf:
+        for top, _dirs, files in os.walk(test_dir):
+            for name in files:
+                path = os.path.join(top, name)
+                arcname = os.path.relpath(path, test_dir).replace(os.sep, '/')
+                zipf.write(path, 'project/' + arcname)
+    return location
+
+
+def make_tar(test_dir, location, mode):
+    """
+    Create a tar file at `location` opened with `mode` with the files of
+    `test_dir` stored under the `project` directory.
+    """
+    with tarfile.open(location, mode) as tar:
+        tar.add(test_dir, 'project')
+    return location
+
+
+class ArchiveTest(unittest.TestCase):
+
+    def get_test_zip(self):
+        test_dir = get_test_loc('test_inventory_db/project')
+        location = os.path.join(get_temp_dir(), 'project.zip')
+        return make_zip(test_dir, location)
+
+    def get_test_archives(self):
+        test_dir = get_test_loc('test_inventory_db/project')
+        temp_dir = get_temp_dir()
+        return [
+            self.get_test_zip(),
+            make_tar(test_dir, os.path.join(temp_dir, 'project.tar'), 'w'),
+            make_tar(test_dir, os.path.join(temp_dir, 'project.tar.gz'), 'w:gz'),
+            make_tar(test_dir, os.path.join(temp_dir, 'project.tar.xz'), 'w:xz'),
+        ]
+
+    def test_archive_virtual_paths(self):
+        for test_archive in self.get_test_archives():
+            an_archive = archive.open_archive(test_archive)
+            root = an_archive.root
+            assert an_archive.exists(root + '/project/foo/mit.LICENSE')
+            assert an_archive.isdir(root + '/project/foo')
+            assert not an_archive.isdir(root + '/project/foo/mit.LICENSE')
+            assert not an_archive.exists(root + '/project/foo/missing')
+            assert None is an_archive.get_path('/some/other/path')
+            expected = [root + '/project/bar/bar.ABOUT', root + '/project/baz/baz.ABOUT',
+                        root + '/project/foo/foo.ABOUT']
+            assert expected == sorted(an_archive.get_about_locations())
+            an_archive.close()
+
+    def test_collect_inventory_from_archive_is_the_same_as_extracted(self):
+        extracted = get_temp_dir()
+        with zipfile.ZipFile(self.get_test_zip()) as zipf:
+            zipf.extractall(extracted)
+        expected_errors, expected_abouts = model.collect_inventory(extracted)
+        expected_abouts.sort(key=lambda a: a.about_file_path)
+
+        for test_archive in self.get_test_archives():
+            an_archive = archive.open_archive(test_archive)
+            errors, abouts = model.collect_inventory(an_archive.root, an_archive)
+            an_archive.close()
+            abouts.sort(key=lambda a: a.about_file_path)
+
+            assert expected_errors == errors
+            assert ([a.about_file_path for a in expected_abouts]
+                    == [a.about_file_path for a in abouts])
+            for expected, about in zip(expected_abouts, abouts):
+                assert expected.license_file.value == about.license_file.value
+                assert expected.errors == about.errors
+
+    def test_tar_archive_reads_other_texts_with_an_extra_pass(self):
+        test_dir = get_test_loc('test_inventory_db/project')
+        location = os.path.join(get_temp_dir(), 'project.tar.gz')
+        tar_archive = archive.open_archive(make_tar(test_dir, location, 'w:gz'))
+        assert 'project/foo/foo.ABOUT' in tar_archive.texts
+        assert 'project/foo/mit.LICENSE' not in tar_archive.texts
+
+        text = tar_archive.read_text(tar_archive.root + '/project/foo/mit.LICENSE')
+        with open(os.path.join(test_dir, 'foo', 'mit.LICENSE')) as f:
+            assert f.read() == text
+        self.assertRaises(IOError, tar_archive.read_text,
+                          tar_archive.root + '/project/foo')
+
+    def test_collect_inventory_reads_the_tar_texts_in_a_single_pass(self):
+        test_dir = get_test_loc('test_inventory_db/project')
+        location = os.path.join(get_temp_dir(), 'project.tar.gz')
+        tar_archive = archive.open_archive(make_tar(test_dir, location, 'w:gz'))
+        passes = []
+        read_members = tar_archive.read_members
+
+        def counting_read_members(names, read_member):
+            passes.append(sorted(names))
+            return read_members(names, read_member)
+
+        tar_archive.read_members = counting_read_members
+        _errors, abouts = model.collect_inventory(tar_archive.root, tar_archive)
+        expected = [['project/bar/mit.LICENSE', 'project/baz/gpl-3.0-plus.LICENSE',
+                     'project/foo/gpl-2.0.LICENSE', 'project/foo/mit.LICENSE']]
+        assert expected == passes
+        foo = [a for a in abouts if a.name.value == 'foo'][0]
+        assert all(foo.license_file.value.values())
+
+    def test_tar_archive_resolves_links(self):
+        test_dir = get_temp_dir()
+        with open(os.path.join(test_dir, 'mit.LICENSE'), 'w') as f:
+            f.write('MIT text')
+        location = os.path.join(get_temp_dir(), 'links.tar')
+        with tarfile.open(location, 'w') as tar:
+            tar.add(os.path.join(test_dir, 'mit.LICENSE'), 'project/lic/mit.LICENSE')
+            for name, linkname, link_type in (
+                    ('project/a/mit.LICENSE', '../lic/mit.LICENSE', tarfile.SYMTYPE),
+                    ('project/b/mit.LICENSE', 'project/lic/mit.LICENSE', tarfile.LNKTYPE),
+                    ('project/c', 'lic', tarfile.SYMTYPE),
+                    ('project/dangling', 'missing', tarfile.SYMTYPE)):
+                info = tarfile.TarInfo(name)
+                info.type = link_type
+                info.linkname = linkname
+                tar.addfile(info)
+
+        tar_archive = archive.open_archive(location)
+        root = tar_archive.root
+        for path in ('a/mit.LICENSE', 'b/mit.LICENSE', 'c/mit.LICENSE'):
+            assert 'MIT text' == tar_archive.read_text(root + '/project/' + path)
+        assert tar_archive.isdir(root + '/project/c')
+        assert not tar_archive.exists(root + '/project/dangling')
+
+        target_dir, _extracted, errors = tar_archive.extract([root + '/project'])
+        assert [] == errors
+        for path in ('a', 'b', 'c', 'lic'):
+            with open(os.path.join(target_dir, 'project', path, 'mit.LICENSE')) as f:
+                assert 'MIT text' == f.read()
+
+    def test_extract_only_extracts_the_selected_members(self):
+        for test_archive in self.get_test_archives():
+            an_archive = archive.open_archive(test_archive)
+            root = an_archive.root
+            locations = [root + '/project/foo', root + '/project/bar/bar.ABOUT']
+            target_dir, extracted, errors = an_archive.extract(locations)
+            an_archive.close()
+            assert [] == errors
+            assert 'project' == os.path.basename(target_dir)
+            assert [os.path.join(target_dir, 'project/foo'),
+                    os.path.join(target_dir, 'project/bar/bar.ABOUT')] == extracted
+            tree = []
+            for top, _dirs, files in os.walk(target_dir):
+                for name in files:
+                    path = os.path.relpath(os.path.join(top, name), target_dir)
+                    tree.append(path.replace(os.sep, '/'))
+            expected = ['project/bar/bar.ABOUT', 'project/foo/foo.ABOUT',
+                        'project/foo/gpl-2.0.LICENSE', 'project/foo/mit.LICENSE']
+            assert expected == sorted(tree)
+
+    def test_archive_subclasses_must_read_and_extract_members(self):
+        self.assertRaises(TypeError, archive.Archive, self.get_test_zip())
+
+    def test_is_archive(self):
+        for test_archive in self.get_test_archives():
+            assert archive.is_archive(test_archive)
+        assert not archive.is_archive(get_test_loc('test_inventory_db/project'))
+
+    def test_get_member_name_rejects_paths_outside_of_the_archive(self):
+        assert 'foo/bar' == archive.get_member_name('./foo//bar/')
+        assert None is archive.get_member_name('../foo')
+        assert None is archive.get_member_name('/')
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+import hashlib
+import os
+import unittest
+
+from testing_utils import get_temp_dir
+from testing_utils import get_temp_file
+from testing_utils import write_file
+
+from attributecode import ERROR
+from attributecode import checksum
+from attributecode import gen
+from attributecode import model
+
+
+class ChecksumTest(unittest.TestCase):
+
+    def get_test_tree(self):
+        test_dir = get_temp_dir()
+        write_file(os.path.join(test_dir, 'project', 'a.c'), b'a' * 3000000)
+        write_file(os.path.join(test_dir, 'project', 'sub', 'b.c'), b'b')
+        write_file(os.path.join(test_dir, 'project', 'B.c'), b'')
+        return test_dir
+
+    def test_get_file_checksums(self):
+        content = b'some content\n' * 200000
+        location = write_file(get_temp_file(), content)
+        expected = {
+            'md5': hashlib.md5(content).hexdigest(),
+            'sha1': hashlib.sha1(content).hexdigest(),
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+        assert expected == checksum.get_file_checksums(location)
+
+    def test_compute_checksums_of_directory_uses_the_manifest(self):
+        test_dir = self.get_test_tree()
+        project = os.path.join(test_dir, 'project')
+        manifest = ''.join(
+            '%s  %s\n' % (hashlib.sha256(content).hexdigest(), path)
+            for path, content in (('B.c', b''), ('a.c', b'a' * 3000000), ('sub/b.c', b'b')))
+        expected = hashlib.sha256(manifest.encode('utf-8')).hexdigest()
+        for threads in (1, 3):
+            errors, checksums = checksum.compute_checksums([project], threads)
+            assert [] == errors
+            assert expected == checksums[project]['sha256']
+
+    def test_compute_checksums_reports_unreadable_files(self):
+        missing = os.path.join(get_temp_dir(), 'missing.c')
+        errors, checksums = checksum.compute_checksums([missing])
+        assert [ERROR] == [e.severity for e in errors]
+        assert {} == checksums
+
+    def test_checksum_cache_reuses_the_checksums_of_unchanged_files(self):
+        location = write_file(get_temp_file(), b'content')
+        cache_location = get_temp_file()
+        cache = checksum.ChecksumCache(cache_location)
+        _errors, checksums = checksum.compute_checksums([location], cache=cache)
+        cache.save()
+
+        # tamper the cached checksums to check that they are reused
+        cache = checksum.ChecksumCache(cache_location)
+        key, _stat = cache.get_key(location)
+        cache.entries[key][-1] = 'cached'
+        _errors, checksums = checksum.compute_checksums([location], cache=cache)
+        assert 'cached' == checksums[location]['sha256']
+
+        os.utime(location, (1000000000, 1000000000))
+        _errors, checksums = checksum.compute_checksums([location], cache=cache)
+        assert hashlib.sha256(b'content').hexdigest() == checksums[location]['sha256']
+
+    def test_verify_checksums(self):
+        test_dir = self.get_test_tree()
+        sha1 = hashlib.sha1(b'b').hexdigest()
+        write_file(os.path.join(test_dir, 'project', 'sub', 'b.c.ABOUT'), (
+            'about_resource: b.c\nname: b\nchecksum_sha1: %s\n' % sha1.upper()).encode('utf-8'))
+        write_file(os.path.join(test_dir, 'project', 'B.c.ABOUT'), (
+            'about_resource: B.c\nname: B\nchecksum_md5: 0123\n').encode('utf-8'))
+        write_file(os.path.join(test_dir, 'project', 'a.c.ABOUT'),
+                   b'about_resource: a.c\nname: a\n')
+        _errors, abouts = model.collect_inventory(test_dir)
+        errors = checksum.verify_checksums(abouts, threads=2)
+        assert 1 == len(errors)
+        assert ERROR == errors[0].severity
+        assert 'project/B.c.ABOUT: Field checksum_md5: Checksum mismatch' in errors[0].message
+
+    def test_set_checksums_skips_missing_about_resources(self):
+        test_dir = self.get_test_tree()
+        write_file(os.path.join(test_dir, 'project', 'sub', 'b.c.ABOUT'),
+                   b'about_resource: b.c\nname: b\n')
+        write_file(os.path.join(test_dir, 'project', 'missing.c.ABOUT'),
+                   b'about_resource: missing.c\nname: missing\n')
+        _errors, abouts = model.collect_inventory(test_dir)
+        os.remove(os.path.join(test_dir, 'project', 'sub', 'b.c'))
+        assert [] == checksum.set_checksums(abouts)
+        assert not any(a.checksum_sha1.value for a in abouts)
+
+    def test_generate_with_compute_checksums(self):
+        test_dir = self.get_test_tree()
+        inventory = get_temp_file('inventory.csv')
+        with open(inventory, 'w') as f:
+            f.write('about_resource,name\nproject/sub/,sub\nproject/sub/b.c,b\n')
+        cache_location = get_temp_file()
+        errors, abouts = gen.generate(
+            inventory, test_dir, compute_checksums=True,
+            checksum_cache=cache_location)
+        assert [] == [e for e in errors if e.severity >= ERROR]
+        b = [a for a in abouts if a.name.value == 'b'][0]
+        assert hashlib.sha1(b'b').hexdigest() == b.checksum_sha1.value
+        with open(os.path.join(test_dir, 'project', 'sub', 'b.c.ABOUT')) as f:
+            assert 'checksum_sha256: %s' % hashlib.sha256(b'b').hexdigest() in f.read()
+        assert os.path.exists(cache_location)
+
+        _errors, abouts = model.collect_inventory(test_dir)
+        assert [] == checksum.verify_checksums(abouts)
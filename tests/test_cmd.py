@@ -397,6 +397,25 @@ def test_about_attrib_command_can_run_minimally_without_error():
     run_about_command_test_click(['attrib', test_dir, result])
 
 
+def test_about_attrib_command_rejects_save_snapshot_with_an_inventory_input():
+    test_inv = get_test_loc('test_cmd/geninventory.csv')
+    snapshot = get_temp_file('about.snapshot')
+    result = run_about_command_test_click(
+        ['attrib', '--save-snapshot', snapshot, test_inv, get_temp_file()],
+        expected_rc=2)
+    assert '--save-snapshot option only works with .ABOUT files input' in result.output
+
+
+def test_about_collect_redist_src_command_rejects_snapshots_with_an_inventory():
+    test_inv = get_test_loc('test_cmd/geninventory.csv')
+    snapshot = get_temp_file('about.snapshot')
+    result = run_about_command_test_click(
+        ['collect-redist-src', '--from-inventory', test_inv,
+         '--save-snapshot', snapshot, get_temp_dir(), get_temp_dir()],
+        expected_rc=2)
+    assert 'do not work with --from-inventory' in result.output
+
+
 def test_about_transform_command_can_run_minimally_without_error():
     test_file = get_test_loc('test_cmd/transform.csv')
     result = get_temp_file('file_name.csv')
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+import os
+import unittest
+import zipfile
+from unittest import mock
+
+from testing_utils import get_temp_dir
+from testing_utils import get_test_loc
+
+from attributecode import CRITICAL
+from attributecode import WARNING
+from attributecode import Error
+from attributecode import copier
+
+
+class CopierTest(unittest.TestCase):
+
+    def get_tree(self, location):
+        tree = []
+        for top, _dirs, files in os.walk(location):
+            for name in files:
+                tree.append(os.path.relpath(os.path.join(top, name), location))
+        return sorted(tree)
+
+    def test_copy_files_copies_files_and_directories(self):
+        test_dir = get_test_loc('test_model/redistribution')
+        for threads in (1, 4):
+            output = get_temp_dir()
+            copies = [
+                (os.path.join(test_dir, 'this.c'), output),
+                (os.path.join(test_dir, 'test'), output),
+                (os.path.join(test_dir, 'missing.c'), output),
+            ]
+            stats = {}
+            errors = copier.copy_files(copies, threads=threads, stats=stats)
+            assert [] == errors
+            expected = [
+                os.path.join('test', 'subdir', 'test.ABOUT'),
+                os.path.join('test', 'subdir', 'test.c'),
+                'this.c',
+            ]
+            assert expected == self.get_tree(output)
+            assert 3 == stats['files']
+            expected_bytes = sum(
+                os.path.getsize(os.path.join(output, path)) for path in expected)
+            assert expected_bytes == stats['bytes']
+
+    def test_copy_files_reports_replaced_files(self):
+        test_file = get_test_loc('test_model/redistribution/this.c')
+        output = get_temp_dir()
+        copier.copy_files([(test_file, output)])
+        errors = copier.copy_files([(test_file, output)])
+        assert [WARNING] == [e.severity for e in errors]
+        assert 'is already existed and is replaced by' in errors[0].message
+
+    def test_copy_files_preserve_metadata(self):
+        test_dir = get_temp_dir()
+        test_file = os.path.join(test_dir, 'old.c')
+        with open(test_file, 'w') as f:
+            f.write('old')
+        os.utime(test_file, (1000000000, 1000000000))
+
+        output = get_temp_dir()
+        copier.copy_files([(test_file, output)], preserve_metadata=True)
+        assert 1000000000 == os.path.getmtime(os.path.join(output, 'old.c'))
+
+        output = get_temp_dir()
+        copier.copy_files([(test_file, output)], preserve_metadata=False)
+        assert 1000000000 != os.path.getmtime(os.path.join(output, 'old.c'))
+
+    def test_format_copy_stats(self):
+        stats = dict(files=10, bytes=4 * 1024 * 1024, seconds=2)
+        expected = 'Copied 10 files (4.0 MB) in 2.00s: 5.0 files/s, 2.0 MB/s.'
+        assert expected == copier.format_copy_stats(stats)
+
+    def test_zip_files_writes_entries_without_temp_copies(self):
+        test_dir = get_test_loc('test_model/redistribution')
+        for threads in (1, 3):
+            output = os.path.join(get_temp_dir(), 'output.zip')
+            copies = [
+                (os.path.join(test_dir, 'this.c'), ''),
+                (os.path.join(test_dir, 'test'), 'sub'),
+            ]
+            stats = {}
+            errors = copier.zip_files(copies, output, threads, stats)
+            assert [] == errors
+            assert 3 == stats['files']
+            with zipfile.ZipFile(output) as archive:
+                names = sorted(archive.namelist())
+            expected = ['sub/', 'sub/test/', 'sub/test/subdir/',
+                        'sub/test/subdir/test.ABOUT', 'sub/test/subdir/test.c',
+                        'this.c']
+            assert expected == names
+
+    def test_zip_files_stores_compressed_files(self):
+        test_dir = get_temp_dir()
+        for name in ('notes.txt', 'lib.jar', 'data.tar.gz'):
+            with open(os.path.join(test_dir, name), 'w') as f:
+                f.write('some content ' * 100)
+        output = os.path.join(get_temp_dir(), 'output.zip')
+        copier.zip_files([(test_dir, '')], output)
+        root = os.path.basename(test_dir)
+        with zipfile.ZipFile(output) as archive:
+            compression = {info.filename: info.compress_type
+                           for info in archive.infolist()}
+        expected = {
+            root + '/': zipfile.ZIP_STORED,
+            root + '/data.tar.gz': zipfile.ZIP_STORED,
+            root + '/lib.jar': zipfile.ZIP_STORED,
+            root + '/notes.txt': zipfile.ZIP_DEFLATED,
+        }
+        assert expected == compression
+
+    def test_zip_files_reports_replaced_entries(self):
+        test_file = get_test_loc('test_model/redistribution/this.c')
+        output = os.path.join(get_temp_dir(), 'output.zip')
+        errors = copier.zip_files([(test_file, ''), (test_file, '')], output)
+        assert [WARNING] == [e.severity for e in errors]
+        with zipfile.ZipFile(output) as archive:
+            assert ['this.c'] == archive.namelist()
+
+    def test_zip_files_writes_empty_directories(self):
+        test_dir = get_temp_dir()
+        os.makedirs(os.path.join(test_dir, 'src', 'empty'))
+        output = os.path.join(get_temp_dir(), 'output.zip')
+        errors = copier.zip_files([(os.path.join(test_dir, 'src'), 'base')], output)
+        assert [] == errors
+        with zipfile.ZipFile(output) as archive:
+            assert ['base/', 'base/src/', 'base/src/empty/'] == archive.namelist()
+            assert all(info.is_dir() for info in archive.infolist())
+            extracted = get_temp_dir()
+            archive.extractall(extracted)
+        assert os.path.isdir(os.path.join(extracted, 'base', 'src', 'empty'))
+
+    def get_sync_source(self):
+        test_dir = get_temp_dir()
+        os.makedirs(os.path.join(test_dir, 'src', 'sub'))
+        for path, content in (('a.c', 'a'), ('sub/b.c', 'bb')):
+            with open(os.path.join(test_dir, 'src', path), 'w') as f:
+                f.write(content)
+        return os.path.join(test_dir, 'src')
+
+    def test_sync_files_copies_only_changed_files(self):
+        source = self.get_sync_source()
+        output = get_temp_dir()
+        stats = {}
+        errors = copier.sync_files([(source, output)], output, stats=stats)
+        assert [] == errors
+        assert (2, 0) == (stats['files'], stats['unchanged'])
+        expected = [copier.SYNC_MANIFEST,
+                    os.path.join('src', 'a.c'), os.path.join('src', 'sub', 'b.c')]
+        assert expected == self.get_tree(output)
+
+        stats = {}
+        errors = copier.sync_files([(source, output)], output, stats=stats)
+        assert [] == errors
+        assert (0, 2) == (stats['files'], stats['unchanged'])
+
+        with open(os.path.join(source, 'a.c'), 'w') as f:
+            f.write('changed')
+        stats = {}
+        copier.sync_files([(source, output)], output, stats=stats)
+        assert (1, 1) == (stats['files'], stats['unchanged'])
+        with open(os.path.join(output, 'src', 'a.c')) as f:
+            assert 'changed' == f.read()
+
+    def test_sync_files_with_checksum_detects_same_size_changes(self):
+        source = self.get_sync_source()
+        output = get_temp_dir()
+        copier.sync_files([(source, output)], output, checksum=True)
+        manifest = copier.load_sync_manifest(output)
+        assert 'sha1' in manifest['src/a.c']
+
+        # same size and mtime but a different content
+        target = os.path.join(output, 'src', 'a.c')
+        st = os.stat(target)
+        with open(target, 'w') as f:
+            f.write('z')
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        stats = {}
+        copier.sync_files([(source, output)], output, stats=stats)
+        assert 0 == stats['files']
+        stats = {}
+        copier.sync_files([(source, output)], output, checksum=True, stats=stats)
+        assert (1, 1) == (stats['files'], stats['unchanged'])
+        with open(target) as f:
+            assert 'a' == f.read()
+
+    def test_sync_files_delete_removes_only_previously_synced_files(self):
+        source = self.get_sync_source()
+        output = get_temp_dir()
+        copier.sync_files([(source, output)], output)
+        with open(os.path.join(output, 'other.txt'), 'w') as f:
+            f.write('not synced')
+
+        stats = {}
+        copies = [(os.path.join(source, 'a.c'), os.path.join(output, 'src'))]
+        errors = copier.sync_files(copies, output, delete=True, stats=stats)
+        assert [] == errors
+        assert (1, 1) == (stats['unchanged'], stats['deleted'])
+        expected = [copier.SYNC_MANIFEST, 'other.txt', os.path.join('src', 'a.c')]
+        assert expected == self.get_tree(output)
+        assert not os.path.exists(os.path.join(output, 'src', 'sub'))
+        assert ['src/a.c'] == list(copier.load_sync_manifest(output))
+
+    def test_sync_files_delete_keeps_the_files_whose_copy_failed(self):
+        source = self.get_sync_source()
+        output = get_temp_dir()
+        copier.sync_files([(source, output)], output)
+        with open(os.path.join(source, 'a.c'), 'w') as f:
+            f.write('changed')
+
+        failed = [(0, Error(CRITICAL, 'Cannot copy'))]
+        with mock.patch('attributecode.copier.copy_file_list', return_value=failed):
+            stats = {}
+            errors = copier.sync_files([(source, output)], output, delete=True, stats=stats)
+        assert 1 == len(errors)
+        assert 0 == stats['deleted']
+        assert os.path.exists(os.path.join(output, 'src', 'a.c'))
+
+    def test_remove_file_removes_empty_parents_under_a_relative_root(self):
+        test_dir = get_temp_dir()
+        location = os.path.join(test_dir, 'output', 'src', 'sub', 'b.c')
+        os.makedirs(os.path.dirname(location))
+        with open(location, 'w') as f:
+            f.write('b')
+        cwd = os.getcwd()
+        os.chdir(test_dir)
+        try:
+            copier.remove_file(os.path.join('output', 'src', 'sub', 'b.c'), 'output')
+        finally:
+            os.chdir(cwd)
+        assert [] == os.listdir(os.path.join(test_dir, 'output'))
+
+    def test_remove_file_does_not_remove_a_sibling_of_root_with_the_same_prefix(self):
+        test_dir = get_temp_dir()
+        location = os.path.join(test_dir, 'output2', 'b.c')
+        os.makedirs(os.path.dirname(location))
+        with open(location, 'w') as f:
+            f.write('b')
+        copier.remove_file(location, os.path.join(test_dir, 'output'))
+        assert ['output2'] == os.listdir(test_dir)
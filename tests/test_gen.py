@@ -14,7 +14,9 @@
 #  limitations under the License.
 # ============================================================================
 
+import os
 import unittest
+from unittest import mock
 
 from testing_utils import get_temp_dir
 from testing_utils import get_test_loc
@@ -103,6 +105,17 @@ custom1: |
         result = [a.dumps() for a in abouts]
         assert expected == result[0]
 
+    def test_load_inventory_jsonl(self):
+        location = get_test_loc('test_gen/inv.jsonl')
+        base_dir = get_temp_dir()
+        errors, abouts = gen.load_inventory(location, base_dir=base_dir)
+
+        assert 2 == len(abouts)
+        assert 'AboutCode' == abouts[0].name.value
+        assert ['apache-2.0'] == abouts[0].license_key.value
+        assert 'test.c' == abouts[1].name.value
+        assert [] == [e for e in errors if e.severity > INFO]
+
     def test_load_inventory_without_about_resource(self):
         location = get_test_loc('test_gen/inv_no_about_resource.csv')
         base_dir = get_temp_dir()
@@ -251,6 +264,132 @@ licenses:
         assert abouts[0].about_resource.value == expected
         assert len(errors) == 1
 
+    def test_generate_with_processes_writes_the_same_files(self):
+        location = get_test_loc('test_gen/parallel/inv.csv')
+        serial_dir = get_temp_dir()
+        parallel_dir = get_temp_dir()
+
+        serial_errors, _abouts = gen.generate(location, serial_dir)
+        parallel_errors, abouts = gen.generate(
+            location, parallel_dir, processes=2)
+        serial_errors = [e.message.replace(serial_dir, '') for e in serial_errors]
+        parallel_errors = [e.message.replace(parallel_dir, '') for e in parallel_errors]
+        assert serial_errors == parallel_errors
+        assert 6 == len(abouts)
+
+        def get_files(base_dir):
+            files = {}
+            for top, _dirs, filenames in os.walk(base_dir):
+                for filename in filenames:
+                    path = os.path.join(top, filename)
+                    with open(path) as f:
+                        files[os.path.relpath(path, base_dir)] = f.read()
+            return files
+
+        serial_files = get_files(serial_dir)
+        assert 6 == len(serial_files)
+        assert serial_files == get_files(parallel_dir)
+
+    def test_generate_with_skip_unchanged_does_not_rewrite_files(self):
+        location = get_test_loc('test_gen/parallel/inv.csv')
+        base_dir = get_temp_dir()
+        stats = {}
+        gen.generate(location, base_dir, stats=stats)
+        assert {'written': 6, 'unchanged': 0} == stats
+
+        x_about = os.path.join(base_dir, 'project', 'a', 'x.c.ABOUT')
+        y_about = os.path.join(base_dir, 'project', 'a', 'b', 'y.c.ABOUT')
+        os.utime(x_about, (1000000000, 1000000000))
+        with open(y_about, 'a') as f:
+            f.write('notes: changed\n')
+
+        stats = {}
+        gen.generate(location, base_dir, skip_unchanged=True,
+                     atomic=True, stats=stats)
+        assert {'written': 1, 'unchanged': 5} == stats
+        assert 1000000000 == os.path.getmtime(x_about)
+        with open(y_about) as f:
+            assert 'notes' not in f.read()
+        assert 6 == sum(len(files) for _, _, files in os.walk(base_dir))
+
+    def get_license_dict(self):
+        return {
+            'mit': ['MIT License', 'mit.LICENSE', 'MIT text', 'https://mit', 'MIT'],
+            'apache-2.0': ['Apache 2.0', 'apache-2.0.LICENSE', 'Apache text',
+                           'https://apache', 'Apache-2.0'],
+            'gpl-2.0': ['GPL 2.0', 'gpl-2.0.LICENSE', 'GPL text', 'https://gpl', 'GPL-2.0'],
+            'bsd-new': ['BSD-3-Clause', 'bsd-new.LICENSE', 'BSD text', 'https://bsd', 'BSD-3-Clause'],
+        }
+
+    @mock.patch('attributecode.model.pre_process_and_fetch_license_dict')
+    def test_generate_with_license_dir_references_shared_license_paths(self, mock_fetch):
+        mock_fetch.return_value = self.get_license_dict(), []
+        location = get_test_loc('test_gen/parallel/inv.csv')
+        base_dir = get_temp_dir()
+        license_dir = os.path.join(base_dir, 'licenses')
+
+        _errors, abouts = gen.generate(
+            location, base_dir, fetch_license=True, license_dir=license_dir)
+        assert ['apache-2.0.LICENSE', 'bsd-new.LICENSE', 'gpl-2.0.LICENSE',
+                'mit.LICENSE'] == sorted(os.listdir(license_dir))
+        x_dir = os.path.join(base_dir, 'project', 'a')
+        assert not os.path.exists(os.path.join(x_dir, 'mit.LICENSE'))
+        with open(os.path.join(x_dir, 'x.c.ABOUT')) as f:
+            assert 'file: ../../licenses/mit.LICENSE' in f.read()
+        assert 6 == len(abouts)
+
+    @mock.patch('attributecode.model.pre_process_and_fetch_license_dict')
+    def test_generate_with_license_dir_and_hardlinks(self, mock_fetch):
+        mock_fetch.return_value = self.get_license_dict(), []
+        location = get_test_loc('test_gen/parallel/inv.csv')
+        base_dir = get_temp_dir()
+        license_dir = os.path.join(base_dir, 'licenses')
+
+        gen.generate(location, base_dir, fetch_license=True,
+                     license_dir=license_dir, license_reference='hardlink')
+        shared = os.path.join(license_dir, 'mit.LICENSE')
+        x_license = os.path.join(base_dir, 'project', 'a', 'mit.LICENSE')
+        u_license = os.path.join(base_dir, 'project', 'e', 'mit.LICENSE')
+        assert os.path.samefile(shared, x_license)
+        assert os.path.samefile(shared, u_license)
+        with open(os.path.join(base_dir, 'project', 'a', 'x.c.ABOUT')) as f:
+            assert 'file: mit.LICENSE' in f.read()
+
+    def test_generate_with_reference_and_hardlink_copy_strategy(self):
+        test_dir = get_test_loc('test_gen/reference')
+        location = os.path.join(test_dir, 'inv.csv')
+        reference_dir = os.path.join(test_dir, 'licenses')
+        base_dir = get_temp_dir()
+
+        errors, abouts = gen.generate(
+            location, base_dir, reference_dir=reference_dir,
+            copy_strategy='hardlink')
+        assert [] == [e for e in errors if e.severity >= ERROR]
+        assert 3 == len(abouts)
+        reference = os.path.join(reference_dir, 'mit.LICENSE')
+        for path in ('a', 'b'):
+            copied = os.path.join(base_dir, 'project', path, 'mit.LICENSE')
+            assert os.path.samefile(reference, copied)
+
+    def test_write_about_files_returns_errors_in_jobs_order(self):
+        location = get_test_loc('test_gen/parallel/inv.csv')
+        base_dir = get_temp_dir()
+        _errors, abouts = gen.load_inventory(location, base_dir=base_dir)
+        # a file where a directory is expected cannot be written to
+        not_a_dir = os.path.join(base_dir, 'not_a_dir')
+        with open(not_a_dir, 'w') as f:
+            f.write('')
+        jobs = [
+            (abouts[0], os.path.join(base_dir, 'x.c.ABOUT'), {}),
+            (abouts[1], os.path.join(not_a_dir, 'y.c.ABOUT'), {}),
+            (abouts[2], os.path.join(base_dir, 'z', 'z.c.ABOUT'), {}),
+        ]
+        for processes in (1, 2):
+            results = gen.write_about_files(jobs, processes)
+            errors = [error for error, _written in results]
+            assert [None, ERROR, None] == [e and e.severity for e in errors]
+            assert 'y.c.ABOUT' in errors[1].message
+
     def test_generate(self):
         location = get_test_loc('test_gen/inv.csv')
         base_dir = get_temp_dir()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+import sqlite3
+import unittest
+
+from testing_utils import get_temp_dir
+from testing_utils import get_temp_file
+from testing_utils import get_test_loc
+
+from attributecode import CRITICAL
+from attributecode import gen
+from attributecode import model
+from attributecode.inventory_db import InvalidQueryError
+from attributecode.inventory_db import load_sqlite
+
+
+class InventoryDbTest(unittest.TestCase):
+
+    def get_inventory_db(self):
+        test_dir = get_test_loc('test_inventory_db/project')
+        _errors, abouts = model.collect_inventory(test_dir)
+        result = get_temp_file('inventory.sqlite')
+        model.write_output(abouts, result, format='sqlite')
+        return result
+
+    def test_write_output_sqlite_creates_normalized_tables(self):
+        result = self.get_inventory_db()
+        conn = sqlite3.connect(result)
+        components = conn.execute(
+            'SELECT name, about_resource, package_url, redistribute '
+            'FROM components ORDER BY name').fetchall()
+        expected = [
+            ('bar', '/bar/', None, None),
+            ('baz', '/baz/', None, 'yes'),
+            ('foo', '/foo/', 'pkg:pypi/foo@1.0', 'yes'),
+        ]
+        assert expected == components
+
+        licenses = conn.execute(
+            'SELECT key, name, file FROM licenses ORDER BY key').fetchall()
+        expected = [
+            ('gpl-2.0', 'GPL 2.0', 'gpl-2.0.LICENSE'),
+            ('gpl-3.0-plus', 'GPL 3.0 or later', 'gpl-3.0-plus.LICENSE'),
+            ('mit', 'MIT License', 'mit.LICENSE'),
+        ]
+        assert expected == licenses
+
+        links = conn.execute(
+            'SELECT count(*) FROM component_licenses').fetchone()
+        assert (4,) == links
+
+        customs = conn.execute(
+            'SELECT value FROM custom_fields WHERE name = ? ORDER BY value',
+            ('audit_ref',)).fetchall()
+        assert [('A-1',), ('A-3',)] == customs
+        conn.close()
+
+    def test_write_output_sqlite_replaces_existing_database(self):
+        result = self.get_inventory_db()
+        _errors, abouts = model.collect_inventory(
+            get_test_loc('test_inventory_db/project/bar'))
+        model.write_output(abouts, result, format='sqlite')
+        assert ['bar'] == [r['name'] for r in load_sqlite(result)]
+
+    def test_load_sqlite_returns_json_like_records(self):
+        result = self.get_inventory_db()
+        records = load_sqlite(result)
+        assert ['bar', 'baz', 'foo'] == sorted(r['name'] for r in records)
+        foo = [r for r in records if r['name'] == 'foo'][0]
+        assert '1.0' == foo['version']
+        assert 'A-1' == foo['audit_ref']
+        expected = [
+            {'key': 'gpl-2.0', 'name': 'GPL 2.0', 'file': 'gpl-2.0.LICENSE'},
+            {'key': 'mit', 'name': 'MIT License', 'file': 'mit.LICENSE'},
+        ]
+        assert expected == foo['licenses']
+
+    def test_load_sqlite_with_query(self):
+        result = self.get_inventory_db()
+        query = "SELECT id FROM components WHERE redistribute = 'yes'"
+        records = load_sqlite(result, query)
+        assert ['baz', 'foo'] == sorted(r['name'] for r in records)
+        baz = [r for r in records if r['name'] == 'baz'][0]
+        assert 'A-3' == baz['audit_ref']
+        assert ['gpl-3.0-plus'] == [l['key'] for l in baz['licenses']]
+
+    def test_load_sqlite_with_a_query_of_several_columns_uses_the_first_one(self):
+        result = self.get_inventory_db()
+        query = "SELECT id, name FROM components WHERE redistribute = 'yes'"
+        records = load_sqlite(result, query)
+        assert ['baz', 'foo'] == sorted(r['name'] for r in records)
+
+    def test_load_sqlite_with_an_invalid_query_raises_an_error(self):
+        result = self.get_inventory_db()
+        with self.assertRaises(InvalidQueryError) as cm:
+            load_sqlite(result, 'SELEC bad')
+        assert "Invalid SQL query: 'SELEC bad'" in str(cm.exception)
+
+    def test_load_sqlite_only_accepts_a_single_select_statement(self):
+        result = self.get_inventory_db()
+        query = "SELECT id FROM components WHERE name = 'a;b';"
+        assert [] == load_sqlite(result, query)
+        for query, reason in (
+                ('DELETE FROM components', 'not a SELECT statement'),
+                ('SELECT id FROM components; DROP TABLE components',
+                 'only a single SELECT statement is supported')):
+            with self.assertRaises(InvalidQueryError) as cm:
+                load_sqlite(result, query)
+            assert 'Invalid SQL query: %r: %s' % (query, reason) == str(cm.exception)
+        assert load_sqlite(result)
+
+    def test_load_inventory_from_sqlite_with_an_invalid_query(self):
+        result = self.get_inventory_db()
+        errors, abouts = gen.load_inventory(
+            result, base_dir=get_temp_dir(), query='SELEC bad')
+        assert [] == abouts
+        assert [CRITICAL] == [e.severity for e in errors]
+        assert "Invalid SQL query: 'SELEC bad'" in errors[0].message
+
+    def test_load_inventory_from_sqlite_with_query(self):
+        result = self.get_inventory_db()
+        query = ('SELECT component_id FROM component_licenses '
+                 'JOIN licenses ON licenses.id = component_licenses.license_id '
+                 "WHERE licenses.key GLOB 'gpl-*'")
+        _errors, abouts = gen.load_inventory(
+            result, base_dir=get_temp_dir(), query=query)
+        assert ['baz', 'foo'] == sorted(a.name.value for a in abouts)
+        foo = [a for a in abouts if a.name.value == 'foo'][0]
+        assert ['gpl-2.0', 'mit'] == foo.license_key.value
+        assert 'A-1' == foo.custom_fields['audit_ref'].value
@@ -19,6 +19,7 @@ import json
 import os
 import posixpath
 import shutil
+import tracemalloc
 import unittest
 from unittest import mock
 
@@ -39,6 +40,7 @@ from testing_utils import extract_test_loc
 from testing_utils import get_temp_dir
 from testing_utils import get_temp_file
 from testing_utils import get_test_loc
+from testing_utils import run_benchmarks
 
 
 def check_csv(expected, result, regen=False, fix_cell_linesep=False):
@@ -397,6 +399,97 @@ class AboutTest(unittest.TestCase):
         result = [f.name for f in a.all_fields() if f.present]
         assert expected == result
 
+    def test_About_standard_fields_are_shared_and_compact(self):
+        test_file = get_test_loc('test_model/parse/ordered_fields.ABOUT')
+        a = model.About(test_file)
+        assert a.name is a.fields['name']
+        assert 'old' == a.name.value
+        assert [name for name, _cls in model.About.standard_fields] == list(a.fields)
+        # the standard fields are not stored in the About attributes
+        assert not set(vars(a)).intersection(a.fields)
+        assert all(not hasattr(f, '__dict__') for f in a.all_fields())
+        assert a.name.required and not a.version.required
+
+    @unittest.skipUnless(run_benchmarks, 'Set ABOUTCODE_RUN_BENCHMARKS to run the benchmarks')
+    def test_About_memory_usage(self):
+        # A benchmark of the memory used by About objects: about 11.6KB per
+        # empty About with a dict per field and the fields set as attributes
+        # and about 8.3KB with slotted fields and a shared schema.
+        tracemalloc.start()
+        try:
+            abouts = [model.About() for _ in range(1000)]
+            used, _peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert len(abouts) == 1000
+        assert used / 1000 < 10000
+
+    def test_About_hydrate_with_a_shared_custom_field_registry(self):
+        registry = model.CustomFieldRegistry()
+        fields = [('name', 'foo'), ('My_Field', 'a'), ('other', 'b'), ('bad name', 'c')]
+        a1 = model.About()
+        errors1 = a1.hydrate(fields, registry)
+        a2 = model.About()
+        errors2 = a2.hydrate(fields, registry)
+
+        expected = [
+            Error(WARNING, "Field name: ['bad name'] contains illegal name "
+                           "characters (or empty spaces) and is ignored."),
+        ]
+        assert expected == errors1 == errors2
+        # the custom fields are reported once per run
+        assert ['My_Field', 'other'] == list(registry.found_names)
+        expected = Error(INFO, "Field ['My_Field', 'other'] is a custom field.")
+        assert expected == registry.get_found_error()
+        assert 'custom-field' == registry.get_found_error().code
+        assert None is model.CustomFieldRegistry().get_found_error()
+        assert ['my_field', 'other'] == list(a1.custom_fields)
+        assert a1.my_field is a1.custom_fields['my_field']
+        assert 'a' == a2.my_field.value
+
+    def test_About_hydrate_reports_custom_fields_with_reserved_names(self):
+        a = model.About()
+        errors = a.hydrate([('dumps', 'a'), ('location', 'b'), ('fine', 'c')])
+        expected = [
+            Error(CRITICAL, "Internal error with custom field: 'dumps': 'a'."),
+            Error(CRITICAL, "Internal error with custom field: 'location': 'b'."),
+        ]
+        assert expected == errors
+        assert model.About.reserved_names <= set(dir(model.About))
+        assert {'dumps', 'name', 'reserved_names'} <= model.About.reserved_names
+
+    def test_About_lazy_has_the_same_errors_and_values_after_validate_all(self):
+        test_file = get_temp_file('test.ABOUT')
+        with open(test_file, 'w') as abt:
+            abt.write('about_resource: missing.c\nversion: 1.0\n'
+                      'download_url: x:/invalid\nlicense_file: missing.LICENSE\n'
+                      'redistribute: maybe\nmy_field: custom\n')
+        eager = model.About(test_file, 'test.ABOUT')
+        lazy = model.About(test_file, 'test.ABOUT', lazy=True)
+        assert len(eager.errors) > len(lazy.errors)
+
+        errors = lazy.validate_all()
+        assert eager.errors == lazy.errors
+        assert all(e in eager.errors for e in errors)
+        assert not lazy.lazy
+        assert eager == lazy
+        # validating again does not duplicate the errors
+        lazy.validate_all()
+        assert eager.errors == lazy.errors
+
+    def test_About_lazy_validates_a_field_on_first_access(self):
+        test_file = get_test_loc('test_model/parse/ordered_fields.ABOUT')
+        a = model.About(test_file, lazy=True)
+        assert all(f.pending_validation is not None for f in a.all_fields())
+
+        assert 'old' == a.name.value
+        assert a.name.pending_validation is None
+        assert a.download_url.pending_validation is not None
+
+        a.version.value = 'explicit'
+        assert a.version.pending_validation is None
+        assert 'explicit' == a.version.value
+
     def test_About_duplicate_field_names_are_detected_with_different_case(self):
         # This test is failing because the YAML does not keep the order when
         # loads the test files. For instance, it treat the 'About_Resource' as the
@@ -438,14 +531,12 @@ class AboutTest(unittest.TestCase):
             'notice_file',
             'about_resource'])
 
-        expected_errors = [
-            Error(INFO, 'Custom Field: date'),
-            Error(INFO, 'Custom Field: license_spdx'),
-            Error(INFO, 'Custom Field: license_text_file')]
-
-        errors = about.hydrate(fields)
+        registry = model.CustomFieldRegistry()
+        errors = about.hydrate(fields, registry)
 
-        assert expected_errors == errors
+        assert [] == errors
+        expected_custom_fields = ['date', 'license_spdx', 'license_text_file']
+        assert expected_custom_fields == list(registry.found_names)
 
         result = set([f.name for f in about.all_fields() if f.present])
         assert expected == result
@@ -512,6 +603,14 @@ class AboutTest(unittest.TestCase):
         result = a.errors
         assert expected == result
 
+    def test_About_errors_have_the_code_of_their_condition(self):
+        test_file = get_test_loc('test_model/parse/missing_required.ABOUT')
+        assert ['field-required'] == [e.code for e in model.About(test_file).errors]
+        test_file = get_test_loc('test_model/parse/empty_required.ABOUT')
+        assert ['field-required'] == [e.code for e in model.About(test_file).errors]
+        test_file = get_test_loc('test_model/parse/empty_notice_field.about')
+        assert ['field-empty'] == [e.code for e in model.About(test_file).errors]
+
     def test_About_has_errors_with_empty_notice_file_field(self):
         test_file = get_test_loc('test_model/parse/empty_notice_field.about')
         a = model.About(test_file)
@@ -551,7 +650,6 @@ class AboutTest(unittest.TestCase):
         test_file = get_test_loc('test_model/parse/illegal_custom_field.about')
         a = model.About(test_file)
         expected_errors = [
-            Error(INFO, 'Custom Field: hydrate'),
             Error(
                 CRITICAL, "Internal error with custom field: 'hydrate': 'illegal name'.")
         ]
@@ -833,8 +931,6 @@ licenses:
         test_file = get_test_loc('test_model/parse/complete2/about.ABOUT')
         a = model.About(test_file)
         expected_error = [
-            Error(INFO, 'Custom Field: custom1'),
-            Error(INFO, 'Custom Field: custom2'),
             Error(INFO, 'Field custom2 is present but empty.')
         ]
         assert sorted(expected_error) == sorted(a.errors)
@@ -873,8 +969,6 @@ modified: yes
         test_file = get_test_loc('test_model/parse/complete2/about.ABOUT')
         a = model.About(test_file)
         expected_error = [
-            Error(INFO, 'Custom Field: custom1'),
-            Error(INFO, 'Custom Field: custom2'),
             Error(INFO, 'Field custom2 is present but empty.')
         ]
         assert sorted(expected_error) == sorted(a.errors)
@@ -923,11 +1017,6 @@ custom1: |
             test_file), 'nose-selecttests-0.3.zip')
         err_msg = 'Field about_resource: Path %s not found' % file_path
         errors = [
-            Error(INFO, 'Custom Field: dje_license'),
-            Error(INFO, 'Custom Field: license_text_file'),
-            Error(INFO, 'Custom Field: scm_tool'),
-            Error(INFO, 'Custom Field: scm_repository'),
-            Error(INFO, 'Custom Field: test'),
             Error(INFO, err_msg)]
 
         assert errors == a.errors
@@ -1064,6 +1153,22 @@ custom1: |
         expected = get_test_loc('test_model/expected.json')
         check_json(expected, result)
 
+    def test_write_output_jsonl(self):
+        path = 'test_model/this.ABOUT'
+        test_file = get_test_loc(path)
+        abouts = model.About(location=test_file, about_file_path=path)
+
+        result = get_temp_file()
+        model.write_output([abouts, abouts], result, format='jsonl')
+
+        expected = get_test_loc('test_model/expected.json')
+        with open(expected) as e:
+            expected = json.load(e)
+        with open(result) as r:
+            lines = r.read().splitlines()
+        assert 2 == len(lines)
+        assert expected == [json.loads(line) for line in lines[:1]]
+
     def test_android_module_license(self):
         path = 'test_model/android/single_license.c.ABOUT'
         test_file = get_test_loc(path)
@@ -1289,6 +1394,36 @@ class CollectorTest(unittest.TestCase):
         expected = get_test_loc('test_model/inventory/complex/expected.csv')
         check_csv(expected, result, fix_cell_linesep=True, regen=False)
 
+    def test_collect_inventory_with_paths_load_profile_has_the_same_output(self):
+        location = get_test_loc('test_model/inventory/complex')
+        result = get_temp_file()
+        errors, abouts = model.collect_inventory(location, load_profile='paths')
+
+        about = [a for a in abouts if a.about_file_path.endswith('/about.ABOUT')][0]
+        license_location = about.license_file.value['apache-2.0.LICENSE']
+        assert license_location.endswith('/apache-2.0.LICENSE')
+        assert os.path.exists(license_location)
+
+        model.write_output(abouts, result, format='csv')
+        assert all(e.severity == INFO for e in errors)
+        expected = get_test_loc('test_model/inventory/complex/expected.csv')
+        check_csv(expected, result, fix_cell_linesep=True, regen=False)
+
+    def test_collect_inventory_with_paths_load_profile_reports_the_same_errors(self):
+        test_dir = get_temp_dir()
+        with open(os.path.join(test_dir, 'this.ABOUT'), 'w') as abt:
+            abt.write('about_resource: .\nname: this\nlicense_file: lic\nnotice_file: NOTICE\n')
+        # a directory cannot be read as a text file
+        os.makedirs(os.path.join(test_dir, 'lic'))
+        with open(os.path.join(test_dir, 'NOTICE'), 'w') as notice:
+            notice.write('notice')
+
+        expected, _ = model.collect_inventory(test_dir, load_profile='texts')
+        errors, abouts = model.collect_inventory(test_dir, load_profile='paths')
+        assert expected == errors
+        assert any('Failed to load text at path: lic' in e.message for e in errors)
+        assert abouts[0].notice_file.value['NOTICE'].endswith('NOTICE')
+
     def test_collect_inventory_does_not_convert_lf_to_crlf_from_directory(self):
         location = get_test_loc('test_model/crlf/about.ABOUT')
         result = get_temp_file()
@@ -1358,6 +1493,113 @@ class CollectorTest(unittest.TestCase):
             assert copy_list == expected
 
 
+class CopyPlanTest(unittest.TestCase):
+
+    def test_get_copy_plan_collapses_descendants_of_directories(self):
+        resources = [
+            ('/a/b/c.txt', False),
+            ('/a/b/', True),
+            ('/a/', True),
+            ('/a/d/e', True),
+            ('/f.txt', False),
+            ('/g/h.txt', False),
+        ]
+        expected = ['/a/', '/f.txt', '/g/h.txt']
+        assert expected == model.get_copy_plan(resources)
+
+    def test_get_copy_plan_does_not_match_path_prefixes(self):
+        resources = [
+            ('/foo', True),
+            ('/foobar', True),
+            ('/foobar.txt', False),
+            ('/foo/bar.txt', False),
+        ]
+        expected = ['/foo', '/foobar', '/foobar.txt']
+        assert expected == model.get_copy_plan(resources)
+
+    def test_get_copy_plan_removes_duplicates(self):
+        resources = [
+            ('/a', True),
+            ('/a/', True),
+            ('/b.txt', False),
+            ('/b.txt', False),
+        ]
+        assert ['/a', '/b.txt'] == model.get_copy_plan(resources)
+
+    def test_get_copy_plan_with_root_directory(self):
+        resources = [('/a.txt', False), ('', True), ('/b/', True)]
+        assert [''] == model.get_copy_plan(resources)
+
+    def test_get_copy_plan_with_100k_resources(self):
+        # 1000 directories with 100 files each: the even directories are
+        # selected and their files collapsed
+        resources = []
+        for d in range(1000):
+            directory = '/project/dir%(d)d' % locals()
+            if not d % 2:
+                resources.append((directory, True))
+            for f in range(100):
+                resources.append(('%(directory)s/file%(f)d.c' % locals(), False))
+        assert len(resources) > 100000
+
+        plan = model.get_copy_plan(resources)
+        assert 500 + 500 * 100 == len(plan)
+        assert '/project/dir0' == plan[0]
+        assert '/project/dir1/file0.c' == plan[1]
+        assert '/project/dir0/file0.c' not in plan
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def test_load_snapshot_returns_the_saved_abouts_and_errors(self):
+        test_loc = get_test_loc('test_model/collect_inventory_errors')
+        errors, abouts = model.collect_inventory(test_loc)
+        snapshot = get_temp_file('about.snapshot')
+        model.save_snapshot(snapshot, test_loc, errors, abouts)
+
+        location, loaded_errors, loaded_abouts = model.load_snapshot(snapshot)
+        assert test_loc == location
+        assert errors == loaded_errors
+        assert len(abouts) == len(loaded_abouts)
+        for about, loaded in zip(abouts, loaded_abouts):
+            assert about == loaded
+            assert about.about_file_path == loaded.about_file_path
+            assert about.errors == loaded.errors
+            assert [e.code for e in about.errors] == [e.code for e in loaded.errors]
+            assert list(about.custom_fields) == list(loaded.custom_fields)
+        assert [e.code for e in errors] == [e.code for e in loaded_errors]
+
+    def test_load_snapshot_with_custom_fields_and_licenses(self):
+        test_loc = get_test_loc('test_inventory_db/project')
+        errors, abouts = model.collect_inventory(test_loc)
+        snapshot = get_temp_file('about.snapshot')
+        model.save_snapshot(snapshot, test_loc, errors, abouts)
+        _location, _errors, loaded_abouts = model.load_snapshot(snapshot)
+
+        expected = model.about_object_to_list_of_dictionary(abouts)
+        result = model.about_object_to_list_of_dictionary(loaded_abouts)
+        assert expected == result
+
+    def test_load_snapshot_rejects_an_invalid_file(self):
+        snapshot = get_temp_file('about.snapshot')
+        with open(snapshot, 'wb') as s:
+            s.write(b'not a snapshot')
+        location, errors, abouts = model.load_snapshot(snapshot)
+        assert location is None
+        assert [] == abouts
+        assert [CRITICAL] == [e.severity for e in errors]
+
+    def test_load_snapshot_rejects_another_snapshot_version(self):
+        snapshot = get_temp_file('about.snapshot')
+        model.save_snapshot(snapshot, get_temp_dir(), [], [])
+        with open(snapshot, 'r+b') as s:
+            s.seek(len(model.SNAPSHOT_MAGIC))
+            s.write((model.SNAPSHOT_VERSION + 1).to_bytes(2, 'big'))
+        location, errors, abouts = model.load_snapshot(snapshot)
+        assert location is None
+        assert [CRITICAL] == [e.severity for e in errors]
+
+
 class FetchLicenseTest(unittest.TestCase):
 
     @mock.patch.object(model, 'get')
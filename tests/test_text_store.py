@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+import os
+import unittest
+
+from testing_utils import get_temp_dir
+from testing_utils import write_file
+
+from attributecode import INFO
+from attributecode import model
+from attributecode.text_store import TextStore
+
+
+class TextStoreTest(unittest.TestCase):
+
+    def test_get_text_reads_each_location_once(self):
+        test_dir = get_temp_dir()
+        location = write_file(os.path.join(test_dir, 'mit.LICENSE'), 'MIT text')
+        store = TextStore()
+        text = store.get_text(location)
+        assert 'MIT text' == text
+        os.remove(location)
+        assert text is store.get_text(location)
+        expected = dict(files=1, texts=1, references=2, bytes_saved=8)
+        assert expected == store.stats
+
+    def test_get_text_shares_the_same_text_of_different_files(self):
+        test_dir = get_temp_dir()
+        loc1 = write_file(os.path.join(test_dir, 'a', 'mit.LICENSE'), 'MIT text')
+        loc2 = write_file(os.path.join(test_dir, 'b', 'mit.LICENSE'), 'MIT text')
+        loc3 = write_file(os.path.join(test_dir, 'b', 'bsd.LICENSE'), 'BSD text')
+        store = TextStore()
+        text1 = store.get_text(loc1)
+        text2 = store.get_text(loc2)
+        text3 = store.get_text(loc3)
+        assert text1 is text2
+        assert 'BSD text' == text3
+        expected = dict(files=3, texts=2, references=3, bytes_saved=8)
+        assert expected == store.stats
+        assert '3 license and notice texts loaded from 3 files as 2 distinct texts, 8 bytes shared.' == store.format_stats()
+
+    def test_get_text_raises_for_a_missing_file(self):
+        store = TextStore()
+        location = os.path.join(get_temp_dir(), 'missing.LICENSE')
+        self.assertRaises(Exception, store.get_text, location)
+        assert {} == store.locations
+
+    def test_collect_inventory_shares_the_license_texts(self):
+        test_dir = get_temp_dir()
+        license_text = 'Permission is hereby granted...\n' * 100
+        for name in ('a', 'b', 'c'):
+            write_file(os.path.join(test_dir, name, 'mit.LICENSE'), license_text)
+            write_file(os.path.join(test_dir, name, name + '.ABOUT'),
+                       'about_resource: .\nname: %s\nlicense_file: mit.LICENSE\n' % name)
+        store = TextStore()
+        errors, abouts = model.collect_inventory(test_dir, text_store=store)
+        assert [] == [e for e in errors if e.severity > INFO]
+        texts = [list(a.license_file.value.values())[0] for a in abouts]
+        assert [license_text] * 3 == texts
+        assert texts[0] is texts[1] is texts[2]
+        assert 1 == store.stats['texts']
+        assert 2 * len(license_text) == store.stats['bytes_saved']
+
+    def test_collect_inventory_paths_profile_does_not_use_the_store(self):
+        test_dir = get_temp_dir()
+        write_file(os.path.join(test_dir, 'mit.LICENSE'), 'MIT text')
+        write_file(os.path.join(test_dir, 'a.ABOUT'),
+                   'about_resource: .\nname: a\nlicense_file: mit.LICENSE\n')
+        store = TextStore()
+        model.collect_inventory(test_dir, load_profile='paths', text_store=store)
+        assert 0 == store.stats['references']
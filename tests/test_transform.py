@@ -17,6 +17,7 @@
 from collections import OrderedDict
 import unittest
 
+from testing_utils import get_temp_file
 from testing_utils import get_test_loc
 
 from attributecode.transform import check_duplicate_fields
@@ -27,6 +28,8 @@ from attributecode.transform import strip_trailing_fields_json
 from attributecode.transform import Transformer
 from attributecode.transform import read_csv_rows, read_excel, read_json
 from attributecode.transform import transform_csv, transform_excel, transform_json
+from attributecode.transform import transform_jsonl
+from attributecode.transform import write_jsonl
 
 
 class TransformTest(unittest.TestCase):
@@ -196,6 +199,28 @@ class TransformTest(unittest.TestCase):
         assert len(err) == 0
         assert data == expected
 
+    def test_transform_jsonl(self):
+        test_file = get_test_loc('test_transform/input.jsonl')
+        data, err = transform_jsonl(test_file)
+        expected = [{'Directory/Filename': '/aboutcode-toolkit/',
+                     'Component': 'AboutCode-toolkit',
+                     'Confirmed Version': '123', 'notes': ''},
+                    {'Directory/Filename': '/tmp/test.c',
+                     'Component': 'test.c',
+                     'Confirmed Version': '1', 'notes': 'test'}]
+        assert len(err) == 0
+        assert data == expected
+
+    def test_write_jsonl_writes_one_record_per_line(self):
+        test_file = get_test_loc('test_transform/input.jsonl')
+        data, _err = transform_jsonl(test_file)
+        result = get_temp_file('output.jsonl')
+        write_jsonl(result, data)
+        result_data, _err = transform_jsonl(result)
+        assert data == result_data
+        with open(result) as r:
+            assert 2 == len(r.read().splitlines())
+
     def test_apply_renamings(self):
         data = [OrderedDict([(u'Directory/Filename', u'/tmp/test.c'),
                              (u'Component', u'test.c'), (u'version', u'1'),
@@ -14,8 +14,14 @@
 #  limitations under the License.
 # ============================================================================
 
+import errno
+import os
 import string
+import timeit
 import unittest
+from unittest import mock
+from unittest import skipIf
+from unittest import skipUnless
 
 import saneyaml
 
@@ -24,8 +30,10 @@ from testing_utils import get_test_loc
 from testing_utils import get_temp_dir
 from testing_utils import on_posix
 from testing_utils import on_windows
+from testing_utils import run_benchmarks
 
 from attributecode import CRITICAL
+from attributecode import ERROR
 from attributecode import Error
 from attributecode import model
 from attributecode import util
@@ -312,6 +320,20 @@ class TestCsv(unittest.TestCase):
         result = util.load_csv(test_file)
         assert expected == result
 
+    def test_JsonLines_reads_the_file_again_on_each_iteration(self):
+        test_file = get_test_loc('test_gen/inv.jsonl')
+        rows = util.JsonLines(test_file)
+        names = [row['name'] for row in rows]
+        assert ['AboutCode', 'test.c'] == names
+        assert names == [row['name'] for row in rows]
+
+    def test_peek_reads_only_the_first_item_ahead(self):
+        items = iter([1, 2, 3])
+        first, items = util.peek(items)
+        assert 1 == first
+        assert [1, 2, 3] == list(items)
+        assert (None, []) == (util.peek([])[0], list(util.peek([])[1]))
+
     def test_load_csv_load_rows(self):
         test_file = get_test_loc('test_util/csv/about.csv')
         expected = [dict([
@@ -367,6 +389,46 @@ class TestCsv(unittest.TestCase):
         assert expected == result
 
 
+    def test_load_csv_inventory_normalizes_columns_and_strips_values(self):
+        test_file = get_test_loc('test_util/csv/about_key_with_upper_case.csv')
+        expected = [dict(
+                    [('about_file', 'about.ABOUT'),
+                     ('about_resource', '.'),
+                     ('name', 'ABOUT tool'),
+                     ('version', '0.8.1')])
+                    ]
+        errors, result = util.load_csv_inventory(test_file)
+        assert [] == errors
+        assert expected == result
+
+    def test_load_csv_inventory_rows_share_columns(self):
+        test_file = get_test_loc('test_util/csv/short_rows.csv')
+        expected = [
+            dict([('about_resource', 'foo.c'), ('name', 'foo'), ('version', '1.0')]),
+            dict([('about_resource', 'bar.c'), ('name', 'bar'), ('version', '')]),
+        ]
+        errors, result = util.load_csv_inventory(test_file)
+        assert [] == errors
+        assert expected == result
+        assert all(r.columns is result[0].columns for r in result)
+        assert all(isinstance(r.values, tuple) for r in result)
+
+    def test_load_csv_inventory_reports_duplicated_columns(self):
+        test_file = get_test_loc('test_gen/dup_keys_with_diff_case.csv')
+        expected = [Error(
+            ERROR, 'Duplicated column name(s): copyright with Copyright\nPlease correct the input and re-run.')]
+        errors, result = util.load_csv_inventory(test_file)
+        assert expected == errors
+        assert [] == result
+
+    def test_inventory_row_can_update_existing_column(self):
+        row = util.InventoryRow({'name': 0, 'about_resource': 1}, ('a', 'b/c'))
+        row['about_resource'] = 'c'
+        assert dict(name='a', about_resource='c') == row
+        assert 'name' in row
+        assert 'version' not in row
+
+
 class TestJson(unittest.TestCase):
 
     def test_load_json(self):
@@ -480,6 +542,162 @@ class TestJson(unittest.TestCase):
 
 class TestMiscUtils(unittest.TestCase):
 
+    def test_write_text_skip_unchanged(self):
+        location = os.path.join(get_temp_dir(), 'file.txt')
+        assert util.write_text(location, 'some\ntext\n', newline='\n')
+        assert not util.write_text(
+            location, 'some\ntext\n', newline='\n', skip_unchanged=True)
+        assert util.write_text(
+            location, 'other\ntext\n', newline='\n', skip_unchanged=True)
+        with open(location, 'rb') as f:
+            assert b'other\ntext\n' == f.read()
+
+    def test_write_text_atomic_replaces_file_without_temp_files(self):
+        test_dir = get_temp_dir()
+        location = os.path.join(test_dir, 'file.txt')
+        util.write_text(location, 'some text')
+        assert util.write_text(location, 'other text', atomic=True)
+        assert ['file.txt'] == os.listdir(test_dir)
+        with open(location) as f:
+            assert 'other text' == f.read()
+
+    @skipIf(on_windows, 'File modes are not supported on Windows')
+    def test_write_text_atomic_keeps_the_file_modes_of_a_regular_write(self):
+        test_dir = get_temp_dir()
+        regular = os.path.join(test_dir, 'regular.txt')
+        atomic = os.path.join(test_dir, 'atomic.txt')
+        util.write_text(regular, 'some text')
+        util.write_text(atomic, 'some text', atomic=True)
+        assert os.stat(regular).st_mode == os.stat(atomic).st_mode
+
+        os.chmod(atomic, 0o640)
+        util.write_text(atomic, 'other text', atomic=True)
+        assert 0o640 == os.stat(atomic).st_mode & 0o777
+
+    @skipIf(on_windows, 'Symlinks are not supported everywhere on Windows')
+    def test_link_file_symbolic_uses_relative_links(self):
+        test_dir = get_temp_dir()
+        source = os.path.join(test_dir, 'licenses', 'mit.LICENSE')
+        target = os.path.join(test_dir, 'foo', 'mit.LICENSE')
+        os.makedirs(os.path.dirname(source))
+        os.makedirs(os.path.dirname(target))
+        util.write_text(source, 'MIT')
+        util.write_text(target, 'outdated')
+
+        util.link_file(source, target, symbolic=True)
+        assert os.path.join('..', 'licenses', 'mit.LICENSE') == os.readlink(target)
+        with open(target) as f:
+            assert 'MIT' == f.read()
+
+    def test_link_file_copies_when_a_hard_link_is_not_possible(self):
+        test_dir = get_temp_dir()
+        source = os.path.join(test_dir, 'mit.LICENSE')
+        util.write_text(source, 'MIT')
+        cross_device = OSError(errno.EXDEV, 'Invalid cross-device link')
+        linked = os.path.join(test_dir, 'linked.LICENSE')
+        copied = os.path.join(test_dir, 'copied.LICENSE')
+        with mock.patch('os.link', side_effect=cross_device):
+            util.link_file(source, linked)
+            util.copy_single_file(source, copied, 'hardlink')
+        for target in (linked, copied):
+            assert not os.path.islink(target)
+            with open(target) as f:
+                assert 'MIT' == f.read()
+
+        denied = OSError(errno.EACCES, 'Permission denied')
+        with mock.patch('os.link', side_effect=denied):
+            target = os.path.join(test_dir, 'denied.LICENSE')
+            self.assertRaises(OSError, util.link_file, source, target)
+            assert not os.path.exists(target)
+
+    def test_copy_single_file_with_copy_strategies(self):
+        test_dir = get_temp_dir()
+        source = os.path.join(test_dir, 'mit.LICENSE')
+        util.write_text(source, 'MIT')
+        for strategy in ('copy', 'hardlink', 'reflink'):
+            target = os.path.join(test_dir, strategy + '.LICENSE')
+            util.copy_single_file(source, target, strategy)
+            assert not os.path.islink(target)
+            with open(target) as f:
+                assert 'MIT' == f.read()
+        assert os.path.samefile(source, os.path.join(test_dir, 'hardlink.LICENSE'))
+        assert not os.path.samefile(source, os.path.join(test_dir, 'reflink.LICENSE'))
+
+    def test_reflink_file_replaces_a_hardlink_to_the_source(self):
+        test_dir = get_temp_dir()
+        source = os.path.join(test_dir, 'mit.LICENSE')
+        target = os.path.join(test_dir, 'foo.LICENSE')
+        util.write_text(source, 'MIT')
+        os.link(source, target)
+        util.reflink_file(source, target)
+        assert not os.path.samefile(source, target)
+        for location in (source, target):
+            with open(location) as f:
+                assert 'MIT' == f.read()
+
+    @skipIf(on_windows, 'Symlinks are not supported everywhere on Windows')
+    def test_copy_single_file_with_symlink_strategy_replaces_target(self):
+        test_dir = get_temp_dir()
+        source = os.path.join(test_dir, 'mit.LICENSE')
+        target = os.path.join(test_dir, 'foo', 'mit.LICENSE')
+        os.makedirs(os.path.dirname(target))
+        util.write_text(source, 'MIT')
+        util.write_text(target, 'outdated')
+        util.copy_single_file(source, target, 'symlink')
+        assert os.path.join('..', 'mit.LICENSE') == os.readlink(target)
+
+    def test_copy_license_notice_files_skips_copied_references(self):
+        reference_dir = get_test_loc('test_gen/reference/licenses')
+        base_dir = get_temp_dir()
+        fields = [('license_file', 'mit.LICENSE')]
+        copied = set()
+        errors = util.copy_license_notice_files(
+            fields, base_dir, reference_dir, 'foo/x.c.ABOUT', 'copy', copied)
+        assert [] == errors
+        target = os.path.join(base_dir, 'foo', 'mit.LICENSE')
+        assert os.path.exists(target)
+        assert 1 == len(copied)
+
+        # a copied reference is not checked nor copied again
+        os.remove(target)
+        util.copy_license_notice_files(
+            fields, base_dir, reference_dir, 'foo/y.c.ABOUT', 'copy', copied)
+        assert not os.path.exists(target)
+
+    def test_copy_license_notice_files_does_not_skip_failed_copies(self):
+        reference_dir = get_test_loc('test_gen/reference/licenses')
+        base_dir = get_temp_dir()
+        fields = [('license_file', 'mit.LICENSE')]
+        copied = set()
+        error = Error(CRITICAL, 'Cannot copy')
+        with mock.patch('attributecode.util.copy_file', return_value=error):
+            errors = util.copy_license_notice_files(
+                fields, base_dir, reference_dir, 'foo/x.c.ABOUT', 'copy', copied)
+        assert [error] == errors
+        assert set() == copied
+
+        # a failed copy is tried again
+        errors = util.copy_license_notice_files(
+            fields, base_dir, reference_dir, 'foo/y.c.ABOUT', 'copy', copied)
+        assert [] == errors
+        assert os.path.exists(os.path.join(base_dir, 'foo', 'mit.LICENSE'))
+        assert 1 == len(copied)
+
+    def test_create_parent_dir_creates_missing_dirs_once(self):
+        base_dir = get_temp_dir()
+        location = os.path.join(base_dir, 'a', 'b', 'file.txt')
+        created_dirs = set()
+        parent = util.create_parent_dir(location, created_dirs)
+        assert os.path.isdir(parent)
+        assert {parent} == created_dirs
+
+        # a cached directory is not checked nor created again
+        os.rmdir(parent)
+        assert parent == util.create_parent_dir(location, created_dirs)
+        assert not os.path.exists(parent)
+        util.create_parent_dir(location)
+        assert os.path.isdir(parent)
+
     def test_load_yaml_about_file_with_no_dupe(self):
         test = '''
 name: test
@@ -605,6 +823,68 @@ description: sample
         results = util.unique(abouts)
         assert [a] == results
 
+    def test_unique_deduplicates_errors(self):
+        items = [Error(ERROR, 'a'), Error(CRITICAL, 'a'), Error(ERROR, 'a', 'some-code')]
+        expected = [Error(ERROR, 'a'), Error(CRITICAL, 'a')]
+        assert expected == util.unique(iter(items))
+
+    @skipUnless(run_benchmarks, 'Set ABOUTCODE_RUN_BENCHMARKS to run the benchmarks')
+    def test_unique_is_linear_for_hashable_items(self):
+        small = [Error(ERROR, 'message %d' % i) for i in range(1000)]
+        large = [Error(ERROR, 'message %d' % i) for i in range(20000)]
+        small_time = min(timeit.repeat(lambda: util.unique(small), number=5, repeat=3))
+        large_time = min(timeit.repeat(lambda: util.unique(large), number=5, repeat=3))
+        # a quadratic dedup is 400 times slower on the large list
+        assert large_time < small_time * 100
+
+
+class ErrorTest(unittest.TestCase):
+
+    def test_errors_are_hashable_values(self):
+        error = Error(ERROR, 'Field name: some message', 'some-code')
+        assert Error(ERROR, 'Field name: some message') == error
+        assert hash(Error(ERROR, 'Field name: some message')) == hash(error)
+        assert Error(CRITICAL, 'Field name: some message') != error
+        assert (ERROR, 'Field name: some message') != error
+        assert 1 == len({error, Error(ERROR, 'Field name: some message')})
+
+    def test_error_code(self):
+        assert 'some-code' == Error(ERROR, 'message', 'some-code').code
+        assert None is Error(ERROR, 'message').code
+        assert 'some-code' == Error(ERROR, 'message', code='some-code').code
+
+    def test_error_code_is_kept_when_pickled(self):
+        import pickle
+        error = pickle.loads(pickle.dumps(Error(ERROR, 'message', 'some-code')))
+        assert Error(ERROR, 'message') == error
+        assert 'some-code' == error.code
+
+    def test_error_unpacks_as_severity_and_message(self):
+        severity, message = Error(ERROR, 'message', 'some-code')
+        assert ERROR == severity
+        assert 'message' == message
+
+    def test_error_collector_deduplicates_and_keeps_ordering(self):
+        from attributecode import ErrorCollector
+        errors = ErrorCollector([Error(ERROR, 'b', 'code-b'), Error(ERROR, 'a')])
+        assert errors.append(Error(ERROR, 'c', 'code-b'))
+        assert not errors.append(Error(ERROR, 'b'))
+        errors.extend([Error(ERROR, 'a'), Error(CRITICAL, 'a')])
+        expected = [
+            Error(ERROR, 'b'),
+            Error(ERROR, 'a'),
+            Error(ERROR, 'c'),
+            Error(CRITICAL, 'a'),
+        ]
+        assert expected == errors.to_list()
+        assert expected == list(errors)
+        assert 4 == len(errors)
+        assert Error(ERROR, 'c') in errors
+        assert {'code-b': 2, None: 2} == dict(errors.counts)
+        assert errors.has_code('code-b')
+        assert not errors.has_code('other-code')
+        assert not ErrorCollector()
+
     def test_copy_license_notice_files(self):
         base_dir = get_temp_dir()
         reference_dir = get_test_loc('test_util/licenses')
@@ -655,6 +935,24 @@ description: sample
         for license in licenses:
             assert license in files_list
 
+    def test_copy_file_with_dir_merges_and_uses_the_copy_strategy(self):
+        test_dir = get_temp_dir()
+        source = os.path.join(test_dir, 'src', 'project')
+        os.makedirs(os.path.join(source, 'sub'))
+        for path in ('a.c', os.path.join('sub', 'b.c')):
+            with open(os.path.join(source, path), 'w') as f:
+                f.write(path)
+        des = os.path.join(test_dir, 'des')
+        os.makedirs(os.path.join(des, 'project', 'sub'))
+        with open(os.path.join(des, 'project', 'sub', 'b.c'), 'w') as f:
+            f.write('old')
+
+        err = util.copy_file(source, des, copy_strategy='hardlink')
+        assert isinstance(err, Error) and err.severity < CRITICAL
+        for path in ('a.c', os.path.join('sub', 'b.c')):
+            copied = os.path.join(des, 'project', path)
+            assert os.path.samefile(os.path.join(source, path), copied)
+
     def test_strip_inventory_value(self):
         test = [{'about_resource': 'empty_newlines.rpm\n\n', 'name': 'empty_newlines.rpm'},
                 {'about_resource': 'spaces_after.rpm   ',
@@ -668,3 +966,32 @@ description: sample
                     'name': 'value_after'}]
         stripped_result = util.strip_inventory_value(test)
         assert stripped_result == expected
+
+    def test_normalize_about_text(self):
+        test = ('about_resource: .\nredistribute: yes\nattribute:\tno \r\n'
+                'track_change:\nnotice_text: |\n\tredistribute: yes\n  a\tb\n')
+        expected = ('about_resource: .\nredistribute: "yes"\nattribute: "no"\n'
+                    'track_change: ""\nnotice_text: |\n    redistribute: yes\n  a    b\n')
+        assert expected == util.normalize_about_text(test)
+        assert expected == util.replace_tab_with_spaces(util.wrap_boolean_value(test))
+        assert '' == util.normalize_about_text('')
+
+    @skipUnless(run_benchmarks, 'Set ABOUTCODE_RUN_BENCHMARKS to run the benchmarks')
+    def test_normalize_about_text_is_linear_with_large_about_files(self):
+        # A microbenchmark with ABOUT files with large embedded notices: the
+        # time to normalize a four times larger text should be about four times
+        # longer and not sixteen times as with a quadratic concatenation.
+        def get_about_text(lines_count):
+            notice = ''.join('\tline %d of a notice\n' % i for i in range(lines_count))
+            return 'name: foo\nredistribute: yes\nnotice_text: |\n' + notice
+
+        small = get_about_text(25000)
+        large = get_about_text(100000)
+        assert util.normalize_about_text(large).startswith(
+            'name: foo\nredistribute: "yes"\nnotice_text: |\n    line 0')
+
+        small_time = min(timeit.repeat(
+            lambda: util.normalize_about_text(small), number=3, repeat=5))
+        large_time = min(timeit.repeat(
+            lambda: util.normalize_about_text(large), number=3, repeat=5))
+        assert large_time < small_time * 10
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+
+# ============================================================================
+#  Copyright (c) nexB Inc. http://www.nexb.com/ - All rights reserved.
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#      http://www.apache.org/licenses/LICENSE-2.0
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ============================================================================
+
+import os
+import random
+import timeit
+import unittest
+
+from testing_utils import TESTDATA_DIR
+from testing_utils import run_benchmarks
+
+from attributecode import saneyaml
+from attributecode import yaml_backend
+from attributecode.model import About
+
+
+def get_about_locations():
+    locations = []
+    for top, _dirs, files in os.walk(TESTDATA_DIR):
+        for name in files:
+            if name.lower().endswith('.about'):
+                locations.append(os.path.join(top, name))
+    return sorted(locations)
+
+
+def get_about_data():
+    """
+    Return a list of the data dumped by the About of the test ABOUT files.
+    """
+    data = []
+    for location in get_about_locations():
+        try:
+            data.append(saneyaml.load(About(location).dumps()))
+        except Exception:
+            pass
+    return data
+
+
+# Words of the generated values with YAML indicators, quotes, characters that
+# need escaping and long words
+words = [
+    'a', 'foo', 'bar:', '#x', "it's", '-', 'x' * 30, 'http://x.y/z?a=b#c',
+    '1.0', '2020-01-01', 'null', 'yes', '@a', '%', '\xe9', '\xa9', '“q”',
+    "'", '"', '{', '[', ',', '*a', '&b', '!t', '|', '>', '?', '~', '0012', '12',
+    '', '\n', '\t', '\x85', '\U0001f600',
+]
+
+
+def get_random_value(rand):
+    count = rand.randint(0, rand.choice([3, 10, 25]))
+    value = ''.join(rand.choice(words) + rand.choice(['', ' ', '  '])
+                    for _ in range(count))
+    if rand.random() < 0.3:
+        value = value.strip()
+    return rand.choice([value, value, value, True, False])
+
+
+def get_random_data(rand):
+    """
+    Return a mapping shaped as the data of an ABOUT file with random values.
+    """
+    data = {}
+    for i in range(rand.randint(1, 4)):
+        data['k' * rand.randint(1, 20) + str(i)] = get_random_value(rand)
+    if rand.random() < 0.5:
+        data['licenses'] = [
+            dict(key=get_random_value(rand), name=get_random_value(rand))
+            for _ in range(rand.randint(1, 3))]
+    if rand.random() < 0.3:
+        data['items'] = [get_random_value(rand) for _ in range(2)]
+    return data
+
+
+class YamlBackendTest(unittest.TestCase):
+
+    def test_load_is_the_same_with_both_backends(self):
+        for location in get_about_locations():
+            with open(location, encoding='utf-8', errors='replace') as txt:
+                text = txt.read().replace('\t', '    ')
+            for allow_duplicate_keys in (True, False):
+                results = []
+                for libyaml in (False, True):
+                    try:
+                        results.append(yaml_backend.load(
+                            text, allow_duplicate_keys, libyaml=libyaml))
+                    except Exception as e:
+                        results.append(type(e))
+                py_result, c_result = results
+                assert py_result == c_result, location
+                if isinstance(py_result, dict):
+                    assert list(py_result) == list(c_result), location
+
+    def test_load_loads_scalars_as_strings(self):
+        test = 'a: 12\nb: 1.0\nc: yes\nd:\ne: 2020-01-01\nf:\n  - 0012\n'
+        # saneyaml loads booleans as booleans
+        expected = {'a': '12', 'b': '1.0', 'c': True, 'd': '', 'e': '2020-01-01', 'f': ['0012']}
+        assert expected == saneyaml.load(test)
+        for libyaml in (False, True):
+            assert expected == yaml_backend.load(test, libyaml=libyaml)
+
+    def test_load_reports_duplicated_keys_with_both_backends(self):
+        test = 'a: b\nc: d\na: e\n'
+        for libyaml in (False, True):
+            assert {'a': 'e', 'c': 'd'} == yaml_backend.load(test, libyaml=libyaml)
+            try:
+                yaml_backend.load(test, allow_duplicate_keys=False, libyaml=libyaml)
+                self.fail('Exception not raised')
+            except saneyaml.UnsupportedYamlFeatureError as e:
+                assert 'Duplicate key in YAML source: a' == str(e)
+
+    def test_dump_is_the_same_as_saneyaml_for_the_test_about_files(self):
+        data = get_about_data()
+        assert any(yaml_backend.is_simple(d) for d in data)
+        for d in data:
+            assert saneyaml.dump(d) == yaml_backend.dump(d)
+
+    def test_dump_is_the_same_as_saneyaml_for_generated_data(self):
+        rand = random.Random(42)
+        simple = 0
+        for _ in range(3000):
+            data = get_random_data(rand)
+            simple += yaml_backend.is_simple(data)
+            assert saneyaml.dump(data) == yaml_backend.dump(data), repr(data)
+        assert simple > 500
+
+    def test_is_simple(self):
+        assert yaml_backend.is_simple({'a': 'b', 'c': True, 'licenses': [{'key': 'mit'}]})
+        assert yaml_backend.is_simple({'a': ['b', "c'd"]})
+        assert not yaml_backend.is_simple(['a'])
+        assert not yaml_backend.is_simple({'a': 'b\n'})
+        assert not yaml_backend.is_simple({'a': 'b\tc'})
+        assert not yaml_backend.is_simple({'a': None})
+        assert not yaml_backend.is_simple({'a': []})
+        assert not yaml_backend.is_simple({'a': [{}]})
+        assert not yaml_backend.is_simple({'a': [['b']]})
+        assert not yaml_backend.is_simple({'a': [{'b': {'c': 'd'}}]})
+        assert not yaml_backend.is_simple({'a b': 'c'})
+        assert not yaml_backend.is_simple({'a': 'b ' * 50})
+        assert yaml_backend.is_simple({'a': 'b' * 100})
+
+    def test_indent_sequences(self):
+        test = 'a: b\nc:\n- d: e\n  f: g\n- h\ni: j\n'
+        expected = 'a: b\nc:\n  - d: e\n    f: g\n  - h\ni: j\n'
+        assert expected == yaml_backend.indent_sequences(test)
+
+    @unittest.skipUnless(run_benchmarks, 'Set ABOUTCODE_RUN_BENCHMARKS to run the benchmarks')
+    @unittest.skipIf(not yaml_backend.has_libyaml, 'PyYAML is not built with libyaml')
+    def test_libyaml_backend_is_faster(self):
+        # A benchmark of both backends on thousands of ABOUT files data
+        data = [d for d in get_about_data() if yaml_backend.is_simple(d)]
+        data = (data * 100)[:1000]
+        texts = [saneyaml.dump(d) for d in data]
+
+        def timed(func):
+            return min(timeit.repeat(func, number=1, repeat=3))
+
+        py_dump = timed(lambda: [saneyaml.dump(d) for d in data])
+        c_dump = timed(lambda: [yaml_backend.dump(d) for d in data])
+        assert c_dump < py_dump
+
+        py_load = timed(lambda: [yaml_backend.load(t, libyaml=False) for t in texts])
+        c_load = timed(lambda: [yaml_backend.load(t, libyaml=True) for t in texts])
+        assert c_load < py_load
@@ -37,6 +37,10 @@ TESTDATA_DIR = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'testdat
 on_windows = 'win32' in sys.platform
 on_posix = not on_windows
 
+# The timing benchmarks are only run if this environment variable is set as
+# their wall-clock timings are not reliable on a loaded machine.
+run_benchmarks = bool(os.environ.get('ABOUTCODE_RUN_BENCHMARKS'))
+
 
 def get_test_loc(path, must_exists=True):
     """
@@ -98,6 +102,21 @@ def get_temp_dir(sub_dir_path=None):
     return new_temp_dir
 
 
+def write_file(location, content):
+    """
+    Write the `content` bytes, or text encoded as UTF-8, to the file at
+    `location`, creating its parent directories. Return this location.
+    """
+    parent = os.path.dirname(location)
+    if not os.path.exists(parent):
+        os.makedirs(parent)
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    with open(location, 'wb') as f:
+        f.write(content)
+    return location
+
+
 def extract_zip(location, target_dir):
     """
     Extract a zip archive file at location in the target_dir directory.